@@ -1,29 +1,50 @@
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, flash, has_request_context, g, Response, stream_with_context, send_file, send_from_directory
 from flask_sqlalchemy import SQLAlchemy
-from flask_bcrypt import Bcrypt
+from flask.sessions import SecureCookieSessionInterface
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import load_only
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
-# GenAI imports can differ between package versions. Try multiple import
-# locations and fall back to None if unavailable so the app can still run
-# for local testing.
-try:
-    import google.generativeai as genai
-    from google.generativeai import types
-except Exception:
-    try:
-        from google import genai
-        from google.genai import types
-    except Exception:
-        genai = None
-        types = None
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import os
 from dotenv import load_dotenv
+from markupsafe import Markup
+import atexit
+import hashlib
+import hmac
 import json
+import mimetypes
+import random
 import re
+import sys
+import threading
+import time
 import urllib.parse
 from datetime import datetime
 from uuid import uuid4
 
+import click
+
+import completion_cache
+import compression
+import db_routing
+import feed
+import fragments
+import health
+import llm_backends
+import metrics
+import migrations
+import profiling
+import progress
+import prefetch
+import prompts
+import question_codec
+import shared_state
+import similarity
+
 app = Flask(__name__)
 # Load environment variables from a local .env file if present
 load_dotenv()
@@ -32,7 +53,7 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 # Set SECRET_KEY for Flask sessions (required for session management)
 app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', os.urandom(32).hex())
 
-# Set RUN_ID for session validation (invalidates old sessions on server restart)
+# Per-process fallback for the session epoch, used only if shared state is unreachable
 app.config['RUN_ID'] = str(uuid4())
 
 # Use DATABASE_URL from .env if available, otherwise default to users.db in project folder
@@ -47,8 +68,274 @@ if database_url.startswith('postgres://'):
 app.config['SQLALCHEMY_DATABASE_URI'] = database_url
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
-db = SQLAlchemy(app)
-bcrypt = Bcrypt(app)
+db = SQLAlchemy(app, session_options={'class_': db_routing.RoutingSession})
+
+# Optional read replicas (comma-separated URLs) for views decorated with
+# @reads_from_replica. After a user's request commits a write, that user
+# reads from the primary for REPLICA_STICKY_SECONDS so they see their own
+# changes despite replication lag.
+REPLICA_STICKY_SECONDS = float(os.getenv('REPLICA_STICKY_SECONDS', 10))
+read_replicas = db_routing.ReplicaPool(retry_after=float(os.getenv('REPLICA_RETRY_SECONDS', 30)))
+
+def configure_replicas(urls):
+    read_replicas.set_engines(
+        create_engine(url.replace('postgres://', 'postgresql://', 1) if url.startswith('postgres://') else url)
+        for url in urls)
+
+configure_replicas([url.strip() for url in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if url.strip()])
+
+def stick_to_primary():
+    session['db_primary_until'] = time.time() + REPLICA_STICKY_SECONDS
+
+@event.listens_for(db_routing.RoutingSession, 'after_commit')
+def _stick_after_write(db_session):
+    if has_request_context() and db_routing.has_written(db_session):
+        stick_to_primary()
+
+def reads_from_replica(f):
+    """Run a read-only view's SELECTs on a replica when one is configured.
+
+    Falls back to the primary while the user is sticky after a write, when
+    no replica is healthy, or (re-running the view) if the replica failed
+    during it.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not len(read_replicas):
+            return f(*args, **kwargs)
+        if session.get('db_primary_until', 0) > time.time():
+            metrics.DB_READ_ROUTING.inc(target='sticky')
+            return f(*args, **kwargs)
+        replica = read_replicas.choose()
+        if replica is None:
+            metrics.DB_READ_ROUTING.inc(target='fallback')
+            return f(*args, **kwargs)
+        db.session.info[db_routing.REPLICA_KEY] = replica
+        try:
+            result = f(*args, **kwargs)
+        finally:
+            db.session.info.pop(db_routing.REPLICA_KEY, None)
+        if read_replicas.is_up(replica):
+            metrics.DB_READ_ROUTING.inc(target='replica')
+            return result
+        db.session.rollback()
+        metrics.DB_READ_ROUTING.inc(target='fallback')
+        return f(*args, **kwargs)
+    return decorated_function
+
+# State shared by all worker processes: session epoch, generated SECRET_KEY,
+# rate-limit counters and the search cache.
+state_store = shared_state.create_backend_from_env(
+    lambda: db.engine, os.path.join(app.instance_path, 'shared_state'))
+
+# Without SECRET_KEY set, one generated key is shared through state_store so
+# sessions survive restarts and are valid on every worker. It is loaded on
+# first use (serve.py loads it at startup), so importing the app needs no
+# database; until it loads, the per-process key is used.
+SECRET_KEY_RETRY_SECONDS = 30
+_secret_key_state = {'loaded': bool(os.getenv('SECRET_KEY')), 'retry_at': 0.0}
+_secret_key_lock = threading.Lock()
+
+def load_shared_secret_key():
+    """Adopt the shared SECRET_KEY (creating it if needed); returns True once loaded."""
+    if _secret_key_state['loaded']:
+        return True
+    with _secret_key_lock:
+        if _secret_key_state['loaded'] or time.monotonic() < _secret_key_state['retry_at']:
+            return _secret_key_state['loaded']
+        try:
+            with app.app_context():
+                app.config['SECRET_KEY'] = state_store.add('secret_key', app.config['SECRET_KEY'])
+            _secret_key_state['loaded'] = True
+        except Exception as e:
+            _secret_key_state['retry_at'] = time.monotonic() + SECRET_KEY_RETRY_SECONDS
+            print(f"Warning: could not load the shared SECRET_KEY, sessions will not survive restarts. {e}")
+        return _secret_key_state['loaded']
+
+class SharedKeySessionInterface(SecureCookieSessionInterface):
+    """Cookie sessions signed with the shared SECRET_KEY, loaded before the first one is read."""
+
+    def get_signing_serializer(self, app):
+        load_shared_secret_key()
+        return super().get_signing_serializer(app)
+
+app.session_interface = SharedKeySessionInterface()
+
+# Request and SQL timing. Listening on the Engine class covers every engine
+# the app creates.
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info['query_start_time'].pop()
+    operation = metrics.sql_operation(statement)
+    metrics.DB_QUERIES.inc(operation=operation)
+    metrics.DB_QUERY_LATENCY.observe(elapsed, operation=operation)
+    if has_request_context() and 'db_queries' in g:
+        g.db_queries += 1
+        g.db_time += elapsed
+
+# Opt-in profiling: per request via the X-Profile header (admins only), for
+# every request via the admin toggle, or stack sampling of requests slower
+# than PROFILE_THRESHOLD_MS. Profiles go to a bounded on-disk ring buffer.
+profiler = profiling.RequestProfiler(
+    profiling.ProfileStore(
+        os.getenv('PROFILE_DIR', os.path.join(app.instance_path, 'profiles')),
+        int(os.getenv('PROFILE_CAPACITY', 50)),
+    ),
+    threshold=float(os.getenv('PROFILE_THRESHOLD_MS', 0)) / 1000.0,
+)
+
+def _is_admin_request():
+    """True if the request carries the ADMIN_TOKEN in the X-Admin-Token header."""
+    token = os.getenv('ADMIN_TOKEN')
+    supplied = request.headers.get('X-Admin-Token', '')
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+def admin_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not _is_admin_request():
+            return jsonify({'success': False, 'error': 'Admin token required'}), 403
+        return f(*args, **kwargs)
+    return decorated_function
+
+# Sessions are stamped with this epoch at login; rotating it logs everyone out.
+# Cached briefly so login_required doesn't hit shared state on every request.
+SESSION_EPOCH_CACHE_SECONDS = 5
+_session_epoch_cache = {'value': None, 'expires': 0.0}
+
+def session_epoch():
+    now = time.monotonic()
+    if _session_epoch_cache['value'] is None or now >= _session_epoch_cache['expires']:
+        try:
+            value = state_store.add('session_epoch', uuid4().hex)
+        except Exception as e:
+            print(f"Warning: shared state unavailable, using the per-process session epoch. {e}")
+            value = app.config['RUN_ID']
+        _session_epoch_cache.update(value=value, expires=now + SESSION_EPOCH_CACHE_SECONDS)
+    return _session_epoch_cache['value']
+
+def rotate_session_epoch():
+    """Start a new session epoch, invalidating every existing login."""
+    value = uuid4().hex
+    state_store.set('session_epoch', value)
+    _session_epoch_cache.update(value=value, expires=time.monotonic() + SESSION_EPOCH_CACHE_SECONDS)
+    return value
+
+def _client_identity():
+    user_id = session.get('user_id')
+    return f'user:{user_id}' if user_id else f'ip:{request.remote_addr}'
+
+def rate_limit(name, limit, window=60, methods=None):
+    """Allow at most `limit` requests per `window` seconds per user (or IP when logged out).
+
+    Counters live in shared state, so the limit holds across worker
+    processes. A limit of 0 disables the check; if shared state is
+    unavailable requests are allowed.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            if limit > 0 and (methods is None or request.method in methods):
+                try:
+                    count = state_store.incr(f'ratelimit:{name}:{_client_identity()}', window=window)
+                except Exception as e:
+                    print(f"Warning: rate limit check failed. {e}")
+                    count = 0
+                if count > limit:
+                    response = jsonify({'success': False, 'error': 'Too many requests. Please try again later.'})
+                    response.headers['Retry-After'] = str(window - int(time.time()) % window)
+                    return response, 429
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
+
+LOGIN_RATE_LIMIT = int(os.getenv('LOGIN_RATE_LIMIT', 20))
+SEARCH_RATE_LIMIT = int(os.getenv('SEARCH_RATE_LIMIT', 30))
+
+def _profile_meta(status, error=None):
+    meta = {
+        'route': request.url_rule.rule if request.url_rule else 'unmatched',
+        'path': request.path,
+        'method': request.method,
+        'status': status,
+    }
+    if error is not None:
+        meta['error'] = str(error)
+    return meta
+
+@app.before_request
+def _start_request_timer():
+    g.request_start = time.perf_counter()
+    g.db_queries = 0
+    g.db_time = 0.0
+    force_profile = request.headers.get('X-Profile') == '1' and _is_admin_request()
+    if force_profile or profiler.enabled:
+        g.profile_state = profiler.begin(force=force_profile)
+
+@app.after_request
+def _record_request_metrics(response):
+    start = g.get('request_start')
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.HTTP_LATENCY.observe(time.perf_counter() - start, route=route, method=request.method)
+        metrics.HTTP_REQUESTS.inc(route=route, method=request.method, status=response.status_code)
+        metrics.DB_QUERIES_PER_REQUEST.observe(g.db_queries, route=route)
+        metrics.DB_TIME_PER_REQUEST.observe(g.db_time, route=route)
+    profile_state = g.pop('profile_state', None)
+    if profile_state is not None:
+        profile_id = profiler.end(profile_state, _profile_meta(response.status_code))
+        if profile_id:
+            response.headers['X-Profile-Id'] = profile_id
+    return response
+
+@app.teardown_request
+def _finish_abandoned_profile(error=None):
+    # after_request is skipped when a request dies before producing a response
+    profile_state = g.pop('profile_state', None)
+    if profile_state is not None:
+        profiler.end(profile_state, _profile_meta(500, error))
+
+# Compression of dynamic responses and fingerprinted static files
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', compression.DEFAULT_MIN_SIZE))
+static_assets = compression.StaticAssets(
+    app.static_folder, os.getenv('STATIC_CACHE_DIR', os.path.join(app.instance_path, 'static_cache')))
+try:
+    static_assets.build()
+except OSError as e:
+    print(f"Warning: could not fingerprint static files, serving them unversioned. {e}")
+
+@app.url_defaults
+def _fingerprint_static_urls(endpoint, values):
+    # url_for('static', filename='style.css') -> /static/style.<hash>.css
+    if endpoint == 'static' and 'filename' in values:
+        values['filename'] = static_assets.url_name(values['filename'])
+
+def static_file(filename):
+    """Serve static files; fingerprinted names are cached for a year and sent precompressed."""
+    original, fingerprinted = static_assets.resolve(filename)
+    if not fingerprinted:
+        return send_from_directory(app.static_folder, original)
+    path, encoding = static_assets.variant_path(filename, request.headers.get('Accept-Encoding'))
+    if path:
+        response = send_file(path, mimetype=mimetypes.guess_type(original)[0], conditional=True)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(app.static_folder, original)
+    response.headers['Cache-Control'] = compression.IMMUTABLE_CACHE_CONTROL
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+app.view_functions['static'] = static_file
+
+@app.after_request
+def _compress_response(response):
+    if request.method != 'HEAD':
+        compression.compress_response(response, request.headers.get('Accept-Encoding'), COMPRESS_MIN_SIZE)
+    return response
 
 # Database Models
 class User(db.Model):
@@ -75,15 +362,69 @@ class User(db.Model):
             'created_at': self.created_at.isoformat()
         }
 
+# How questions_data is written: 'compact' (question_codec's columnar form,
+# zlib-compressed when smaller) or 'json'. Both are always readable.
+QUESTIONS_ENCODING = os.getenv('QUESTIONS_ENCODING', 'compact')
+
+def encode_questions(questions):
+    if QUESTIONS_ENCODING == 'json':
+        return json.dumps(questions)
+    return question_codec.encode(questions)
+
 class QuestionSet(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     mentor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     query = db.Column(db.String(500), nullable=False)
     summary = db.Column(db.String(200), nullable=False)
-    questions_data = db.Column(db.Text, nullable=False)  # JSON string of questions
+    questions_data = db.Column(db.Text, nullable=False)  # see encode_questions()
     is_published = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     published_at = db.Column(db.DateTime, nullable=True)
+    # Bumped on every change; dashboard card fragments are cached on (id, updated_at)
+    updated_at = db.Column(db.DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Precomputed at save time so list views never need to load questions_data.
+    # NULL means the row predates these columns and hasn't been backfilled yet.
+    question_count = db.Column(db.Integer, nullable=True)
+    easy_count = db.Column(db.Integer, nullable=True)
+    medium_count = db.Column(db.Integer, nullable=True)
+    hard_count = db.Column(db.Integer, nullable=True)
+    
+    # Created by migrations/0002; declared here so create_all() matches
+    __table_args__ = (
+        db.Index('ix_question_set_mentor_created', 'mentor_id', 'created_at'),
+        db.Index('ix_question_set_published_created', 'is_published', 'created_at'),
+    )
+    
+    # Columns needed to render dashboard cards
+    LIST_COLUMNS = ('id', 'mentor_id', 'query', 'summary', 'is_published', 'created_at', 'published_at',
+                    'updated_at', 'question_count', 'easy_count', 'medium_count', 'hard_count')
+    
+    @classmethod
+    def list_query(cls):
+        """Query loading only the card columns (no questions_data blob)."""
+        return db.session.query(cls).options(load_only(*[getattr(cls, c) for c in cls.LIST_COLUMNS]))
+    
+    @staticmethod
+    def question_stats(questions):
+        """Count questions in total and per difficulty level."""
+        stats = {'question_count': 0, 'easy_count': 0, 'medium_count': 0, 'hard_count': 0}
+        if not isinstance(questions, list):
+            return stats
+        stats['question_count'] = len(questions)
+        for q in questions:
+            level = str(q.get('difficulty_level', '')).strip().lower() if isinstance(q, dict) else ''
+            if level in ('easy', 'medium', 'hard'):
+                stats[f'{level}_count'] += 1
+        return stats
+    
+    def set_questions(self, questions):
+        """Store the questions list and refresh the precomputed counts."""
+        self.questions_data = encode_questions(questions)
+        for column, value in self.question_stats(questions).items():
+            setattr(self, column, value)
+    
+    def get_questions(self):
+        return question_codec.decode(self.questions_data)
     
     @property
     def formatted_created_at(self):
@@ -95,7 +436,7 @@ class QuestionSet(db.Model):
 
     def to_dict(self):
         # Parse questions data and ensure URLs are valid
-        questions_data = json.loads(self.questions_data)
+        questions_data = self.get_questions()
         if isinstance(questions_data, list):
             for q in questions_data:
                 if isinstance(q, dict) and 'url' in q:
@@ -148,82 +489,402 @@ class QuestionSet(db.Model):
         # Add https:// if missing
         return 'https://' + url
 
-# Initialize the Gemini client (resilient):
-# If the Google Generative AI client isn't available or has a different API,
-# provide a safe fallback so the app can start during local tests.
-_GENAI_AVAILABLE = True
-try:
-    # Configure the client with the API key
-    api_key = os.getenv("GOOGLE_API_KEY")
-    if api_key:
-        api_key = api_key.strip()
-
-    if not api_key:
-        # The API key is essential for the app to work.
-        print("\nFATAL ERROR: The 'GOOGLE_API_KEY' environment variable is not set.")
-        print("Please get an API key from Google AI Studio and set the environment variable.\n")
-        _GENAI_AVAILABLE = False
-        raise ValueError("API key not configured. Please set the GOOGLE_API_KEY environment variable.")
-
-    genai.configure(api_key=api_key)
-
-    # List of models to try in order of preference.
-    # 'gemini-pro' is a stable name often available on v1beta.
-    # We keep others as fallbacks.
-    # Discover available models dynamically; fall back to a reasonable default list
-    DEFAULT_MODEL_CANDIDATES = [
-        'gemini-pro',
-        'gemini-1.0-pro',
-        'gemini-1.5-flash',
+class QuestionProgress(db.Model):
+    """Per-student progress on one question set, stored as bitsets.
+
+    Bit i of solved_mask/attempted_mask refers to question i of the set.
+    """
+    __table_args__ = (db.UniqueConstraint('user_id', 'question_set_id', name='uq_progress_user_set'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    question_set_id = db.Column(db.Integer, db.ForeignKey('question_set.id'), nullable=False, index=True)
+    solved_mask = db.Column(db.BigInteger, nullable=False, default=0)
+    attempted_mask = db.Column(db.BigInteger, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+# Rows per batch for backfills over question_set
+BACKFILL_BATCH_SIZE = 500
+
+class QuestionRollup(db.Model):
+    """Question counts per company x category x difficulty x platform.
+
+    Maintained incrementally on save, publish/unpublish and delete so
+    /analytics never has to parse questions_data.
+    """
+    __table_args__ = (db.UniqueConstraint('company', 'category', 'difficulty', 'platform', name='uq_rollup_dims'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    company = db.Column(db.String(100), nullable=False)
+    category = db.Column(db.String(100), nullable=False)
+    difficulty = db.Column(db.String(20), nullable=False)
+    platform = db.Column(db.String(100), nullable=False)
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    published_count = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeEvent(db.Model):
+    """A change students can see; the id is the change feed's sequence number.
+
+    Kinds: 'published', 'unpublished', 'deleted'. Rows are added in the same
+    transaction as the change itself.
+    """
+    id = db.Column(db.Integer, primary_key=True)
+    question_set_id = db.Column(db.Integer, nullable=False)
+    kind = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+def record_change(question_set_id, kind):
+    db.session.add(ChangeEvent(question_set_id=question_set_id, kind=kind))
+
+ROLLUP_DIMENSIONS = ('company', 'category', 'difficulty', 'platform')
+
+def _rollup_value(value, limit=100):
+    value = str(value or '').strip()
+    return value[:limit] if value else 'Unknown'
+
+def rollup_keys(questions):
+    """Counter of (company, category, difficulty, platform) for a list of questions."""
+    keys = Counter()
+    if not isinstance(questions, list):
+        return keys
+    for q in questions:
+        if not isinstance(q, dict):
+            continue
+        keys[(
+            _rollup_value(q.get('company')).title(),
+            _rollup_value(q.get('category')),
+            _rollup_value(q.get('difficulty_level'), 20).title(),
+            _rollup_value(q.get('platform')),
+        )] += 1
+    return keys
+
+def apply_rollup_delta(keys, total_sign=0, published_sign=0):
+    """Add keys (a Counter) to the rollup counts in the current transaction.
+
+    Uses a single executemany upsert on SQLite/PostgreSQL so concurrent
+    writers don't race on the unique dimensions; other databases fall back to
+    select+update.
+    """
+    if not keys or (not total_sign and not published_sign):
+        return
+    rows = [
+        dict(company=company, category=category, difficulty=difficulty, platform=platform,
+             total_count=n * total_sign, published_count=n * published_sign)
+        for (company, category, difficulty, platform), n in keys.items()
     ]
-    try:
-        list_models = genai.list_models()
-        # Filter models that support generateContent
-        discovered_models = []
-        for m in list_models:
+    table = QuestionRollup.__table__
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ROLLUP_DIMENSIONS),
+            set_={
+                'total_count': table.c.total_count + stmt.excluded.total_count,
+                'published_count': table.c.published_count + stmt.excluded.published_count,
+            },
+        )
+        db.session.execute(stmt, rows)
+        return
+    for values in rows:
+        row = db.session.query(QuestionRollup).filter_by(
+            **{d: values[d] for d in ROLLUP_DIMENSIONS}
+        ).with_for_update().first()
+        if row is None:
+            db.session.add(QuestionRollup(**values))
+            db.session.flush()
+        else:
+            row.total_count += values['total_count']
+            row.published_count += values['published_count']
+
+def rebuild_rollups(batch_size=BACKFILL_BATCH_SIZE):
+    """Recompute the rollup table from every question set, reading in batches."""
+    totals = Counter()
+    published = Counter()
+    last_id = 0
+    while True:
+        rows = db.session.query(QuestionSet.id, QuestionSet.questions_data, QuestionSet.is_published).filter(
+            QuestionSet.id > last_id
+        ).order_by(QuestionSet.id).limit(batch_size).all()
+        if not rows:
+            break
+        for _, questions_data, is_published in rows:
             try:
-                # Some SDKs expose supported_generation_methods; guard defensively
-                methods = getattr(m, 'supported_generation_methods', None)
-                name = getattr(m, 'name', None) or getattr(m, 'model', None)
-                if name and (methods is None or 'generateContent' in methods or 'generate_content' in methods):
-                    # Normalize name by stripping versioned prefix if present
-                    if name.startswith('models/'):
-                        name = name.split('/', 1)[1]
-                    discovered_models.append(name)
-            except Exception:
+                keys = rollup_keys(question_codec.decode(questions_data))
+            except (TypeError, ValueError):
                 continue
-        MODEL_CANDIDATES = discovered_models or DEFAULT_MODEL_CANDIDATES
-    except Exception:
-        MODEL_CANDIDATES = DEFAULT_MODEL_CANDIDATES
+            totals.update(keys)
+            if is_published:
+                published.update(keys)
+        last_id = rows[-1][0]
+    db.session.query(QuestionRollup).delete()
+    db.session.bulk_insert_mappings(QuestionRollup, [
+        dict(zip(ROLLUP_DIMENSIONS, key), total_count=n, published_count=published.get(key, 0))
+        for key, n in totals.items()
+    ])
+    db.session.commit()
+    return len(totals)
 
-    def get_completion(prompt):
-        """Tries a list of models to get a completion."""
-        last_error_message = None
-        for model_name in MODEL_CANDIDATES:
-            try:
-                model = genai.GenerativeModel(model_name)
-                response = model.generate_content(prompt, generation_config={
-                    "temperature": 0,
-                    "max_output_tokens": 800,
-                })
-                return response.text
-            except Exception as e:
-                # Check for a common authentication error
-                if "API_KEY_INVALID" in str(e):
-                    raise ValueError("Your Google API key is invalid. Please check your key and try again.") from e
-                last_error_message = str(e)
-                print(f"Warning: Model '{model_name}' failed with error: {e}. Trying next model.")
-        raise RuntimeError(
-            (
-                "All candidate models failed. This can happen if your API key is invalid, has expired, or if you have network issues. "
-                f"Last error: {last_error_message}"
-            )
+# Schema changes ship as ordered scripts in migrations/; see migrations/__init__.py
+SCHEMA_VERSION = migrations.latest_version()
+
+def current_schema_version():
+    """Highest applied migration, or 0 if the database predates version tracking."""
+    try:
+        return migrations.current_version(db.engine)
+    except SQLAlchemyError:
+        return 0
+
+def schema_is_current():
+    return current_schema_version() >= SCHEMA_VERSION
+
+def run_migrations(target=None):
+    """Apply pending migrations; returns the applied ones. Must be called inside an app context."""
+    return migrations.upgrade(db.engine, app_module=sys.modules[__name__], target=target)
+
+# Student progress: clicks are buffered in memory and flushed in batches
+PROGRESS_FLUSH_CHUNK = 500
+
+def _load_user_progress(user_id):
+    with app.app_context():
+        rows = db.session.query(
+            QuestionProgress.question_set_id, QuestionProgress.solved_mask, QuestionProgress.attempted_mask
+        ).filter_by(user_id=user_id).all()
+        return {set_id: (solved or 0, attempted or 0) for set_id, solved, attempted in rows}
+
+def _apply_progress_batch(batch):
+    """Upsert buffered progress in one transaction: one SELECT per chunk, then bulk UPDATE/INSERT."""
+    written = {}
+    with app.app_context():
+        items = list(batch.items())
+        now = datetime.utcnow()
+        for start in range(0, len(items), PROGRESS_FLUSH_CHUNK):
+            chunk = items[start:start + PROGRESS_FLUSH_CHUNK]
+            user_ids = {user_id for (user_id, _), _ in chunk}
+            set_ids = {set_id for (_, set_id), _ in chunk}
+            live_sets = {row[0] for row in db.session.query(QuestionSet.id).filter(QuestionSet.id.in_(set_ids))}
+            existing = {
+                (row.user_id, row.question_set_id): row
+                for row in db.session.query(
+                    QuestionProgress.id, QuestionProgress.user_id, QuestionProgress.question_set_id,
+                    QuestionProgress.solved_mask, QuestionProgress.attempted_mask
+                ).filter(QuestionProgress.user_id.in_(user_ids), QuestionProgress.question_set_id.in_(set_ids))
+            }
+            updates, inserts = [], []
+            for key, ops in chunk:
+                if key[1] not in live_sets:
+                    # The set was deleted since the click was buffered
+                    continue
+                row = existing.get(key)
+                if row is not None:
+                    solved, attempted = ops.apply(row.solved_mask or 0, row.attempted_mask or 0)
+                    updates.append({'id': row.id, 'solved_mask': solved, 'attempted_mask': attempted, 'updated_at': now})
+                else:
+                    solved, attempted = ops.apply(0, 0)
+                    inserts.append({'user_id': key[0], 'question_set_id': key[1], 'solved_mask': solved,
+                                    'attempted_mask': attempted, 'updated_at': now})
+                written[key] = (solved, attempted)
+            if updates:
+                db.session.bulk_update_mappings(QuestionProgress, updates)
+            if inserts:
+                db.session.bulk_insert_mappings(QuestionProgress, inserts)
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+    return written
+
+progress_tracker = progress.ProgressTracker(
+    _load_user_progress,
+    _apply_progress_batch,
+    flush_interval=float(os.getenv('PROGRESS_FLUSH_INTERVAL', 2)),
+    max_pending=int(os.getenv('PROGRESS_MAX_PENDING', 5000)),
+    # Other workers' flushes invalidate this process's cached masks
+    versions=progress.SharedVersions(state_store, context=app.app_context),
+)
+
+@atexit.register
+def _flush_progress_on_exit():
+    try:
+        progress_tracker.flush()
+    except Exception as e:
+        print(f"Warning: could not flush progress on exit: {e}")
+
+# Question counts of published sets, so progress clicks don't each hit the DB
+_SET_SIZE_TTL = 60
+_set_size_cache = {}
+
+def _published_set_size(set_id):
+    """Number of questions in a published set, or None if it isn't published."""
+    cached = _set_size_cache.get(set_id)
+    if cached is not None and cached[1] > time.monotonic():
+        return cached[0]
+    row = db.session.query(QuestionSet.question_count).filter_by(id=set_id, is_published=True).first()
+    size = None if row is None else (row[0] if row[0] is not None else progress.MAX_QUESTIONS)
+    if len(_set_size_cache) > 10000:
+        _set_size_cache.clear()
+    _set_size_cache[set_id] = (size, time.monotonic() + _SET_SIZE_TTL)
+    return size
+
+# Rendered dashboard cards, keyed on (template, set id, updated_at)
+card_cache = fragments.FragmentCache(int(os.getenv('FRAGMENT_CACHE_SIZE', '20000')))
+# Stands in for the per-student solved count inside cached cards; random so
+# no set's text can contain it
+_CARD_SLOT = f'<!--slot-{uuid4().hex}-->'
+
+def render_cards(template_name, questions, solved_counts=None):
+    """HTML for one card per set, re-rendering only cards whose updated_at changed.
+
+    Cards are cached with a placeholder where the solved count goes, so one
+    cached copy serves every student.
+    """
+    template = app.jinja_env.get_template(template_name)
+    slot = Markup(_CARD_SLOT)
+    solved_counts = solved_counts or {}
+    html = []
+    for question in questions:
+        def render(question=question):
+            return tuple(template.render(question=question, solved=slot).split(_CARD_SLOT))
+        if question.updated_at is None:
+            parts = render()
+        else:
+            parts = card_cache.get_or_render((template_name, question.id, question.updated_at), render)
+        html.append(str(solved_counts.get(question.id, 0)).join(parts))
+    return Markup(''.join(html))
+
+# Live updates for student dashboards: one poller per process reads new
+# change events and every /feed/stream reads them from its buffer. Streams
+# are short long-polls: each holds a server thread for at most
+# FEED_STREAM_SECONDS, and the browser reconnects FEED_RETRY_SECONDS later.
+FEED_POLL_INTERVAL = float(os.getenv('FEED_POLL_INTERVAL', 1.0))
+FEED_HEARTBEAT_SECONDS = 15
+FEED_STREAM_SECONDS = float(os.getenv('FEED_STREAM_SECONDS', 1))
+FEED_RETRY_SECONDS = float(os.getenv('FEED_RETRY_SECONDS', 5))
+# Each open stream holds a server thread; keep some free for other requests
+FEED_MAX_STREAMS = int(os.getenv('FEED_MAX_STREAMS', max(int(os.getenv('WAITRESS_THREADS', 8)) // 2, 1)))
+# Mean reconnect delay for clients turned away by FEED_MAX_STREAMS
+FEED_BUSY_RETRY_SECONDS = 15
+
+def _feed_retry_ms(seconds):
+    # Jittered, so clients that connected together don't keep returning together
+    return int(random.uniform(500, 1500) * seconds)
+
+def latest_change_seq():
+    return db.session.query(db.func.max(ChangeEvent.id)).scalar() or 0
+
+def fetch_change_events(after_seq, limit):
+    """Events after `after_seq` as dicts; 'published' ones carry the student card HTML."""
+    with app.app_context():
+        rows = db.session.query(ChangeEvent).filter(ChangeEvent.id > after_seq).order_by(ChangeEvent.id).limit(limit).all()
+        published_ids = {row.question_set_id for row in rows if row.kind == 'published'}
+        cards = {}
+        if published_ids:
+            # Sets unpublished again since have no card; their next event removes them
+            for question in QuestionSet.list_query().filter(QuestionSet.id.in_(published_ids),
+                                                            QuestionSet.is_published.is_(True)):
+                cards[question.id] = str(render_cards('student_question_card.html', [question]))
+        events = []
+        for row in rows:
+            event = {'seq': row.id, 'kind': row.kind, 'question_set_id': row.question_set_id}
+            if row.kind == 'published' and row.question_set_id in cards:
+                event['card'] = cards[row.question_set_id]
+            events.append(event)
+        return events
+
+def _latest_change_seq_in_context():
+    with app.app_context():
+        return latest_change_seq()
+
+# Keep polling between a client's reconnects, so it is answered from a fresh buffer
+change_feed = feed.ChangeFeed(fetch_change_events, _latest_change_seq_in_context, interval=FEED_POLL_INTERVAL,
+                              linger=3 * FEED_RETRY_SECONDS)
+
+# Completion backend (Gemini by default, LLM_BACKEND=fake for offline runs).
+# Falls back to a placeholder backend so the app can start during local tests.
+# Creating it is cheap: the SDK and model list load on the first completion.
+completion_backend = llm_backends.create_backend_from_env()
+_GENAI_AVAILABLE = completion_backend.available
+# Completion calls in flight in this process; prefetches only use idle slots
+upstream_gauge = prefetch.UpstreamGauge()
+
+def set_completion_backend(backend):
+    """Swap the completion backend at runtime (used by tests and load tests)."""
+    global completion_backend, _GENAI_AVAILABLE
+    completion_backend = backend
+    _GENAI_AVAILABLE = backend.available
+
+# Identical prompts (same backend, models and budget) are answered from a
+# shared cache instead of spending tokens again
+COMPLETION_CACHE = os.getenv('COMPLETION_CACHE', '1') != '0'
+completion_responses = completion_cache.CompletionCache(
+    os.getenv('COMPLETION_CACHE_PATH', os.path.join(app.instance_path, 'completion_cache.sqlite3')) or None,
+    memory_entries=int(os.getenv('COMPLETION_CACHE_MEMORY_ENTRIES', 1000)),
+    max_bytes=int(float(os.getenv('COMPLETION_CACHE_MAX_MB', 100)) * 1024 * 1024),
+    ttl=float(os.getenv('COMPLETION_CACHE_TTL', 86400)),
+    on_result=lambda result: metrics.LLM_COMPLETION_CACHE.inc(result=result),
+)
+
+# Outcome of the last real completion call, reported by /health/ready
+upstream_status = health.UpstreamStatus()
+
+def _cacheable(text, validate):
+    if not isinstance(text, str) or not text.strip() or text == llm_backends.UNAVAILABLE_TEXT:
+        return False
+    if validate is not None:
+        try:
+            validate(text)
+        except Exception:
+            return False
+    return True
+
+def get_completion(prompt, max_output_tokens=None, endpoint=None, validate=None, cache=True, cache_ttl=None):
+    """Get a completion and record estimated token usage and latency.
+
+    `max_output_tokens` defaults to the old fixed budget; callers generating a
+    known number of questions should pass `prompts.output_budget(count)`.
+    Usage is attributed to `endpoint`, or to the current Flask endpoint.
+    `validate(text)` raises for unusable responses; with hedging enabled the
+    first response that passes it is returned, and only responses that pass
+    it are cached. `cache=False` always calls the model; `cache_ttl`
+    overrides COMPLETION_CACHE_TTL for the stored response.
+    """
+    if max_output_tokens is None:
+        max_output_tokens = prompts.DEFAULT_OUTPUT_TOKENS
+    if endpoint is None and has_request_context():
+        endpoint = request.endpoint
+    key = None
+    if cache and COMPLETION_CACHE:
+        key = completion_cache.make_key(completion_backend.name, completion_backend.model_candidates,
+                                        max_output_tokens, prompt)
+        cached = completion_responses.get(key)
+        if cached is not None:
+            return cached
+    start = time.perf_counter()
+    text = None
+    error = None
+    try:
+        with upstream_gauge.track():
+            text = completion_backend.generate(prompt, max_output_tokens, validate=validate)
+        if key is not None and _cacheable(text, validate):
+            completion_responses.put(key, text, ttl=cache_ttl)
+        return text
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        upstream_status.record(isinstance(text, str) and text != llm_backends.UNAVAILABLE_TEXT, elapsed, error)
+        prompts.usage.record(
+            endpoint,
+            prompts.estimate_tokens(prompt),
+            prompts.estimate_tokens(text) if isinstance(text, str) else 0,
+            elapsed,
+            error=text is None,
         )
-except Exception as e:
-    _GENAI_AVAILABLE = False
-    print(f"Warning: Google Generative AI not available. {e}")
-    def get_completion(prompt):
-        return "[AI unavailable in this environment]"
 
 @app.route('/health/genai')
 def genai_health():
@@ -239,9 +900,10 @@ def genai_health():
     status = {
         'success': True,
         'ai_available': _GENAI_AVAILABLE,
+        'backend': completion_backend.name,
         'api_key_present': api_key_present,
         'api_key_masked': api_key_masked,
-        'model_candidates': [] if not _GENAI_AVAILABLE else MODEL_CANDIDATES,
+        'model_candidates': [] if not _GENAI_AVAILABLE else completion_backend.model_candidates,
     }
     if not api_key_present:
         status['message'] = 'GOOGLE_API_KEY not found in environment.'
@@ -251,18 +913,145 @@ def genai_health():
         status['message'] = 'AI configured and available.'
     return jsonify(status)
 
+STARTED_AT = time.time()
+# The deep check calls the model at most once per HEALTH_DEEP_MIN_INTERVAL
+# across all workers; in between every worker answers with the stored result
+HEALTH_DEEP_MAX_AGE = float(os.getenv('HEALTH_DEEP_MAX_AGE', 60))
+HEALTH_DEEP_MIN_INTERVAL = float(os.getenv('HEALTH_DEEP_MIN_INTERVAL', 10))
+deep_health = health.DeepCheck(
+    state_store,
+    # Bypass the completion cache: a cached answer says nothing about the upstream
+    lambda: get_completion("Reply with the single word: OK", endpoint='genai_live_test', cache=False),
+    max_age=HEALTH_DEEP_MAX_AGE,
+    min_interval=HEALTH_DEEP_MIN_INTERVAL,
+)
+
+@app.route('/health/live')
+def health_live():
+    """Liveness: the process is serving requests. Does no I/O."""
+    return jsonify({'success': True, 'status': 'alive', 'pid': os.getpid(),
+                    'uptime_seconds': round(time.time() - STARTED_AT, 1)})
+
+@app.route('/health/ready')
+def health_ready():
+    """Readiness: the database answers; reports the last known model status without calling it."""
+    start = time.perf_counter()
+    database = health.timed(lambda: db.session.execute(text('SELECT 1')).scalar())
+    database.pop('result', None)
+    if not database['ok']:
+        db.session.rollback()
+    last_call = upstream_status.snapshot()
+    last_deep = deep_health.last()
+    latest = max((c for c in (last_call, last_deep) if c is not None), key=lambda c: c['at'], default=None)
+    model = {
+        'backend': completion_backend.name,
+        'available': _GENAI_AVAILABLE,
+        'ok': _GENAI_AVAILABLE and (latest is None or latest['ok']),
+        'last_call': last_call,
+        'last_deep_check': last_deep,
+    }
+    status = 'ready' if model['ok'] else 'degraded'
+    if not database['ok']:
+        status = 'unavailable'
+    body = {
+        'success': database['ok'],
+        'status': status,
+        'checks': {'database': database, 'model': model},
+        'duration_ms': round((time.perf_counter() - start) * 1000, 2),
+    }
+    return jsonify(body), 200 if database['ok'] else 503
+
 @app.route('/health/genai/test')
 def genai_live_test():
-    """Perform a live completion call to verify end-to-end function and return detailed diagnostics."""
-    if not os.getenv("GOOGLE_API_KEY"):
+    """Deep check: a real completion, reused by every worker for HEALTH_DEEP_MAX_AGE seconds.
+
+    `?fresh=1` asks for a new probe, still subject to HEALTH_DEEP_MIN_INTERVAL.
+    """
+    if not os.getenv("GOOGLE_API_KEY") and not _GENAI_AVAILABLE:
         return jsonify({'success': False, 'error': 'GOOGLE_API_KEY not set in environment.'}), 400
     if not _GENAI_AVAILABLE:
         return jsonify({'success': False, 'error': 'AI client not available. Initialization failed.'}), 500
-    try:
-        text = get_completion("Reply with the single word: OK")
-        return jsonify({'success': True, 'result': text, 'model_candidates': MODEL_CANDIDATES})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    result = deep_health.run(fresh=request.args.get('fresh') == '1')
+    if result is None:
+        metrics.HEALTH_DEEP_CHECKS.inc(result='throttled')
+        response = jsonify({'success': False, 'error': 'A deep check is already in progress. Try again shortly.'})
+        response.headers['Retry-After'] = str(max(int(HEALTH_DEEP_MIN_INTERVAL), 1))
+        return response, 429
+    if result['cached']:
+        metrics.HEALTH_DEEP_CHECKS.inc(result='cached')
+    else:
+        metrics.HEALTH_DEEP_CHECKS.inc(result='ok' if result['ok'] else 'failed')
+    body = {
+        'success': result['ok'],
+        'model_candidates': completion_backend.model_candidates,
+        'cached': result['cached'],
+        'age_seconds': result['age_seconds'],
+        'duration_ms': result['duration_ms'],
+        'checked_at': datetime.utcfromtimestamp(result['at']).isoformat() + 'Z',
+    }
+    if result['ok']:
+        body['result'] = result.get('result')
+    else:
+        body['error'] = result.get('error')
+    return jsonify(body), 200 if result['ok'] else 503
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose request, SQL and LLM timings in Prometheus text format."""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/admin/profiling', methods=['GET', 'POST'])
+@admin_required
+def admin_profiling():
+    """Show or change profiling settings: {"profile_all": bool, "threshold_ms": number|null}."""
+    if request.method == 'POST':
+        data = request.get_json(silent=True) or {}
+        if 'profile_all' in data:
+            profiler.profile_all = bool(data['profile_all'])
+        if 'threshold_ms' in data:
+            try:
+                threshold_ms = float(data['threshold_ms'] or 0)
+            except (TypeError, ValueError):
+                return jsonify({'success': False, 'error': 'threshold_ms must be a number'}), 400
+            profiler.set_threshold(threshold_ms / 1000.0)
+    return jsonify({'success': True, 'profiling': profiler.status()})
+
+@app.route('/admin/sessions/rotate', methods=['POST'])
+@admin_required
+def admin_rotate_sessions():
+    """Log out every user on every worker."""
+    rotate_session_epoch()
+    return jsonify({'success': True})
+
+@app.route('/admin/profiles')
+@admin_required
+def admin_profiles():
+    """List stored profiles, newest first."""
+    return jsonify({'success': True, 'profiles': profiler.store.list()})
+
+@app.route('/admin/profiles/<profile_id>')
+@admin_required
+def admin_profile_detail(profile_id):
+    """Return one stored profile including its stats or sampled stacks."""
+    record = profiler.store.get(profile_id)
+    if record is None:
+        return jsonify({'success': False, 'error': 'Profile not found'}), 404
+    return jsonify({'success': True, 'profile': record})
+
+@app.route('/health/genai/usage')
+def genai_usage():
+    """Return estimated token and latency counters per endpoint."""
+    return jsonify({
+        'success': True,
+        'usage': prompts.usage.snapshot(),
+        'templates': {
+            name: {
+                'static_tokens': prompts.registry.get(name).static_tokens,
+                'max_output_tokens': prompts.registry.get(name).max_output_tokens,
+            }
+            for name in prompts.registry.names()
+        },
+    })
 
 # Authentication decorator
 def login_required(f):
@@ -285,9 +1074,9 @@ def login_required(f):
             session.clear()
             return redirect(url_for('login'))
 
-        # If the server restarted, previous sessions should be invalidated.
+        # Sessions from before the last epoch rotation are no longer valid.
         session_run_id = session.get('run_id')
-        if session_run_id != app.config.get('RUN_ID'):
+        if session_run_id != session_epoch():
             session.clear()
             return redirect(url_for('login'))
         return f(*args, **kwargs)
@@ -295,6 +1084,7 @@ def login_required(f):
 
 # Authentication Routes
 @app.route('/login', methods=['GET', 'POST'])
+@rate_limit('login', LOGIN_RATE_LIMIT, methods=('POST',))
 def login():
     """Login page"""
     if request.method == 'POST':
@@ -308,8 +1098,8 @@ def login():
             session['user_id'] = user.id
             session['username'] = user.username
             session['user_type'] = user.user_type
-            # stamp the session with current run id so old cookies are invalidated
-            session['run_id'] = app.config.get('RUN_ID')
+            # stamp the session with the current epoch so old cookies can be invalidated
+            session['run_id'] = session_epoch()
             return jsonify({
                 'success': True,
                 'message': 'Login successful',
@@ -401,8 +1191,8 @@ def index():
         return redirect(url_for('login'))
 
     # If logged in, direct to appropriate dashboard
-    # Invalidate sessions generated by previous server runs
-    if session.get('run_id') != app.config.get('RUN_ID'):
+    # Invalidate sessions from before the last epoch rotation
+    if session.get('run_id') != session_epoch():
         session.clear()
         return redirect(url_for('login'))
 
@@ -421,45 +1211,619 @@ def mentor_dashboard():
     try:
         # Get all of the mentor's saved questions (both drafts and published)
         mentor_id = session.get('user_id')
-        saved_questions = db.session.query(QuestionSet).filter_by(mentor_id=mentor_id).order_by(QuestionSet.created_at.desc()).all()
+        saved_questions = QuestionSet.list_query().filter_by(mentor_id=mentor_id).order_by(QuestionSet.created_at.desc()).all()
 
         return render_template('mentor_dashboard.html', 
                              user=session.get('username'), 
                              user_type=session.get('user_type'),
-                             saved_questions=saved_questions)
+                             saved_questions=saved_questions,
+                             question_cards=render_cards('mentor_question_card.html', saved_questions))
     except Exception as e:
         print(f"Error in mentor dashboard: {str(e)}")
         # Return empty list if there's an error
         return render_template('mentor_dashboard.html', 
                              user=session.get('username'), 
                              user_type=session.get('user_type'),
-                             saved_questions=[])
+                             saved_questions=[],
+                             question_cards='')
 
 @app.route('/student')
 @login_required
+@reads_from_replica
 def student_dashboard():
     """Student dashboard with published questions"""
     if session.get('user_type') != 'student':
         return redirect(url_for('mentor_dashboard'))
     
     try:
+        # Read before the list so the live feed may repeat a change but never miss one
+        feed_seq = latest_change_seq()
         # Get all published questions
-        published_questions = db.session.query(QuestionSet).filter_by(is_published=True).order_by(QuestionSet.created_at.desc()).all()
+        published_questions = QuestionSet.list_query().filter_by(is_published=True).order_by(QuestionSet.created_at.desc()).all()
+        # Solved counts come from the cached per-user progress aggregate
+        solved_counts = progress_tracker.solved_counts(session.get('user_id'))
 
         return render_template('student_dashboard.html', 
                              user=session.get('username'), 
                              user_type=session.get('user_type'),
-                             published_questions=published_questions)
+                             published_questions=published_questions,
+                             question_cards=render_cards('student_question_card.html', published_questions,
+                                                         solved_counts),
+                             feed_seq=feed_seq)
     except Exception as e:
         print(f"Error in student dashboard: {str(e)}")
         # Return empty list if there's an error
         return render_template('student_dashboard.html', 
                              user=session.get('username'), 
                              user_type=session.get('user_type'),
-                             published_questions=[])
+                             published_questions=[],
+                             question_cards='',
+                             feed_seq=None)
+
+@app.route('/feed/stream')
+@login_required
+def feed_stream():
+    """Server-sent events for changes to published sets.
+
+    Resumes after the Last-Event-ID header (set by EventSource on
+    reconnect) or the `after` parameter. A stream ends once it has sent
+    events, or after FEED_STREAM_SECONDS without any, and the browser
+    reconnects after its `retry:` delay; a client too far behind gets a
+    'reset' event and should reload. Over FEED_MAX_STREAMS the stream ends at
+    once with a 'busy' event and a longer retry, since EventSource gives up
+    for good on a non-200 response.
+    """
+    try:
+        after = int(request.headers.get('Last-Event-ID') or request.args.get('after'))
+    except (TypeError, ValueError):
+        after = latest_change_seq()
+    if change_feed.listeners >= FEED_MAX_STREAMS:
+        return Response(f'retry: {_feed_retry_ms(FEED_BUSY_RETRY_SECONDS)}\nevent: busy\ndata: {{}}\n\n', mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'})
+    # Don't hold a pooled connection for the life of the stream
+    db.session.remove()
+
+    def generate(after=after):
+        deadline = time.monotonic() + FEED_STREAM_SECONDS
+        yield f'retry: {_feed_retry_ms(FEED_RETRY_SECONDS)}\n\n'
+        with change_feed.listening():
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                events = change_feed.wait(after, timeout=min(FEED_HEARTBEAT_SECONDS, remaining))
+                if events is None:
+                    yield 'event: reset\ndata: {}\n\n'
+                    return
+                if not events:
+                    yield ': keepalive\n\n'
+                    continue
+                for event in events:
+                    after = event['seq']
+                    yield f"id: {after}\nevent: {event['kind']}\ndata: {json.dumps(event)}\n\n"
+                # Hand the thread back; the browser reconnects after the retry delay
+                return
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+# Limits for /search question generation. Requests above SEARCH_BATCH_SIZE
+# are split into sub-prompts which run in parallel.
+DEFAULT_QUESTION_COUNT = 5
+MAX_QUESTION_COUNT = int(os.getenv('SEARCH_MAX_QUESTIONS', 20))
+SEARCH_BATCH_SIZE = max(int(os.getenv('SEARCH_BATCH_SIZE', 5)), 1)
+SEARCH_MAX_PARALLEL = max(int(os.getenv('SEARCH_MAX_PARALLEL', 4)), 1)
+DIFFICULTY_LEVELS = ('Easy', 'Medium', 'Hard')
+REQUIRED_QUESTION_FIELDS = ['url', 'platform', 'topic', 'difficulty_level', 'company', 'category']
+
+class AIUnavailableError(RuntimeError):
+    """Raised when the completion backend returns the 'AI unavailable' placeholder."""
+
+def _parse_search_options(data):
+    """Validate count/difficulty/platforms from a /search body.
+
+    Returns (count, difficulties, platforms) where `difficulties` is a list with
+    one label per question (or None) and `platforms` a list of names (or None).
+    """
+    raw_count = data.get('count')
+    difficulty = data.get('difficulty')
+    platforms = data.get('platforms')
+
+    count = None
+    if raw_count not in (None, ''):
+        try:
+            count = int(raw_count)
+        except (TypeError, ValueError):
+            raise ValueError('count must be an integer')
+        if count < 1 or count > MAX_QUESTION_COUNT:
+            raise ValueError(f'count must be between 1 and {MAX_QUESTION_COUNT}')
+
+    difficulties = None
+    if difficulty:
+        if isinstance(difficulty, str):
+            difficulty = {difficulty: 1}
+        if not isinstance(difficulty, dict):
+            raise ValueError('difficulty must be a level name or an object like {"Easy": 2, "Medium": 3}')
+        weights = {}
+        for level, value in difficulty.items():
+            canonical = next((d for d in DIFFICULTY_LEVELS if d.lower() == str(level).strip().lower()), None)
+            if canonical is None:
+                raise ValueError(f'Unknown difficulty level: {level}')
+            try:
+                value = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f'Difficulty weight for {level} must be a number')
+            if value < 0:
+                raise ValueError(f'Difficulty weight for {level} must not be negative')
+            weights[canonical] = weights.get(canonical, 0) + value
+        total = sum(weights.values())
+        if total <= 0:
+            raise ValueError('difficulty weights must add up to more than zero')
+        all_whole = all(float(v).is_integer() for v in weights.values())
+        if count is None:
+            count = int(total) if all_whole and total <= MAX_QUESTION_COUNT else DEFAULT_QUESTION_COUNT
+        if all_whole and total == count:
+            allocation = {level: int(v) for level, v in weights.items()}
+        else:
+            # Proportional split using largest remainders so the counts add up to `count`
+            exact = {level: count * v / total for level, v in weights.items()}
+            allocation = {level: int(x) for level, x in exact.items()}
+            leftover = count - sum(allocation.values())
+            for level in sorted(exact, key=lambda l: exact[l] - allocation[l], reverse=True)[:leftover]:
+                allocation[level] += 1
+        difficulties = [level for level in DIFFICULTY_LEVELS for _ in range(allocation.get(level, 0))]
+
+    if platforms:
+        if isinstance(platforms, str):
+            platforms = [platforms]
+        if not isinstance(platforms, list):
+            raise ValueError('platforms must be a list of platform names')
+        platforms = [str(p).strip() for p in platforms if str(p).strip()] or None
+
+    return count or DEFAULT_QUESTION_COUNT, difficulties, platforms
+
+def _plan_batches(count, difficulties=None):
+    """Split a request into sub-prompts of at most SEARCH_BATCH_SIZE questions.
+
+    Difficulty labels are dealt round-robin so each batch gets a similar mix.
+    Returns a list of (batch_count, batch_difficulties) tuples.
+    """
+    n_batches = -(-count // SEARCH_BATCH_SIZE)
+    if difficulties:
+        return [(len(difficulties[i::n_batches]), difficulties[i::n_batches]) for i in range(n_batches)]
+    base, extra = divmod(count, n_batches)
+    return [(base + (1 if i < extra else 0), None) for i in range(n_batches)]
+
+def _strip_code_fence(text):
+    """Remove a surrounding markdown code block (```json ... ```) if present."""
+    text = text.strip()
+    if text.startswith('```'):
+        # Find the first newline after ```
+        first_newline = text.find('\n')
+        if first_newline != -1:
+            text = text[first_newline:].strip()
+        # Remove trailing ```
+        if text.endswith('```'):
+            text = text[:-3].strip()
+    return text
+
+def _parse_questions_response(response_text):
+    """Parse the JSON array of questions out of a raw model response."""
+    # Find the start and end of the JSON block to handle responses
+    # that might include extra text like "```json\n[...]\n```"
+    clean_response = _strip_code_fence(response_text)
+    
+    # Find JSON array boundaries
+    json_start = clean_response.find('[')
+    json_end = clean_response.rfind(']') + 1
+    
+    if json_start == -1 or json_end == 0:
+        # Try to find any JSON structure
+        json_start = clean_response.find('{')
+        if json_start != -1:
+            # Might be a single object, wrap in array
+            json_end = clean_response.rfind('}') + 1
+            if json_end > json_start:
+                clean_response = '[' + clean_response[json_start:json_end] + ']'
+                json_start = 0
+                json_end = len(clean_response)
+        
+        if json_start == -1 or json_end == 0:
+            raise json.JSONDecodeError("No JSON array found in AI response", response_text, 0)
+    else:
+        clean_response = clean_response[json_start:json_end]
+    
+    # Parse JSON response
+    try:
+        questions_list = json.loads(clean_response)
+    except json.JSONDecodeError:
+        # Try to fix common issues
+        # Remove any trailing commas before closing brackets
+        clean_response = re.sub(r',\s*}', '}', clean_response)
+        clean_response = re.sub(r',\s*]', ']', clean_response)
+        questions_list = json.loads(clean_response)
+    
+    # Ensure it's a list
+    if not isinstance(questions_list, list):
+        questions_list = [questions_list]
+    
+    if len(questions_list) == 0:
+        raise ValueError("AI returned an empty list of questions")
+    return questions_list
+
+def _finalize_questions(questions_list, extracted_company):
+    """Fill in company names, warn about missing fields and normalize URLs in place."""
+    for i, q in enumerate(questions_list):
+        if not isinstance(q, dict):
+            raise ValueError(f"Question {i+1} is not a valid object")
+        
+        # Ensure company field exists - use extracted company or default to "General"
+        company_name = str(q.get('company', '')).strip()
+        if not company_name or company_name.lower() == 'general':
+            # Use extracted company from query, or keep existing if it's valid
+            q['company'] = extracted_company
+        else:
+            # Ensure company name is properly capitalized
+            q['company'] = company_name.title()
+        
+        # Ensure all other required fields exist
+        missing = [f for f in REQUIRED_QUESTION_FIELDS if f not in q or (f != 'company' and not q[f])]
+        if missing:
+            print(f"Warning: Question {i+1} missing fields: {missing}")
+        
+        # Use the same normalization function
+        q['url'] = QuestionSet._normalize_url(
+            q.get('url', ''),
+            q.get('platform', ''),
+            q.get('topic', '')
+        )
+    return questions_list
+
+def _question_url_key(url):
+    """Key used to deduplicate questions: host without www, path without trailing slash."""
+    parsed = urllib.parse.urlsplit(str(url or '').strip().lower())
+    host = parsed.netloc[4:] if parsed.netloc.startswith('www.') else parsed.netloc
+    key = host + parsed.path.rstrip('/')
+    if host.endswith('google.com') and parsed.path == '/search':
+        # Fallback search links differ only by their query string
+        key += '?' + parsed.query
+    return key
+
+def _platform_allowed(question, platforms):
+    if not platforms:
+        return True
+    platform = str(question.get('platform', '')).lower()
+    return any(p.lower() in platform or platform in p.lower() for p in platforms if platform)
+
+def _generate_batch(summary_text, extracted_company, count, difficulties, platforms, part, parts, endpoint,
+                    cache=True):
+    prompt = prompts.render_generate_prompt(
+        summary_text, extracted_company, count, difficulties, platforms, part, parts
+    )
+    response_text = get_completion(prompt, prompts.output_budget(count), endpoint=endpoint,
+                                   validate=_parse_questions_response, cache=cache)
+    if isinstance(response_text, str) and '[AI unavailable' in response_text:
+        raise AIUnavailableError(response_text)
+    with metrics.LLM_PARSE_LATENCY.time(kind='questions'):
+        questions_list = _parse_questions_response(response_text)
+    return _finalize_questions(questions_list, extracted_company)
+
+def _generate_questions(summary_text, extracted_company, count, difficulties=None, platforms=None, endpoint=None,
+                        cache=True):
+    """Generate `count` questions, fanning out sub-prompts in parallel.
+
+    Results are merged in batch order, deduplicated by normalized URL and
+    filtered by platform. If duplicates leave the list short, one extra
+    sub-prompt tops it up. The first batch error is re-raised only when no
+    batch produced any questions.
+    """
+    batches = _plan_batches(count, difficulties)
+    parts = len(batches)
+    results = [None] * parts
+    errors = []
+
+    def run(index):
+        batch_count, batch_difficulties = batches[index]
+        return _generate_batch(summary_text, extracted_company, batch_count, batch_difficulties,
+                               platforms, index + 1, parts, endpoint, cache)
+
+    if parts == 1:
+        try:
+            results[0] = run(0)
+        except Exception as e:
+            errors.append(e)
+    else:
+        with ThreadPoolExecutor(max_workers=min(parts, SEARCH_MAX_PARALLEL)) as pool:
+            futures = {pool.submit(run, i): i for i in range(parts)}
+            for future in as_completed(futures):
+                try:
+                    results[futures[future]] = future.result()
+                except Exception as e:
+                    print(f"Warning: search sub-prompt {futures[future] + 1}/{parts} failed: {e}")
+                    errors.append(e)
+
+    merged = []
+    seen = set()
+
+    def merge(questions):
+        for q in questions or []:
+            key = _question_url_key(q.get('url'))
+            if key in seen or not _platform_allowed(q, platforms):
+                continue
+            seen.add(key)
+            merged.append(q)
+
+    for questions in results:
+        merge(questions)
+
+    if errors and not merged:
+        raise errors[0]
+
+    if 0 < len(merged) < count and parts > 1:
+        # Top up once for duplicates/filtered questions, asking for the missing difficulties
+        missing_difficulties = None
+        if difficulties:
+            have = [str(q.get('difficulty_level', '')).title() for q in merged]
+            missing_difficulties = []
+            for level in difficulties:
+                if level in have:
+                    have.remove(level)
+                else:
+                    missing_difficulties.append(level)
+            missing_difficulties = missing_difficulties[:count - len(merged)] or None
+        deficit = count - len(merged)
+        try:
+            merge(_generate_batch(summary_text, extracted_company, deficit, missing_difficulties,
+                                  platforms, parts + 1, parts + 1, endpoint, cache))
+        except Exception as e:
+            print(f"Warning: search top-up sub-prompt failed: {e}")
+
+    return merged[:count]
+
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', 3600))
+# Speculative prefetch of likely follow-up searches (off unless SEARCH_PREFETCH > 0).
+# After a search, up to SEARCH_PREFETCH related queries built from the returned
+# topics and categories are generated into the search cache in the background,
+# only while fewer than PREFETCH_UPSTREAM_CAPACITY completion calls are in
+# flight, and at most PREFETCH_PER_MINUTE times a minute across all workers.
+SEARCH_PREFETCH = int(os.getenv('SEARCH_PREFETCH', 0))
+PREFETCH_UPSTREAM_CAPACITY = int(os.getenv('PREFETCH_UPSTREAM_CAPACITY', SEARCH_MAX_PARALLEL * 2))
+PREFETCH_PER_MINUTE = int(os.getenv('PREFETCH_PER_MINUTE', 10))
+PREFETCH_MAX_WAIT = float(os.getenv('PREFETCH_MAX_WAIT', 30))
+
+def _search_cache_key(query, count, difficulties, platforms):
+    """Shared-state key for a search; whitespace and case in the query don't matter."""
+    normalized = ' '.join(query.lower().split())
+    payload = json.dumps([normalized, count, difficulties, sorted(p.lower() for p in platforms or [])])
+    return 'search:' + hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def _extract_query(query, cache=True, endpoint=None):
+    """(company, summary) for a search query, asking the model first."""
+    extract_prompt = prompts.EXTRACT_PROMPT.render(query=query)
+    
+    extract_response = get_completion(extract_prompt, prompts.EXTRACT_PROMPT.max_output_tokens,
+                                      endpoint=endpoint, cache=cache)
+    if isinstance(extract_response, str) and '[AI unavailable' in extract_response:
+        raise AIUnavailableError(extract_response)
+    
+    # Parse extracted information
+    extracted_company = "General"
+    summary_text = query
+    
+    try:
+        # Try to extract JSON from response
+        with metrics.LLM_PARSE_LATENCY.time(kind='extract'):
+            extract_clean = _strip_code_fence(extract_response)
+            
+            json_start = extract_clean.find('{')
+            json_end = extract_clean.rfind('}') + 1
+            extract_data = None
+            if json_start != -1 and json_end > json_start:
+                extract_data = json.loads(extract_clean[json_start:json_end])
+        if extract_data is not None:
+            extracted_company = extract_data.get('company', 'General')
+            summary_text = extract_data.get('summary', query)
+    except:
+        # If extraction fails, try to find company name in query using simple pattern
+        query_lower = query.lower()
+        common_companies = ['capgemini', 'google', 'microsoft', 'amazon', 'facebook', 'meta', 'apple', 
+                         'netflix', 'uber', 'airbnb', 'oracle', 'ibm', 'adobe', 'salesforce', 
+                         'twitter', 'linkedin', 'paypal', 'visa', 'mastercard', 'goldman sachs',
+                         'morgan stanley', 'jpmorgan', 'accenture', 'tcs', 'infosys', 'wipro',
+                         'cognizant', 'hcl', 'tech mahindra', 'deloitte', 'pwc', 'ey', 'kpmg']
+        for company in common_companies:
+            if company in query_lower:
+                extracted_company = company.title()
+                break
+    return extracted_company, summary_text
+
+def _run_search(query, question_count, difficulties, platforms, endpoint, cache=True):
+    """Extract the company, generate questions and return (result, company).
+
+    `cache=False` skips the completion cache for every model call.
+    """
+    # Step 1: Extract company name and summarize the query
+    extracted_company, summary_text = _extract_query(query, cache, endpoint=endpoint)
+    
+    # Step 2: Generate related questions with extracted company. Large
+    # requests are split into parallel sub-prompts and merged.
+    questions_list = _generate_questions(
+        summary_text, extracted_company, question_count, difficulties, platforms,
+        endpoint=endpoint, cache=cache,
+    )
+    result = {
+        'summary': summary_text,
+        'questions': questions_list,
+        'requested_count': question_count
+    }
+    return result, extracted_company
+
+def related_queries(query, questions, company, limit):
+    """Likely follow-up searches: the returned topics, then categories, under the same company."""
+    seen = {' '.join(query.lower().split())}
+    related = []
+    company = str(company or '').strip()
+    topics = [q.get('topic') for q in questions if isinstance(q, dict)]
+    categories = Counter(q.get('category') for q in questions if isinstance(q, dict))
+    for text in topics + [c for c, _ in categories.most_common()]:
+        text = ' '.join(str(text or '').split())
+        if not text:
+            continue
+        if company and company.lower() != 'general' and company.lower() not in text.lower():
+            text = f'{text} {company}'
+        if text.lower() in seen:
+            continue
+        seen.add(text.lower())
+        related.append(text)
+        if len(related) >= limit:
+            break
+    return related
+
+def _record_prefetch(outcome):
+    metrics.SEARCH_PREFETCH.inc(outcome=outcome)
+
+search_prefetcher = prefetch.Prefetcher(upstream_gauge, PREFETCH_UPSTREAM_CAPACITY, max_wait=PREFETCH_MAX_WAIT,
+                                        on_outcome=_record_prefetch)
+
+def _prefetch_search(query, question_count, difficulties, platforms, cache_key):
+    with app.app_context():
+        result, company = _run_search(query, question_count, difficulties, platforms, endpoint='search_prefetch')
+        if not result['questions']:
+            return
+        # Stored with its own follow-ups so a hit can keep prefetching down the chain
+        result['related_queries'] = related_queries(query, result['questions'], company, SEARCH_PREFETCH)
+        result['prefetched'] = True
+        state_store.set(cache_key, result, ttl=SEARCH_CACHE_TTL)
+        remember_search(query, cache_key, question_count, difficulties, platforms)
+
+def schedule_prefetch(queries, question_count, difficulties, platforms):
+    """Queue background searches for `queries` that aren't cached yet; returns how many were queued."""
+    if SEARCH_PREFETCH <= 0 or SEARCH_CACHE_TTL <= 0 or not _GENAI_AVAILABLE:
+        return 0
+    cost = 1 + len(_plan_batches(question_count, difficulties))
+    queued = 0
+    for query in queries[:SEARCH_PREFETCH]:
+        cache_key = _search_cache_key(query, question_count, difficulties, platforms)
+        try:
+            if state_store.get(cache_key) is not None:
+                continue
+            # Claim the query so other workers don't generate it too
+            token = uuid4().hex
+            if state_store.add('prefetch:' + cache_key, token, ttl=int(PREFETCH_MAX_WAIT) + 300) != token:
+                continue
+            if state_store.incr('prefetch:budget', 1, window=60) > PREFETCH_PER_MINUTE:
+                state_store.delete('prefetch:' + cache_key)
+                _record_prefetch('over_budget')
+                break
+        except Exception as e:
+            # Prefetching is optional; never let it break a search
+            print(f"Warning: could not schedule prefetch. {e}")
+            break
+        job = lambda query=query, cache_key=cache_key: _prefetch_search(
+            query, question_count, difficulties, platforms, cache_key)
+        if search_prefetcher.submit(cache_key, job, cost=cost):
+            queued += 1
+    return queued
+
+# Near-duplicate lookups before calling the model: earlier queries (pointing at
+# their cached results) and saved question sets, in local similarity indexes
+# persisted under SIMILARITY_INDEX_DIR. Candidates above SIMILARITY_MIN_SCORE
+# cosine are only used if similarity.is_near_duplicate() agrees.
+SEMANTIC_SEARCH = os.getenv('SEMANTIC_SEARCH', '1') != '0'
+SIMILARITY_MIN_SCORE = float(os.getenv('SIMILARITY_MIN_SCORE', 0.3))
+SIMILARITY_INDEX_DIR = os.getenv('SIMILARITY_INDEX_DIR', os.path.join(basedir, 'instance', 'similarity'))
+_similarity_approximate = os.getenv('SIMILARITY_APPROXIMATE', '0') == '1'
+query_index = similarity.SimilarityIndex(
+    os.path.join(SIMILARITY_INDEX_DIR, 'queries.jsonl'),
+    max_entries=int(os.getenv('SIMILARITY_MAX_QUERIES', 50000)), approximate=_similarity_approximate)
+library_index = similarity.SimilarityIndex(
+    os.path.join(SIMILARITY_INDEX_DIR, 'question_sets.jsonl'),
+    max_entries=int(os.getenv('SIMILARITY_MAX_SETS', 50000)), approximate=_similarity_approximate)
+
+def _search_options_key(count, difficulties, platforms):
+    return json.dumps([count, difficulties, sorted(p.lower() for p in platforms or [])])
+
+def _library_entry(set_id, query, summary, mentor_id):
+    return str(set_id), f'{query}\n{summary}', {'mentor_id': mentor_id}
+
+def _library_entries():
+    # Oldest first, so SIMILARITY_MAX_SETS keeps the newest
+    rows = db.session.query(QuestionSet.id, QuestionSet.query, QuestionSet.summary,
+                            QuestionSet.mentor_id).order_by(QuestionSet.id)
+    return [_library_entry(*row) for row in rows.yield_per(TRANSFER_BATCH_SIZE)]
+
+def _loaded_library_index():
+    library_index.ensure_loaded(_library_entries)
+    return library_index
+
+def index_question_sets(question_sets):
+    """Add saved sets to the library index; failures only cost future matches."""
+    if not SEMANTIC_SEARCH:
+        return
+    try:
+        _loaded_library_index().add_many(
+            [_library_entry(qs.id, qs.query, qs.summary, qs.mentor_id) for qs in question_sets])
+    except Exception as e:
+        print(f"Warning: could not index question sets. {e}")
+
+def unindex_question_sets(set_ids):
+    if not SEMANTIC_SEARCH:
+        return
+    try:
+        _loaded_library_index().remove_many([str(set_id) for set_id in set_ids])
+    except Exception as e:
+        print(f"Warning: could not remove question set from the index. {e}")
+
+def remember_search(query, cache_key, question_count, difficulties, platforms):
+    """Record a cached search so paraphrases of `query` can find it."""
+    if not SEMANTIC_SEARCH or SEARCH_CACHE_TTL <= 0:
+        return
+    try:
+        query_index.ensure_loaded()
+        query_index.add(cache_key, query, {'options': _search_options_key(question_count, difficulties, platforms)})
+    except Exception as e:
+        print(f"Warning: could not index search query. {e}")
+
+def find_similar_search(query, question_count, difficulties, platforms, user_id):
+    """Result of an earlier near-duplicate search or saved set, or None.
+
+    Earlier searches must have used the same options and still be cached.
+    Saved sets are used for plain searches (no difficulty or platform
+    filter) when they are the user's own or published and hold enough
+    questions.
+    """
+    options = _search_options_key(question_count, difficulties, platforms)
+    if SEARCH_CACHE_TTL > 0:
+        query_index.ensure_loaded()
+        for match in query_index.search(query, k=5, min_score=SIMILARITY_MIN_SCORE):
+            if (match.payload or {}).get('options') != options or not similarity.is_near_duplicate(query, match.text):
+                continue
+            cached = state_store.get(match.key)
+            if cached is not None:
+                return dict(cached, similar_query=match.text, similarity=round(match.score, 3))
+    if difficulties or platforms:
+        return None
+    for match in _loaded_library_index().search(query, k=5, min_score=SIMILARITY_MIN_SCORE):
+        question_set = db.session.get(QuestionSet, int(match.key))
+        # Checked against the row, not the index, in case the index is stale
+        if (question_set is None
+                or not (question_set.is_published or question_set.mentor_id == user_id)
+                or (question_set.question_count or 0) < question_count
+                or not (similarity.is_near_duplicate(query, question_set.query)
+                        or similarity.is_near_duplicate(query, question_set.summary))):
+            continue
+        return {
+            'summary': question_set.summary,
+            'questions': question_set.to_dict()['questions_data'][:question_count],
+            'requested_count': question_count,
+            'library_set': {'id': question_set.id, 'query': question_set.query,
+                            'similarity': round(match.score, 3)},
+        }
+    return None
 
 @app.route('/search', methods=['POST'])
 @login_required
+@rate_limit('search', SEARCH_RATE_LIMIT)
 def search_questions():
     """Handle the search request and return related questions"""
     try:
@@ -472,183 +1836,60 @@ def search_questions():
         if not query:
             return jsonify({'error': 'Query is required'}), 400
         
-        # Step 1: Extract company name and summarize the query
-        extract_prompt = f"""
-        Analyze the following query and extract:
-        1. The company name mentioned (if any)
-        2. A brief summary of the coding problem/topic
-        
-        Query: {query}
-        
-        Respond in JSON format with two keys: "company" and "summary"
-        If no company is mentioned, set "company" to "General"
-        Example: {{"company": "Capgemini", "summary": "Palindrome check using dynamic programming"}}
-        """
-        
-        extract_response = get_completion(extract_prompt)
-        if isinstance(extract_response, str) and '[AI unavailable' in extract_response:
-            return jsonify({'success': False, 'error': 'AI is unavailable in this environment. Configure GOOGLE_API_KEY and try again.'}), 503
+        try:
+            question_count, difficulties, platforms = _parse_search_options(request.json)
+        except ValueError as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
         
-        # Parse extracted information
-        extracted_company = "General"
-        summary_text = query
+        # "fresh": true skips the search, near-duplicate and completion caches
+        fresh = bool(request.json.get('fresh'))
         
-        try:
-            # Try to extract JSON from response
-            extract_clean = extract_response.strip()
-            if extract_clean.startswith('```'):
-                first_nl = extract_clean.find('\n')
-                if first_nl != -1:
-                    extract_clean = extract_clean[first_nl:].strip()
-                if extract_clean.endswith('```'):
-                    extract_clean = extract_clean[:-3].strip()
-            
-            json_start = extract_clean.find('{')
-            json_end = extract_clean.rfind('}') + 1
-            if json_start != -1 and json_end > json_start:
-                extract_data = json.loads(extract_clean[json_start:json_end])
-                extracted_company = extract_data.get('company', 'General')
-                summary_text = extract_data.get('summary', query)
-        except:
-            # If extraction fails, try to find company name in query using simple pattern
-            query_lower = query.lower()
-            common_companies = ['capgemini', 'google', 'microsoft', 'amazon', 'facebook', 'meta', 'apple', 
-                             'netflix', 'uber', 'airbnb', 'oracle', 'ibm', 'adobe', 'salesforce', 
-                             'twitter', 'linkedin', 'paypal', 'visa', 'mastercard', 'goldman sachs',
-                             'morgan stanley', 'jpmorgan', 'accenture', 'tcs', 'infosys', 'wipro',
-                             'cognizant', 'hcl', 'tech mahindra', 'deloitte', 'pwc', 'ey', 'kpmg']
-            for company in common_companies:
-                if company in query_lower:
-                    extracted_company = company.title()
-                    break
-        
-        # Step 2: Generate related questions with extracted company
-        final_prompt = f"""
-        Generate a list of exactly 5 coding problems related to: {summary_text}
-        
-        IMPORTANT: The user mentioned the company "{extracted_company}" in their query. Use this company name for the "company" field in ALL 5 questions.
-        
-        For each problem, provide a JSON object with the following keys:
-        - "url": A COMPLETE, VALID absolute URL starting with https:// to the actual problem page. Examples:
-          * LeetCode: "https://leetcode.com/problems/palindrome-partitioning/"
-          * GeeksforGeeks: "https://www.geeksforgeeks.org/palindrome-partitioning-dp-17/"
-          * HackerRank: "https://www.hackerrank.com/challenges/palindrome-index/problem"
-          * InterviewBit: "https://www.interviewbit.com/problems/palindrome-partitioning/"
-          * CodeChef: "https://www.codechef.com/problems/PALIN"
-          CRITICAL: The URL must be a complete, working URL that starts with https://
-        - "platform": The coding platform name (e.g., "LeetCode", "GeeksforGeeks", "HackerRank", "InterviewBit", "CodeChef")
-        - "topic": The topic name of the problem (e.g., "Palindrome Check", "Palindrome Partitioning")
-        - "difficulty_level": The difficulty (e.g., "Easy", "Medium", "Hard")
-        - "company": MUST be "{extracted_company}" (use this exact company name from the user's query)
-        - "category": The category/type of problem (e.g., "String", "Dynamic Programming", "Array")
-        
-        Return ONLY a valid JSON array with 5 objects. Do not include any markdown formatting, code blocks, or extra text.
-        CRITICAL: 
-        1. All URLs must be complete absolute URLs starting with https://
-        2. ALL 5 questions must have "company": "{extracted_company}"
-        
-        Example format:
-        [
-          {{"url": "https://leetcode.com/problems/palindrome-partitioning/", "platform": "LeetCode", "topic": "Palindrome Partitioning", "difficulty_level": "Medium", "company": "{extracted_company}", "category": "Dynamic Programming"}},
-          {{"url": "https://www.geeksforgeeks.org/palindrome-partitioning-dp-17/", "platform": "GeeksforGeeks", "topic": "Palindrome Partitioning", "difficulty_level": "Medium", "company": "{extracted_company}", "category": "Dynamic Programming"}},
-          ... (3 more questions, ALL with company: "{extracted_company}")
-        ]
-        """
-        
-        final_response = get_completion(final_prompt)
-        if isinstance(final_response, str) and '[AI unavailable' in final_response:
-            return jsonify({'success': False, 'error': 'AI is unavailable in this environment. Configure GOOGLE_API_KEY and try again.'}), 503
-        
-        # Clean the response
-        # Find the start and end of the JSON block to handle responses
-        # that might include extra text like "```json\n[...]\n```"
-        clean_response = final_response.strip()
-        
-        # Remove markdown code blocks if present
-        if clean_response.startswith('```'):
-            # Find the first newline after ```
-            first_newline = clean_response.find('\n')
-            if first_newline != -1:
-                clean_response = clean_response[first_newline:].strip()
-            # Remove trailing ```
-            if clean_response.endswith('```'):
-                clean_response = clean_response[:-3].strip()
-        
-        # Find JSON array boundaries
-        json_start = clean_response.find('[')
-        json_end = clean_response.rfind(']') + 1
+        # Identical searches from any worker are answered from the shared cache
+        cache_key = _search_cache_key(query, question_count, difficulties, platforms)
+        if SEARCH_CACHE_TTL > 0 and not fresh:
+            try:
+                cached = state_store.get(cache_key)
+            except Exception as e:
+                print(f"Warning: search cache read failed. {e}")
+                cached = None
+            if cached is not None:
+                if cached.get('prefetched'):
+                    _record_prefetch('hit')
+                schedule_prefetch(cached.get('related_queries') or [], question_count, difficulties, platforms)
+                return jsonify(dict(cached, success=True, cached=True))
         
-        if json_start == -1 or json_end == 0:
-            # Try to find any JSON structure
-            json_start = clean_response.find('{')
-            if json_start != -1:
-                # Might be a single object, wrap in array
-                json_end = clean_response.rfind('}') + 1
-                if json_end > json_start:
-                    clean_response = '[' + clean_response[json_start:json_end] + ']'
-                    json_start = 0
-                    json_end = len(clean_response)
-            
-            if json_start == -1 or json_end == 0:
-                raise json.JSONDecodeError("No JSON array found in AI response", final_response, 0)
-        else:
-            clean_response = clean_response[json_start:json_end]
+        # Then paraphrases of earlier searches and saved sets
+        if SEMANTIC_SEARCH and not fresh:
+            try:
+                similar = find_similar_search(query, question_count, difficulties, platforms, session.get('user_id'))
+            except Exception as e:
+                print(f"Warning: similarity lookup failed. {e}")
+                similar = None
+            if similar is not None:
+                return jsonify(dict(similar, success=True, cached=True))
         
-        # Parse JSON response
-        try:
-            questions_list = json.loads(clean_response)
-        except json.JSONDecodeError as e:
-            # Try to fix common issues
-            # Remove any trailing commas before closing brackets
-            clean_response = re.sub(r',\s*}', '}', clean_response)
-            clean_response = re.sub(r',\s*]', ']', clean_response)
-            questions_list = json.loads(clean_response)
-        
-        # Ensure it's a list
-        if not isinstance(questions_list, list):
-            questions_list = [questions_list]
-        
-        # Validate and ensure we have exactly 5 items (or at least some items)
-        if len(questions_list) == 0:
-            raise ValueError("AI returned an empty list of questions")
-        
-        # Ensure all required fields are present and validate URLs
-        required_fields = ['url', 'platform', 'topic', 'difficulty_level', 'company', 'category']
-        for i, q in enumerate(questions_list):
-            if not isinstance(q, dict):
-                raise ValueError(f"Question {i+1} is not a valid object")
-            
-            # Ensure company field exists - use extracted company or default to "General"
-            company_name = str(q.get('company', '')).strip()
-            if not company_name or company_name.lower() == 'general':
-                # Use extracted company from query, or keep existing if it's valid
-                q['company'] = extracted_company
-            else:
-                # Ensure company name is properly capitalized
-                q['company'] = company_name.title()
-            
-            # Ensure all other required fields exist
-            missing = [f for f in required_fields if f not in q or (f != 'company' and not q[f])]
-            if missing:
-                print(f"Warning: Question {i+1} missing fields: {missing}")
-            
-            # Use the same normalization function
-            q['url'] = QuestionSet._normalize_url(
-                q.get('url', ''),
-                q.get('platform', ''),
-                q.get('topic', '')
-            )
+        result, extracted_company = _run_search(query, question_count, difficulties, platforms,
+                                                endpoint=request.endpoint, cache=not fresh)
+        questions_list = result['questions']
         
         # Save to file (optional)
         with open("related_questions.json", "w") as f:
             json.dump(questions_list, f, indent=2)
         
-        return jsonify({
-            'success': True,
-            'summary': summary_text,
-            'questions': questions_list
-        })
+        if SEARCH_PREFETCH > 0 and questions_list:
+            result['related_queries'] = related_queries(query, questions_list, extracted_company, SEARCH_PREFETCH)
+        if SEARCH_CACHE_TTL > 0 and questions_list:
+            try:
+                state_store.set(cache_key, result, ttl=SEARCH_CACHE_TTL)
+                remember_search(query, cache_key, question_count, difficulties, platforms)
+            except Exception as e:
+                print(f"Warning: search cache write failed. {e}")
+        schedule_prefetch(result.get('related_queries') or [], question_count, difficulties, platforms)
         
+        return jsonify(dict(result, success=True))
+        
+    except AIUnavailableError:
+        return jsonify({'success': False, 'error': 'AI is unavailable in this environment. Configure GOOGLE_API_KEY and try again.'}), 503
     except json.JSONDecodeError as e:
         return jsonify({'success': False, 'error': f'Failed to parse AI response: {str(e)}.'}), 500
     except Exception as e:
@@ -702,12 +1943,14 @@ def save_search():
             mentor_id=session.get('user_id'),
             query=query,
             summary=summary_text,
-            questions_data=json.dumps(questions_data),
             is_published=False
         )
+        published_question.set_questions(questions_data)
         
         db.session.add(published_question)
+        apply_rollup_delta(rollup_keys(questions_data), total_sign=1)
         db.session.commit()
+        index_question_sets([published_question])
         
         return jsonify({
             'success': True,
@@ -740,6 +1983,7 @@ def publish_question():
         if not question:
             return jsonify({'error': 'Question not found'}), 404
         
+        was_published = bool(question.is_published)
         if action == 'publish':
             question.is_published = True
             question.published_at = datetime.utcnow()
@@ -749,7 +1993,12 @@ def publish_question():
         else:
             return jsonify({'error': 'Invalid action'}), 400
         
+        if was_published != question.is_published:
+            apply_rollup_delta(rollup_keys(question.get_questions()),
+                               published_sign=1 if question.is_published else -1)
+            record_change(question.id, 'published' if question.is_published else 'unpublished')
         db.session.commit()
+        _set_size_cache.pop(question.id, None)
         
         return jsonify({
             'success': True,
@@ -779,8 +2028,16 @@ def delete_question():
         if not question:
             return jsonify({'error': 'Question not found'}), 404
         
+        db.session.query(QuestionProgress).filter_by(question_set_id=question.id).delete(synchronize_session=False)
+        apply_rollup_delta(rollup_keys(question.get_questions()),
+                           total_sign=-1, published_sign=-1 if question.is_published else 0)
+        if question.is_published:
+            record_change(question.id, 'deleted')
         db.session.delete(question)
         db.session.commit()
+        progress_tracker.forget_sets([question.id])
+        _set_size_cache.pop(question.id, None)
+        unindex_question_sets([question.id])
         
         return jsonify({
             'success': True,
@@ -791,6 +2048,134 @@ def delete_question():
         db.session.rollback()
         return jsonify({'error': f'Failed to delete question: {str(e)}'}), 500
 
+# Bulk actions take at most this many ids per request
+BULK_MAX_IDS = 500
+
+def _bulk_question_ids(data):
+    """Distinct integer ids from data['question_ids'] in request order, or an error message."""
+    ids = (data or {}).get('question_ids')
+    if not isinstance(ids, list) or not ids:
+        return None, 'question_ids must be a non-empty list'
+    if len(ids) > BULK_MAX_IDS:
+        return None, f'At most {BULK_MAX_IDS} question_ids per request'
+    try:
+        ids = [int(i) for i in ids]
+    except (TypeError, ValueError):
+        return None, 'question_ids must be integers'
+    return list(dict.fromkeys(ids)), None
+
+def _owned_sets(ids, *columns):
+    """The current mentor's sets among `ids`, locked for the rest of the transaction."""
+    return db.session.query(QuestionSet).options(load_only(QuestionSet.id, *columns)).filter(
+        QuestionSet.id.in_(ids), QuestionSet.mentor_id == session.get('user_id')
+    ).with_for_update().all()
+
+def _bulk_response(ids, outcomes, message):
+    results = [{'question_id': i, 'status': outcomes.get(i, 'not_found')} for i in ids]
+    return jsonify({
+        'success': True,
+        'message': message,
+        'results': results,
+        'counts': Counter(r['status'] for r in results),
+    })
+
+@app.route('/publish_questions', methods=['POST'])
+@login_required
+def publish_questions():
+    """Publish or unpublish many of the mentor's sets in one transaction.
+
+    Body: {"question_ids": [...], "action": "publish"|"unpublish"}. Each id's
+    status is the action's past tense, 'unchanged' or 'not_found'.
+    """
+    if session.get('user_type') != 'mentor':
+        return jsonify({'success': False, 'error': 'Only mentors can publish questions'}), 403
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action not in ('publish', 'unpublish'):
+        return jsonify({'success': False, 'error': 'Invalid action'}), 400
+    ids, error = _bulk_question_ids(data)
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+    publish = action == 'publish'
+    status = f'{action}ed'
+
+    try:
+        sets = _owned_sets(ids, QuestionSet.is_published, QuestionSet.questions_data)
+        outcomes = {qs.id: 'unchanged' for qs in sets}
+        changing = [qs for qs in sets if bool(qs.is_published) != publish]
+        if changing:
+            changing_ids = [qs.id for qs in changing]
+            now = datetime.utcnow()
+            # updated_at is part of the card cache key, so cards re-render
+            db.session.query(QuestionSet).filter(QuestionSet.id.in_(changing_ids)).update({
+                QuestionSet.is_published: publish,
+                QuestionSet.published_at: now if publish else None,
+                QuestionSet.updated_at: now,
+            }, synchronize_session=False)
+            keys = Counter()
+            for qs in changing:
+                keys.update(rollup_keys(qs.get_questions()))
+            apply_rollup_delta(keys, published_sign=1 if publish else -1)
+            db.session.execute(db.insert(ChangeEvent), [
+                {'question_set_id': i, 'kind': status, 'created_at': now} for i in changing_ids])
+            outcomes.update(dict.fromkeys(changing_ids, status))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': f'Failed to {action} questions: {str(e)}'}), 500
+
+    for set_id in outcomes:
+        _set_size_cache.pop(set_id, None)
+    changed = sum(1 for outcome in outcomes.values() if outcome == status)
+    return _bulk_response(ids, outcomes, f'{changed} question set{"s" if changed != 1 else ""} {status}')
+
+@app.route('/delete_questions', methods=['POST'])
+@login_required
+def delete_questions():
+    """Delete many of the mentor's sets, and their progress, in one transaction.
+
+    Body: {"question_ids": [...]}. Each id's status is 'deleted' or 'not_found'.
+    """
+    if session.get('user_type') != 'mentor':
+        return jsonify({'success': False, 'error': 'Only mentors can delete questions'}), 403
+    ids, error = _bulk_question_ids(request.get_json(silent=True))
+    if error:
+        return jsonify({'success': False, 'error': error}), 400
+
+    try:
+        sets = _owned_sets(ids, QuestionSet.is_published, QuestionSet.questions_data)
+        deleted_ids = [qs.id for qs in sets]
+        if deleted_ids:
+            totals, published = Counter(), Counter()
+            for qs in sets:
+                keys = rollup_keys(qs.get_questions())
+                totals.update(keys)
+                if qs.is_published:
+                    published.update(keys)
+            apply_rollup_delta(totals, total_sign=-1)
+            apply_rollup_delta(published, published_sign=-1)
+            now = datetime.utcnow()
+            published_ids = [qs.id for qs in sets if qs.is_published]
+            if published_ids:
+                db.session.execute(db.insert(ChangeEvent), [
+                    {'question_set_id': i, 'kind': 'deleted', 'created_at': now} for i in published_ids])
+            db.session.query(QuestionProgress).filter(
+                QuestionProgress.question_set_id.in_(deleted_ids)).delete(synchronize_session=False)
+            db.session.query(QuestionSet).filter(
+                QuestionSet.id.in_(deleted_ids)).delete(synchronize_session=False)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': f'Failed to delete questions: {str(e)}'}), 500
+
+    progress_tracker.forget_sets(deleted_ids)
+    for set_id in deleted_ids:
+        _set_size_cache.pop(set_id, None)
+    unindex_question_sets(deleted_ids)
+    count = len(deleted_ids)
+    return _bulk_response(ids, dict.fromkeys(deleted_ids, 'deleted'),
+                          f'{count} question set{"s" if count != 1 else ""} deleted')
+
 @app.route('/get_question_details/<int:question_id>', methods=['GET'])
 @login_required
 def get_question_details(question_id):
@@ -814,6 +2199,7 @@ def get_question_details(question_id):
 
 @app.route('/get_published_question_details/<int:question_id>', methods=['GET'])
 @login_required
+@reads_from_replica
 def get_published_question_details(question_id):
     """Get details for a single PUBLISHED question set for students."""
     try:
@@ -825,11 +2211,283 @@ def get_published_question_details(question_id):
         if not question:
             return jsonify({'error': 'Published question not found or not available.'}), 404
 
-        return jsonify({'success': True, 'question': question.to_dict()})
+        question_dict = question.to_dict()
+        question_dict['progress'] = progress_tracker.set_statuses(
+            session.get('user_id'), question.id, len(question_dict['questions_data'] or [])
+        )
+        return jsonify({'success': True, 'question': question_dict})
 
     except Exception as e:
         return jsonify({'error': f'An error occurred: {str(e)}'}), 500
 
+# JSONL export/import. Both sides work in batches so memory stays flat no
+# matter how many sets there are.
+TRANSFER_BATCH_SIZE = 1000
+MAX_IMPORT_ERRORS = 20
+
+def _format_datetime(value):
+    return value.isoformat() if value else None
+
+def _parse_datetime(value, field):
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        raise ValueError(f'invalid {field}: {value!r}')
+
+def iter_question_sets_jsonl(mentor_id=None, batch_size=TRANSFER_BATCH_SIZE):
+    """Yield one JSON line per question set, oldest first.
+
+    Reads `batch_size` rows per query, paging on the primary key, so no
+    cursor stays open between batches of a long streaming response.
+    """
+    columns = (QuestionSet.id, User.username, QuestionSet.query, QuestionSet.summary, QuestionSet.questions_data,
+               QuestionSet.is_published, QuestionSet.created_at, QuestionSet.published_at)
+    last_id = 0
+    while True:
+        query = db.session.query(*columns).join(User, User.id == QuestionSet.mentor_id).filter(QuestionSet.id > last_id)
+        if mentor_id is not None:
+            query = query.filter(QuestionSet.mentor_id == mentor_id)
+        rows = query.order_by(QuestionSet.id).limit(batch_size).all()
+        if not rows:
+            return
+        for row_id, mentor, query_text, summary, questions_data, is_published, created_at, published_at in rows:
+            try:
+                questions = question_codec.decode(questions_data)
+            except (TypeError, ValueError):
+                questions = []
+            yield json.dumps({
+                'id': row_id,
+                'mentor': mentor,
+                'query': query_text,
+                'summary': summary,
+                'questions': questions,
+                'is_published': bool(is_published),
+                'created_at': _format_datetime(created_at),
+                'published_at': _format_datetime(published_at),
+            }) + '\n'
+        last_id = rows[-1][0]
+
+# Question fields that must be strings when present in an imported record
+IMPORT_TEXT_FIELDS = ('url', 'platform', 'topic', 'difficulty_level', 'company', 'category')
+
+def _import_record(record, mentor_id, mentor_ids):
+    """Validate one imported record and return the QuestionSet row and its questions."""
+    if not isinstance(record, dict):
+        raise ValueError('expected a JSON object')
+    questions = record.get('questions')
+    if isinstance(questions, str):
+        questions = json.loads(questions)
+    if not isinstance(questions, list) or not questions or not all(isinstance(q, dict) for q in questions):
+        raise ValueError('"questions" must be a non-empty list of objects')
+    summary = str(record.get('summary') or '').strip()
+    if not summary:
+        raise ValueError('"summary" is required')
+    query = str(record.get('query') or '').strip() or summary
+
+    for q in questions:
+        for field in IMPORT_TEXT_FIELDS:
+            if q.get(field) is not None and not isinstance(q[field], str):
+                raise ValueError(f'"{field}" of each question must be a string')
+
+    if mentor_id is None:
+        username = record.get('mentor')
+        if username is not None and not isinstance(username, str):
+            raise ValueError('"mentor" must be a username string')
+        if username not in mentor_ids:
+            user = User.query.filter_by(username=username, user_type='mentor').first() if username else None
+            mentor_ids[username] = user.id if user else None
+        mentor_id = mentor_ids[username]
+        if mentor_id is None:
+            raise ValueError(f'unknown mentor {username!r}')
+
+    # Same URL clean-up as save_search
+    for q in questions:
+        if 'url' in q:
+            q['url'] = QuestionSet._normalize_url(q.get('url', ''), q.get('platform', ''), q.get('topic', ''))
+        if 'company' not in q:
+            q['company'] = 'General'
+
+    is_published = bool(record.get('is_published'))
+    created_at = _parse_datetime(record.get('created_at'), 'created_at') or datetime.utcnow()
+    published_at = _parse_datetime(record.get('published_at'), 'published_at') if is_published else None
+    row = {
+        'mentor_id': mentor_id,
+        'query': query[:500],
+        'summary': summary[:200],
+        'questions_data': encode_questions(questions),
+        'is_published': is_published,
+        'created_at': created_at,
+        'published_at': published_at or (created_at if is_published else None),
+    }
+    row.update(QuestionSet.question_stats(questions))
+    return row, questions
+
+def import_question_sets_jsonl(lines, mentor_id=None, batch_size=TRANSFER_BATCH_SIZE):
+    """Insert question sets from JSONL lines (str or bytes), committing per batch.
+
+    Sets are owned by `mentor_id` when given, otherwise by the mentor named in
+    each record. Invalid lines are skipped and reported; ids are not preserved.
+    Returns {'imported', 'skipped', 'errors'}.
+    """
+    result = {'imported': 0, 'skipped': 0, 'errors': []}
+    mentor_ids = {}
+    batch, totals, published = [], Counter(), Counter()
+
+    def flush():
+        inserted = _insert_question_sets(batch)
+        published_ids = sorted(set_id for set_id, is_published in inserted if is_published)
+        if published_ids:
+            now = datetime.utcnow()
+            db.session.execute(db.insert(ChangeEvent), [
+                {'question_set_id': set_id, 'kind': 'published', 'created_at': now} for set_id in published_ids])
+        apply_rollup_delta(totals, total_sign=1)
+        apply_rollup_delta(published, published_sign=1)
+        db.session.commit()
+        result['imported'] += len(batch)
+        index_question_sets(QuestionSet.list_query().filter(
+            QuestionSet.id.in_([set_id for set_id, _ in inserted])).order_by(QuestionSet.id))
+        batch.clear()
+        totals.clear()
+        published.clear()
+
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            row, questions = _import_record(json.loads(line), mentor_id, mentor_ids)
+        except (TypeError, ValueError) as e:
+            result['skipped'] += 1
+            if len(result['errors']) < MAX_IMPORT_ERRORS:
+                result['errors'].append(f'line {line_number}: {e}')
+            continue
+        batch.append(row)
+        keys = rollup_keys(questions)
+        totals.update(keys)
+        if row['is_published']:
+            published.update(keys)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return result
+
+def _insert_question_sets(rows):
+    """Insert QuestionSet rows; returns (id, is_published) of each new row."""
+    columns = (QuestionSet.id, QuestionSet.is_published)
+    if db.engine.dialect.insert_executemany_returning:
+        return [tuple(r) for r in db.session.execute(db.insert(QuestionSet).returning(*columns), rows)]
+    # One statement per row where the database can't return ids from a batch
+    return [(db.session.execute(db.insert(QuestionSet).values(**row)).inserted_primary_key[0], row['is_published'])
+            for row in rows]
+
+@app.route('/export/question_sets', methods=['GET'])
+@login_required
+def export_question_sets():
+    """Stream the mentor's question sets as JSONL"""
+    if session.get('user_type') != 'mentor':
+        return jsonify({'error': 'Only mentors can export question sets'}), 403
+    
+    lines = iter_question_sets_jsonl(mentor_id=session.get('user_id'))
+    return Response(stream_with_context(lines), mimetype='application/x-ndjson', headers={
+        'Content-Disposition': 'attachment; filename=question_sets.jsonl',
+    })
+
+@app.route('/import/question_sets', methods=['POST'])
+@login_required
+def import_question_sets():
+    """Import JSONL question sets (request body) into the mentor's library"""
+    if session.get('user_type') != 'mentor':
+        return jsonify({'error': 'Only mentors can import question sets'}), 403
+    
+    try:
+        # Read the body line by line instead of loading it all
+        result = import_question_sets_jsonl(request.stream, mentor_id=session.get('user_id'))
+        return jsonify(dict(result, success=True))
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error in import_question_sets: {str(e)}")
+        return jsonify({'success': False, 'message': f'An unexpected error occurred: {str(e)}'}), 500
+
+@app.route('/analytics', methods=['GET'])
+@login_required
+def analytics():
+    """Coverage counts from the rollup table.
+
+    Query parameters: group_by (comma-separated subset of company, category,
+    difficulty, platform; default all), published_only=1, and an optional
+    exact-match filter per dimension (e.g. company=Google).
+    """
+    if session.get('user_type') != 'mentor':
+        return jsonify({'error': 'Only mentors can view analytics'}), 403
+
+    group_by = [d.strip() for d in request.args.get('group_by', ','.join(ROLLUP_DIMENSIONS)).split(',') if d.strip()]
+    unknown = [d for d in group_by if d not in ROLLUP_DIMENSIONS]
+    if unknown:
+        return jsonify({'success': False, 'error': f'Unknown group_by dimension(s): {", ".join(unknown)}'}), 400
+    published_only = request.args.get('published_only') in ('1', 'true', 'yes')
+    count_column = QuestionRollup.published_count if published_only else QuestionRollup.total_count
+
+    columns = [getattr(QuestionRollup, d) for d in group_by]
+    query = db.session.query(*columns, db.func.sum(count_column)).filter(count_column > 0)
+    for dimension in ROLLUP_DIMENSIONS:
+        if request.args.get(dimension):
+            query = query.filter(getattr(QuestionRollup, dimension) == request.args[dimension])
+    if columns:
+        query = query.group_by(*columns).order_by(db.func.sum(count_column).desc(), *columns)
+    rows = [dict(zip(group_by, row[:-1]), count=int(row[-1] or 0)) for row in query.all()]
+    return jsonify({
+        'success': True,
+        'group_by': group_by,
+        'published_only': published_only,
+        'total': sum(r['count'] for r in rows),
+        'rows': rows,
+    })
+
+@app.route('/progress', methods=['POST'])
+@login_required
+def update_progress():
+    """Mark one question of a published set as 'solved', 'attempted' or 'todo'.
+
+    Updates are buffered and written to the database in batches.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        set_id = int(data.get('question_id'))
+        index = int(data.get('index'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'question_id and index must be integers'}), 400
+    status = data.get('status')
+    if status not in progress.STATUSES:
+        return jsonify({'success': False, 'error': f'status must be one of {", ".join(progress.STATUSES)}'}), 400
+
+    size = _published_set_size(set_id)
+    if size is None:
+        return jsonify({'success': False, 'error': 'Published question not found or not available.'}), 404
+    if not 0 <= index < min(size, progress.MAX_QUESTIONS):
+        return jsonify({'success': False, 'error': 'index out of range'}), 400
+
+    user_id = session.get('user_id')
+    progress_tracker.record(user_id, set_id, index, status)
+    return jsonify({
+        'success': True,
+        'solved': progress_tracker.solved_counts(user_id).get(set_id, 0),
+        'question_count': size,
+    })
+
+@app.route('/progress/<int:question_id>', methods=['GET'])
+@login_required
+def get_progress(question_id):
+    """Per-question statuses for one published set."""
+    size = _published_set_size(question_id)
+    if size is None:
+        return jsonify({'success': False, 'error': 'Published question not found or not available.'}), 404
+    return jsonify({
+        'success': True,
+        'progress': progress_tracker.set_statuses(session.get('user_id'), question_id, size),
+    })
+
 @app.route('/captcha')
 def captcha():
     """Captcha page"""
@@ -841,17 +2499,73 @@ def init_db():
     """Initialize database tables"""
     try:
         with app.app_context():
-            db.create_all()
-        return jsonify({'success': True, 'message': 'Database initialized successfully'})
+            applied = run_migrations()
+        return jsonify({
+            'success': True,
+            'message': 'Database initialized successfully',
+            'applied_migrations': [m.version for m in applied],
+            'schema_version': SCHEMA_VERSION,
+        })
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error initializing database: {str(e)}'}), 500
 
-if __name__ == '__main__':
-    with app.app_context():
-        db.create_all()
-        print("Database tables created successfully!")
+@app.cli.command('export-sets')
+@click.option('--output', '-o', type=click.File('w'), default='-', help='File to write (default: stdout)')
+@click.option('--mentor', default=None, help='Only export sets owned by this mentor username')
+def export_sets_command(output, mentor):
+    """Export question sets as JSONL."""
+    mentor_id = None
+    if mentor:
+        user = User.query.filter_by(username=mentor).first()
+        if user is None:
+            raise click.ClickException(f'Unknown user {mentor!r}')
+        mentor_id = user.id
+    for line in iter_question_sets_jsonl(mentor_id=mentor_id):
+        output.write(line)
 
-    # For production deployment on Render
-    from waitress import serve
-    port = int(os.getenv('PORT', 8080))
-    serve(app, host='0.0.0.0', port=port)
+@app.cli.command('import-sets')
+@click.argument('source', type=click.File('r'))
+@click.option('--mentor', default=None, help='Owner for every imported set (default: the mentor named in each record)')
+@click.option('--batch-size', type=int, default=TRANSFER_BATCH_SIZE, show_default=True)
+def import_sets_command(source, mentor, batch_size):
+    """Import question sets from a JSONL file ('-' for stdin)."""
+    run_migrations()
+    mentor_id = None
+    if mentor:
+        user = User.query.filter_by(username=mentor, user_type='mentor').first()
+        if user is None:
+            raise click.ClickException(f'Unknown mentor {mentor!r}')
+        mentor_id = user.id
+    result = import_question_sets_jsonl(source, mentor_id=mentor_id, batch_size=batch_size)
+    click.echo(f"Imported {result['imported']} question sets, skipped {result['skipped']}")
+    for error in result['errors']:
+        click.echo(f'  {error}', err=True)
+
+@app.cli.group('db')
+def db_cli():
+    """Schema migrations."""
+
+@db_cli.command('upgrade')
+@click.option('--target', type=int, default=None, help='Stop after this version (default: latest)')
+def db_upgrade_command(target):
+    """Apply pending migrations."""
+    applied = run_migrations(target)
+    click.echo(f'Applied {len(applied)} migration(s); schema version is {current_schema_version()}.')
+
+@db_cli.command('status')
+def db_status_command():
+    """List migrations and whether each is applied."""
+    for migration, applied in migrations.status(db.engine):
+        click.echo(f"{'[x]' if applied else '[ ]'} {migration.version:04d}_{migration.name}: {migration.description}")
+
+@db_cli.command('stamp')
+@click.argument('version', type=int)
+def db_stamp_command(version):
+    """Mark migrations up to VERSION as applied without running them."""
+    migrations.stamp(db.engine, version)
+    click.echo(f'Schema version is {current_schema_version()}.')
+
+if __name__ == '__main__':
+    # For production deployment on Render; see serve.py for the options
+    import serve
+    serve.main(app_module=sys.modules[__name__])
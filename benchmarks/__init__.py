@@ -0,0 +1,5 @@
+"""
+Benchmarks and load-test harnesses for Coding Questions Finder.
+
+Run from the project root, e.g. ``python -m benchmarks.loadtest``.
+"""
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Bytes transferred per dashboard load, with and without compression.
+
+Fetches the student and mentor dashboards plus the static files they link
+to for each Accept-Encoding and reports the bytes on the wire. A repeat visit
+only transfers the HTML, because fingerprinted assets are served with
+far-future cache headers.
+
+    python -m benchmarks.bench_page_weight --sets 200 --json weight.json
+"""
+
+import argparse
+import re
+
+from benchmarks import common, seed as seed_module
+
+ASSET_RE = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+
+def page_weight(client, path, accept_encoding):
+    headers = {'Accept-Encoding': accept_encoding} if accept_encoding else {}
+    page = client.get(path, headers=headers)
+    html = page.get_data()
+    # Find links in the decoded page
+    plain = client.get(path).get_data(as_text=True)
+    assets = {}
+    cacheable = True
+    for url in sorted(set(ASSET_RE.findall(plain))):
+        response = client.get(url, headers=headers)
+        assets[url] = len(response.get_data())
+        cacheable = cacheable and 'immutable' in response.headers.get('Cache-Control', '')
+        response.close()
+    return {
+        'html_bytes': len(html),
+        'html_encoding': page.headers.get('Content-Encoding'),
+        'asset_bytes': sum(assets.values()),
+        'assets': assets,
+        'first_visit_bytes': len(html) + sum(assets.values()),
+        'repeat_visit_bytes': len(html) if cacheable else len(html) + sum(assets.values()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure bytes per dashboard load.')
+    parser.add_argument('--db', default=None, help='existing seeded SQLite file (default: seed a temporary one)')
+    parser.add_argument('--sets', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    args = parser.parse_args(argv)
+
+    reuse = args.db is not None
+    common.prepare_environment(args.db)
+    app_module = common.load_app()
+    with app_module.app.app_context():
+        seeded = app_module.db.session.query(app_module.QuestionSet).count() > 0
+    if not (reuse and seeded):
+        seed_module.seed(app_module, mentors=1, students=1, sets=args.sets, seed_value=args.seed)
+
+    import compression
+    encodings = [None] + list(reversed(compression.available_encodings()))
+    results = {}
+    for username, path in (('bench_student_0', '/student'), ('bench_mentor_0', '/mentor')):
+        client = app_module.app.test_client()
+        client.post('/login', json={'username': username, 'password': seed_module.PASSWORD})
+        results[path] = {encoding or 'identity': page_weight(client, path, encoding) for encoding in encodings}
+        identity = results[path]['identity']['first_visit_bytes']
+        for encoding, entry in results[path].items():
+            entry['first_visit_ratio'] = round(entry['first_visit_bytes'] / identity, 3) if identity else None
+
+    report = {
+        'benchmark': 'page_weight',
+        'environment': common.environment_info(),
+        'config': {'sets': args.sets, 'compress_min_size': app_module.COMPRESS_MIN_SIZE},
+        'pages': results,
+    }
+    common.write_report(report, args.json)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark the read paths against a seeded database.
+
+Times student_dashboard, mentor_dashboard, get_question_details and
+get_published_question_details through the Flask test client and prints a
+JSON report. Pass ``--compare`` with a previous report to print per-endpoint
+deltas between commits.
+
+    python -m benchmarks.bench_read_paths --sets 5000 --iterations 50 --json after.json --compare before.json
+"""
+
+import argparse
+import json
+import random
+
+from benchmarks import common, seed as seed_module
+
+
+def bench(app_module, iterations, warmup, rng):
+    flask_app = app_module.app
+    db = app_module.db
+    QuestionSet = app_module.QuestionSet
+    User = app_module.User
+
+    mentor = flask_app.test_client()
+    student = flask_app.test_client()
+    for client, username in ((mentor, 'bench_mentor_0'), (student, 'bench_student_0')):
+        response = client.post('/login', json={'username': username, 'password': seed_module.PASSWORD})
+        if response.status_code != 200:
+            raise SystemExit(f"Could not log in as {username}; was the database seeded?")
+
+    with flask_app.app_context():
+        mentor_id = db.session.query(User.id).filter_by(username='bench_mentor_0').scalar()
+        own_ids = [r[0] for r in db.session.query(QuestionSet.id).filter_by(mentor_id=mentor_id).all()]
+        published_ids = [r[0] for r in db.session.query(QuestionSet.id).filter_by(is_published=True).all()]
+
+    cases = {
+        'student_dashboard': lambda: student.get('/student'),
+        'mentor_dashboard': lambda: mentor.get('/mentor'),
+        'get_question_details': lambda: mentor.get(f'/get_question_details/{rng.choice(own_ids)}'),
+        'get_published_question_details':
+            lambda: student.get(f'/get_published_question_details/{rng.choice(published_ids)}'),
+    }
+    results = {}
+    for name, call in cases.items():
+        for _ in range(warmup):
+            call()
+        samples = []
+        errors = 0
+        response_bytes = 0
+        for _ in range(iterations):
+            elapsed, response = common.time_call(call)
+            samples.append(elapsed)
+            response_bytes = len(response.data)
+            if response.status_code != 200:
+                errors += 1
+        results[name] = dict(common.percentiles(samples), errors=errors, response_bytes=response_bytes)
+    return results
+
+
+def compare(current, previous):
+    """Return {endpoint: {'p50_change_pct': .., 'p95_change_pct': ..}} against a previous report."""
+    deltas = {}
+    for name, stats in current.items():
+        old = previous.get('endpoints', {}).get(name)
+        if not old:
+            continue
+        deltas[name] = {}
+        for key in ('p50_ms', 'p95_ms', 'mean_ms'):
+            if old.get(key):
+                deltas[name][key.replace('_ms', '_change_pct')] = round((stats[key] - old[key]) / old[key] * 100, 1)
+    return deltas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark the dashboard and details read paths.')
+    parser.add_argument('--db', default=None, help='existing seeded SQLite file (default: seed a temporary one)')
+    parser.add_argument('--mentors', type=int, default=10)
+    parser.add_argument('--students', type=int, default=100)
+    parser.add_argument('--sets', type=int, default=1000)
+    parser.add_argument('--published-ratio', type=float, default=0.5)
+    parser.add_argument('--iterations', type=int, default=30)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    parser.add_argument('--compare', default=None, help='previous report to compare against')
+    args = parser.parse_args(argv)
+
+    reuse = args.db is not None
+    common.prepare_environment(args.db)
+    app_module = common.load_app()
+    with app_module.app.app_context():
+        seeded = app_module.db.session.query(app_module.QuestionSet).count() > 0
+    if not (reuse and seeded):
+        seed_module.seed(app_module, args.mentors, args.students, args.sets, args.published_ratio, seed_value=args.seed)
+
+    with app_module.app.app_context():
+        dataset = {
+            'users': app_module.db.session.query(app_module.User).count(),
+            'question_sets': app_module.db.session.query(app_module.QuestionSet).count(),
+            'published_sets': app_module.db.session.query(app_module.QuestionSet).filter_by(is_published=True).count(),
+        }
+
+    report = {
+        'benchmark': 'read_paths',
+        'environment': common.environment_info(),
+        'dataset': dataset,
+        'config': {'iterations': args.iterations, 'warmup': args.warmup, 'seed': args.seed},
+        'endpoints': bench(app_module, args.iterations, args.warmup, random.Random(args.seed)),
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+        report['comparison'] = compare(report['endpoints'], previous)
+        if previous.get('dataset') != dataset:
+            # Timings from differently sized datasets aren't comparable
+            report['comparison_dataset_mismatch'] = True
+    common.write_report(report, args.json)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Dashboard render time with and without the card fragment cache.
+
+Loads N sets once, then times rendering the mentor and student dashboard
+templates (no database work) in four states:
+
+* uncached - every card rendered on every request (cache disabled)
+* cold     - empty cache, every card rendered and stored
+* warm     - every card served from the cache
+* one_changed - one set's updated_at bumped, so one card is re-rendered
+
+    python -m benchmarks.bench_render --sizes 1000,10000 --iterations 10 --json render.json
+"""
+
+import argparse
+from datetime import datetime, timedelta
+
+from benchmarks import common, seed as seed_module
+
+
+def render_page(app_module, page, questions, solved_counts):
+    if page == 'mentor':
+        return app_module.render_template(
+            'mentor_dashboard.html', user='bench', user_type='mentor', saved_questions=questions,
+            question_cards=app_module.render_cards('mentor_question_card.html', questions))
+    return app_module.render_template(
+        'student_dashboard.html', user='bench', user_type='student', published_questions=questions,
+        question_cards=app_module.render_cards('student_question_card.html', questions, solved_counts))
+
+
+def bench_size(app_module, questions, iterations):
+    cache = app_module.card_cache
+    max_entries = cache.max_entries
+    # Every other set has some progress, so the per-student slot is exercised
+    solved_counts = {q.id: 1 for q in questions[::2]}
+    results = {}
+    with app_module.app.test_request_context('/'):
+        for page in ('mentor', 'student'):
+            def render():
+                return render_page(app_module, page, questions, solved_counts)
+
+            def sample(prepare=None, n=iterations):
+                samples = []
+                for _ in range(n):
+                    if prepare:
+                        prepare()
+                    elapsed, html = common.time_call(render)
+                    samples.append(elapsed)
+                return samples, len(html)
+
+            cache.max_entries = 0
+            uncached, page_bytes = sample()
+            cache.max_entries = max(max_entries, len(questions) * 2)
+            cold, _ = sample(prepare=cache.clear)
+            render()
+            warm, _ = sample()
+            changed = questions[len(questions) // 2]
+
+            def bump():
+                changed.updated_at = (changed.updated_at or datetime.utcnow()) + timedelta(microseconds=1)
+
+            one_changed, _ = sample(prepare=bump)
+            cache.max_entries = max_entries
+            cache.clear()
+            results[page] = {
+                'page_bytes': page_bytes,
+                'uncached': common.percentiles(uncached),
+                'cold': common.percentiles(cold),
+                'warm': common.percentiles(warm),
+                'one_changed': common.percentiles(one_changed),
+            }
+            uncached_p50 = results[page]['uncached'].get('p50_ms')
+            warm_p50 = results[page]['warm'].get('p50_ms')
+            results[page]['warm_speedup'] = round(uncached_p50 / warm_p50, 1) if warm_p50 else None
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time dashboard rendering with the card fragment cache.')
+    parser.add_argument('--db', default=None, help='existing seeded SQLite file (default: seed a temporary one)')
+    parser.add_argument('--sizes', default='1000,10000', help='comma-separated numbers of sets per page')
+    parser.add_argument('--iterations', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    reuse = args.db is not None
+    common.prepare_environment(args.db)
+    app_module = common.load_app()
+    QuestionSet = app_module.QuestionSet
+    with app_module.app.app_context():
+        available = app_module.db.session.query(QuestionSet).count()
+        if not (reuse and available >= max(sizes)):
+            seed_module.seed(app_module, mentors=1, students=1, sets=max(sizes), published_ratio=1.0,
+                             seed_value=args.seed)
+        results = {}
+        for size in sizes:
+            questions = QuestionSet.list_query().order_by(QuestionSet.created_at.desc()).limit(size).all()
+            # Detach so bumping updated_at never reaches the database
+            app_module.db.session.expunge_all()
+            results[str(size)] = bench_size(app_module, questions, args.iterations)
+
+    report = {
+        'benchmark': 'render',
+        'environment': common.environment_info(),
+        'config': {'sizes': sizes, 'iterations': args.iterations},
+        'results': results,
+    }
+    common.write_report(report, args.json)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Throughput of the waitress launcher (serve.py) under different settings.
+
+Seeds a database, then for each configuration starts ``serve.py`` as a
+subprocess, drives it over real HTTP with concurrent logged-in clients and
+records requests/second and latency percentiles. By default one setting is
+varied at a time from the baseline so the effect of each is visible:
+
+    python -m benchmarks.bench_server --duration 5 --clients 32
+    python -m benchmarks.bench_server --sweep threads=2,8,16 --sweep workers=1,2,4 --json server.json
+"""
+
+import argparse
+import http.cookiejar
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from benchmarks import common, seed as seed_module
+
+BASELINE = {'threads': 8, 'connection_limit': 100, 'channel_timeout': 120, 'backlog': 1024, 'workers': 1}
+DEFAULT_SWEEPS = {
+    'threads': [1, 4, 8, 16],
+    'connection_limit': [8, 100],
+    'backlog': [8, 1024],
+    'workers': [1, 2, 4],
+}
+PATHS = ['/student', '/health/genai']
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(config, port):
+    command = [
+        sys.executable, os.path.join(common.PROJECT_ROOT, 'serve.py'),
+        '--host', '127.0.0.1', '--port', str(port),
+        '--threads', str(config['threads']),
+        '--connection-limit', str(config['connection_limit']),
+        '--channel-timeout', str(config['channel_timeout']),
+        '--backlog', str(config['backlog']),
+        '--workers', str(config['workers']),
+    ]
+    process = subprocess.Popen(command, cwd=common.PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"serve.py exited with status {process.returncode}")
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/health/genai', timeout=1).read()
+            return process
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('serve.py did not start within 60 seconds')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=15)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def login(base_url, username):
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    body = json.dumps({'username': username, 'password': seed_module.PASSWORD}).encode()
+    request = urllib.request.Request(f'{base_url}/login', data=body, headers={'Content-Type': 'application/json'})
+    opener.open(request, timeout=30).read()
+    return opener
+
+
+def drive(base_url, clients, students, duration, seed):
+    """Run `clients` concurrent logged-in clients for `duration` seconds."""
+    openers = [login(base_url, f'bench_student_{i % students}') for i in range(clients)]
+    samples, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(opener, rng):
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            path = rng.choice(PATHS)
+            start = time.perf_counter()
+            try:
+                opener.open(base_url + path, timeout=30).read()
+            except (urllib.error.URLError, OSError):
+                failed += 1
+            local.append(time.perf_counter() - start)
+        with lock:
+            samples.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=client, args=(opener, random.Random(seed + i)))
+               for i, opener in enumerate(openers)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    return dict(common.percentiles(samples), errors=errors[0],
+                requests_per_second=round(len(samples) / elapsed, 1))
+
+
+def configurations(sweeps):
+    """Baseline plus one configuration per swept value, varying one setting at a time."""
+    configs = [('baseline', dict(BASELINE))]
+    for name, values in sweeps.items():
+        for value in values:
+            if value == BASELINE[name]:
+                continue
+            configs.append((f'{name}={value}', dict(BASELINE, **{name: value})))
+    return configs
+
+
+def parse_sweep(text):
+    name, _, values = text.partition('=')
+    name = name.strip().replace('-', '_')
+    if name not in BASELINE or not values:
+        raise argparse.ArgumentTypeError(f"expected one of {sorted(BASELINE)}=v1,v2,..., got {text!r}")
+    return name, [int(v) for v in values.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark serve.py settings over HTTP.')
+    parser.add_argument('--db', default=None, help='existing seeded SQLite file (default: seed a temporary one)')
+    parser.add_argument('--sets', type=int, default=500)
+    parser.add_argument('--students', type=int, default=50)
+    parser.add_argument('--clients', type=int, default=32, help='concurrent HTTP clients')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per configuration')
+    parser.add_argument('--sweep', action='append', type=parse_sweep, default=None,
+                        help='setting=v1,v2,... to vary (repeatable; default: threads, connection_limit, backlog, workers)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    args = parser.parse_args(argv)
+
+    reuse = args.db is not None
+    common.prepare_environment(args.db)
+    app_module = common.load_app()
+    with app_module.app.app_context():
+        seeded = app_module.db.session.query(app_module.QuestionSet).count() > 0
+        if not (reuse and seeded):
+            seed_module.seed(app_module, students=args.students, sets=args.sets, seed_value=args.seed)
+        students = app_module.db.session.query(app_module.User).filter(
+            app_module.User.username.like('bench_student_%')).count()
+
+    sweeps = dict(args.sweep) if args.sweep else DEFAULT_SWEEPS
+    if not hasattr(os, 'fork'):
+        sweeps.pop('workers', None)
+    results = {}
+    for label, config in configurations(sweeps):
+        port = free_port()
+        process = start_server(config, port)
+        try:
+            results[label] = dict(drive(f'http://127.0.0.1:{port}', args.clients, students, args.duration, args.seed),
+                                  config=config)
+        finally:
+            stop_server(process)
+        print(f"{label}: {results[label]['requests_per_second']} req/s, p95 {results[label].get('p95_ms')} ms",
+              file=sys.stderr)
+
+    report = {
+        'benchmark': 'server',
+        'environment': dict(common.environment_info(), cpu_count=os.cpu_count()),
+        'config': {'clients': args.clients, 'duration': args.duration, 'paths': PATHS, 'seed': args.seed},
+        'results': results,
+    }
+    common.write_report(report, args.json)
+    return report
+
+
+if __name__ == '__main__':
+    main()
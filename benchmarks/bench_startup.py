@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Import and first-use time of each entry point, in fresh interpreters.
+
+Every run starts a new Python process that imports the entry point, then
+does what the entry point does first:
+
+* app          - ``python app.py``: import, then the first request (GET /login)
+* serve        - a waitress worker: import, schema check, first request (GET /health/ready)
+* setup_sqlite - ``python setup_sqlite.py``: import, then setup_database()
+
+Times are reported per phase, plus the whole process (interpreter startup
+included). One extra run under ``-X importtime`` attributes import time to
+top-level packages, and each result says whether the Google SDK got loaded.
+
+    python -m benchmarks.bench_startup --runs 5 --json startup.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks import common
+
+# name -> (import phase, first-use phase, modules imported by the import phase)
+ENTRY_POINTS = {
+    'app': ('import app', "app.app.test_client().get('/login')", ('app',)),
+    'serve': ('import serve, app; serve.prepare_schema(app)',
+              "app.app.test_client().get('/health/ready')", ('serve', 'app')),
+    'setup_sqlite': ('import setup_sqlite', 'setup_sqlite.setup_database()', ('setup_sqlite',)),
+}
+
+AI_SDK_MODULES = ('google.generativeai', 'google.genai')
+
+_CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+{import_code}
+imported = time.perf_counter()
+{first_code}
+done = time.perf_counter()
+print(json.dumps({{'import_s': imported - start, 'first_use_s': done - imported, 'modules': len(sys.modules),
+                  'ai_sdk': [m for m in {sdk!r} if m in sys.modules]}}))
+'''
+
+
+def _run_child(entry, importtime=False):
+    import_code, first_code, _ = ENTRY_POINTS[entry]
+    code = _CHILD.format(import_code=import_code, first_code=first_code, sdk=AI_SDK_MODULES)
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    start = time.perf_counter()
+    proc = subprocess.run(command, cwd=common.PROJECT_ROOT, capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f'{entry} failed:\n{proc.stderr[-2000:]}')
+    # The entry point may print; the measurement is the last line
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    result['process_s'] = elapsed
+    return result, proc.stderr
+
+
+def import_time_by_package(stderr, roots, top=15):
+    """Milliseconds of -X importtime self time per top-level package, for modules loaded under `roots`."""
+    packages = Counter()
+    block = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        # "import time:  <self us> | <cumulative us> | <2 spaces per level><module>"
+        self_part, _, name = line.split('|', 2)
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        block.append((name, int(self_part.split(':', 1)[1])))
+        # Children are listed before their parent; a depth-0 line closes a block
+        if depth == 0:
+            if name in roots:
+                for module, us in block:
+                    packages[module.split('.')[0]] += us
+            block = []
+    return {package: round(us / 1000, 2) for package, us in packages.most_common(top)}
+
+
+def bench_entry(entry, runs):
+    samples = {'import_s': [], 'first_use_s': [], 'process_s': []}
+    result = None
+    for _ in range(runs):
+        result, _ = _run_child(entry)
+        for phase in samples:
+            samples[phase].append(result[phase])
+    _, stderr = _run_child(entry, importtime=True)
+    return {
+        'import': common.percentiles(samples['import_s']),
+        'first_use': common.percentiles(samples['first_use_s']),
+        'process': common.percentiles(samples['process_s']),
+        'modules_loaded': result['modules'],
+        'ai_sdk_loaded': result['ai_sdk'],
+        'import_ms_by_package': import_time_by_package(stderr, ENTRY_POINTS[entry][2]),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time imports and first use of each entry point.')
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--entries', default=','.join(ENTRY_POINTS), help='comma-separated entry points')
+    parser.add_argument('--backend', default='fake', help="LLM_BACKEND for the children ('gemini' needs GOOGLE_API_KEY)")
+    parser.add_argument('--db', default=None, help='SQLite file to use (default: a temporary one)')
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    args = parser.parse_args(argv)
+    entries = [e.strip() for e in args.entries.split(',') if e.strip()]
+
+    # Children inherit the environment
+    db_path = common.prepare_environment(args.db, backend=args.backend)
+    report = {
+        'benchmark': 'startup',
+        'environment': common.environment_info(),
+        'config': {'runs': args.runs, 'backend': args.backend, 'db': os.path.abspath(db_path)},
+        'results': {entry: bench_entry(entry, args.runs) for entry in entries},
+    }
+    common.write_report(report, args.json)
+    return report
+
+
+if __name__ == '__main__':
+    main()
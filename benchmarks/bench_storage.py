@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Stored size and decode time of questions_data in each encoding.
+
+Generates question sets like benchmarks.seed and, for each set size,
+encodes them as the original JSON text, the compact columnar form, and the
+compact form zlib-compressed when smaller (the default), then times
+decoding each one. No database is needed: the stored text is exactly what
+goes into the column.
+
+    python -m benchmarks.bench_storage --sets 2000 --sizes 5,20 --json storage.json
+"""
+
+import argparse
+import json
+import random
+
+import question_codec
+from benchmarks import common, seed as seed_module
+
+ENCODINGS = {
+    'json': json.dumps,
+    'compact': lambda questions: question_codec.encode(questions, compress=False),
+    'compact_zlib': question_codec.encode,
+}
+
+
+def bench_size(questions_per_set, sets, seed_value=0):
+    rng = random.Random(seed_value)
+    question_sets = [seed_module.make_questions(rng, i, questions_per_set)[2] for i in range(sets)]
+    results = {}
+    for name, encode in ENCODINGS.items():
+        stored = [encode(questions) for questions in question_sets]
+        samples = []
+        for text, questions in zip(stored, question_sets):
+            elapsed, decoded = common.time_call(question_codec.decode, text)
+            if decoded != questions:
+                raise AssertionError(f'{name} did not round-trip')
+            samples.append(elapsed)
+        total = sum(len(text.encode('utf-8')) for text in stored)
+        results[name] = {
+            'bytes_total': total,
+            'bytes_per_set': round(total / sets, 1),
+            'decode': common.percentiles(samples),
+        }
+    baseline = results['json']['bytes_total']
+    for result in results.values():
+        result['size_vs_json'] = round(result['bytes_total'] / baseline, 3)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare questions_data encodings.')
+    parser.add_argument('--sets', type=int, default=2000)
+    parser.add_argument('--sizes', default='5,20', help='comma-separated questions per set')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    args = parser.parse_args(argv)
+    sizes = [int(s) for s in args.sizes.split(',')]
+
+    report = {
+        'benchmark': 'storage',
+        'environment': common.environment_info(),
+        'config': {'sets': args.sets, 'sizes': sizes},
+        'results': {str(size): bench_size(size, args.sets, args.seed) for size in sizes},
+    }
+    common.write_report(report, args.json)
+    return report
+
+
+if __name__ == '__main__':
+    main()
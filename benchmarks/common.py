@@ -0,0 +1,120 @@
+"""
+Shared helpers for the benchmark and load-test scripts.
+
+Environment must be prepared before ``app`` is imported because app.py reads
+DATABASE_URL and LLM_BACKEND at import time.
+"""
+
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+
+def prepare_environment(db_path=None, backend='fake', fake_latency=None, fake_failure_rate=None,
+                        fake_malformed_rate=None, seed=None):
+    """Point the app at a scratch SQLite database and select the completion backend."""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='cqf-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.abspath(db_path)}"
+    os.environ['LLM_BACKEND'] = backend
+    # Measure the real pipeline: no cached searches or completions, no 429s from many simulated users
+    os.environ.setdefault('SEARCH_CACHE_TTL', '0')
+    os.environ.setdefault('SEARCH_RATE_LIMIT', '0')
+    os.environ.setdefault('LOGIN_RATE_LIMIT', '0')
+    os.environ.setdefault('SEMANTIC_SEARCH', '0')
+    os.environ.setdefault('COMPLETION_CACHE', '0')
+    os.environ.setdefault('SIMILARITY_INDEX_DIR', os.path.join(os.path.dirname(os.path.abspath(db_path)), 'similarity'))
+    if fake_latency is not None:
+        os.environ['FAKE_LLM_LATENCY'] = str(fake_latency)
+    if fake_failure_rate is not None:
+        os.environ['FAKE_LLM_FAILURE_RATE'] = str(fake_failure_rate)
+    if fake_malformed_rate is not None:
+        os.environ['FAKE_LLM_MALFORMED_RATE'] = str(fake_malformed_rate)
+    if seed is not None:
+        os.environ['FAKE_LLM_SEED'] = str(seed)
+    return db_path
+
+
+def load_app():
+    """Import the Flask app and bring the schema up to date."""
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.run_migrations()
+    return app_module
+
+
+def percentiles(samples):
+    """Summarize latency samples (seconds) as milliseconds."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def pick(p):
+        # Nearest-rank percentile
+        index = min(len(ordered) - 1, max(0, math.ceil(p / 100.0 * len(ordered)) - 1))
+        return round(ordered[index] * 1000, 3)
+
+    return {
+        'count': len(ordered),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3),
+        'p50_ms': pick(50),
+        'p95_ms': pick(95),
+        'p99_ms': pick(99),
+        'max_ms': round(ordered[-1] * 1000, 3),
+    }
+
+
+def time_call(fn, *args, **kwargs):
+    """Run fn and return (elapsed_seconds, result)."""
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def register_and_login(client, username, user_type, password='benchpass123'):
+    """Create a user through the public endpoints and log the client in."""
+    client.post('/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': password,
+        'user_type': user_type,
+    })
+    response = client.post('/login', json={'username': username, 'password': password})
+    if response.status_code != 200:
+        raise RuntimeError(f"Login failed for {username}: {response.status_code}")
+    return client
+
+
+def environment_info():
+    """Metadata recorded with every report so runs can be compared between commits."""
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        commit = None
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def write_report(report, path=None):
+    """Print the report as JSON and optionally write it to `path`."""
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+    print(text)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+In-process load test for the search pipeline.
+
+Drives /search, /save_search and both dashboards concurrently through the
+Flask test client against a scratch SQLite database, using the deterministic
+fake completion backend so no network access or API key is needed.
+
+    python -m benchmarks.loadtest --workers 8 --duration 10 --latency 0.05 --json out.json
+"""
+
+import argparse
+import random
+import threading
+import time
+
+from benchmarks import common
+
+# Relative weight of each operation in the request mix
+DEFAULT_MIX = {
+    'search': 2,
+    'save_search': 1,
+    'mentor_dashboard': 2,
+    'student_dashboard': 4,
+    'published_details': 2,
+}
+
+SEARCH_TOPICS = [
+    'two sum for Google', 'longest palindromic substring', 'LRU cache design for Amazon',
+    'graph shortest path', 'binary tree level order traversal', 'sliding window maximum for Microsoft',
+    'knapsack dynamic programming', 'merge intervals for Meta',
+]
+
+
+def parse_mix(text):
+    """Parse 'search=2,student_dashboard=4' into a weight dict."""
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown operation in --mix: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+class Worker(threading.Thread):
+    """One simulated user pair (a mentor and a student) issuing requests."""
+
+    def __init__(self, index, app_module, mix, max_requests, seed, results, lock):
+        super().__init__(daemon=True)
+        self.index = index
+        self.app_module = app_module
+        self.mix = mix
+        self.deadline = None
+        self.max_requests = max_requests
+        self.rng = random.Random(seed + index)
+        self.results = results
+        self.lock = lock
+        self.last_search = None
+        # Log in before the clock starts; password hashing would skew the results
+        flask_app = app_module.app
+        self.mentor = common.register_and_login(flask_app.test_client(), f'lt_mentor_{index}', 'mentor')
+        self.student = common.register_and_login(flask_app.test_client(), f'lt_student_{index}', 'student')
+
+    def run(self):
+        mentor, student = self.mentor, self.student
+        names = list(self.mix)
+        weights = [self.mix[n] for n in names]
+        done = 0
+        while time.perf_counter() < self.deadline and (not self.max_requests or done < self.max_requests):
+            op = self.rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            ok = getattr(self, 'op_' + op)(mentor, student)
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                entry = self.results.setdefault(op, {'samples': [], 'errors': 0})
+                entry['samples'].append(elapsed)
+                if not ok:
+                    entry['errors'] += 1
+            done += 1
+
+    def op_search(self, mentor, student):
+        query = self.rng.choice(SEARCH_TOPICS)
+        response = mentor.post('/search', json={'query': query})
+        if response.status_code == 200 and response.get_json().get('success'):
+            data = response.get_json()
+            self.last_search = {'query': query, 'summary': data['summary'], 'questions': data['questions']}
+            return True
+        return False
+
+    def op_save_search(self, mentor, student):
+        if self.last_search is None and not self.op_search(mentor, student):
+            return False
+        response = mentor.post('/save_search', json=self.last_search)
+        if response.status_code != 200:
+            return False
+        # Publish so the student read paths have data to return
+        question_id = response.get_json().get('question_id')
+        publish = mentor.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+        return publish.status_code == 200
+
+    def op_mentor_dashboard(self, mentor, student):
+        return mentor.get('/mentor').status_code == 200
+
+    def op_student_dashboard(self, mentor, student):
+        return student.get('/student').status_code == 200
+
+    def op_published_details(self, mentor, student):
+        with self.app_module.app.app_context():
+            ids = [row[0] for row in self.app_module.db.session.query(self.app_module.QuestionSet.id)
+                   .filter_by(is_published=True).limit(50).all()]
+        if not ids:
+            return self.op_student_dashboard(mentor, student)
+        response = student.get(f'/get_published_question_details/{self.rng.choice(ids)}')
+        return response.status_code == 200
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='concurrent simulated users')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds to run')
+    parser.add_argument('--requests', type=int, default=0, help='stop each worker after N requests (0 = no limit)')
+    parser.add_argument('--mix', default='', help='operation weights, e.g. search=2,student_dashboard=4')
+    parser.add_argument('--latency', type=float, default=0.0, help='fake LLM latency per call in seconds')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='fake LLM failure probability')
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='fake LLM malformed-JSON probability')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--db', default=None, help='SQLite file to use (default: temporary)')
+    parser.add_argument('--json', default=None, help='write the report to this file')
+    args = parser.parse_args(argv)
+
+    common.prepare_environment(
+        args.db, 'fake', args.latency, args.failure_rate, args.malformed_rate, args.seed
+    )
+    app_module = common.load_app()
+    mix = parse_mix(args.mix)
+
+    results = {}
+    lock = threading.Lock()
+    workers = [
+        Worker(i, app_module, mix, args.requests, args.seed, results, lock)
+        for i in range(args.workers)
+    ]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.deadline = start + args.duration
+        worker.start()
+    for worker in workers:
+        worker.join()
+    wall = time.perf_counter() - start
+
+    total = sum(len(r['samples']) for r in results.values())
+    report = {
+        'benchmark': 'loadtest',
+        'environment': common.environment_info(),
+        'config': {
+            'workers': args.workers,
+            'duration': args.duration,
+            'requests_per_worker': args.requests,
+            'mix': mix,
+            'fake_latency': args.latency,
+            'fake_failure_rate': args.failure_rate,
+            'fake_malformed_rate': args.malformed_rate,
+            'seed': args.seed,
+        },
+        'wall_seconds': round(wall, 3),
+        'total_requests': total,
+        'throughput_rps': round(total / wall, 2) if wall else 0,
+        'operations': {
+            op: dict(common.percentiles(r['samples']), errors=r['errors'])
+            for op, r in sorted(results.items())
+        },
+        'all': common.percentiles([s for r in results.values() for s in r['samples']]),
+    }
+    common.write_report(report, args.json)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Seed a database with N users and M question sets for benchmarking.
+
+Follows setup_sqlite.py: creates the tables, then bulk inserts rows in
+chunks. Every seeded user has the password ``benchpass123``; mentors are named
+``bench_mentor_<i>`` and students ``bench_student_<i>``.
+
+    python -m benchmarks.seed --db /tmp/bench.db --mentors 20 --students 500 --sets 5000
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks import common
+
+PASSWORD = 'benchpass123'
+CHUNK_SIZE = 1000
+
+_PLATFORMS = [
+    ('LeetCode', 'https://leetcode.com/problems/{slug}/'),
+    ('GeeksforGeeks', 'https://www.geeksforgeeks.org/{slug}/'),
+    ('HackerRank', 'https://www.hackerrank.com/challenges/{slug}/problem'),
+    ('InterviewBit', 'https://www.interviewbit.com/problems/{slug}/'),
+    ('CodeChef', 'https://www.codechef.com/problems/{slug}'),
+]
+_COMPANIES = ['Google', 'Amazon', 'Microsoft', 'Meta', 'Capgemini', 'Infosys', 'TCS', 'General']
+_CATEGORIES = ['Array', 'String', 'Dynamic Programming', 'Graph', 'Tree', 'Greedy', 'Hashing']
+_DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+_TOPICS = ['two sum', 'longest palindrome', 'lru cache', 'merge intervals', 'word ladder',
+           'coin change', 'course schedule', 'trapping rain water', 'top k frequent', 'n queens']
+
+
+def make_questions(rng, index, count=5):
+    company = rng.choice(_COMPANIES)
+    topic = rng.choice(_TOPICS)
+    questions = []
+    for i in range(count):
+        platform, pattern = rng.choice(_PLATFORMS)
+        slug = f"{topic.replace(' ', '-')}-{index}-{i}"
+        questions.append({
+            'url': pattern.format(slug=slug),
+            'platform': platform,
+            'topic': f'{topic.title()} {i + 1}',
+            'difficulty_level': rng.choice(_DIFFICULTIES),
+            'company': company,
+            'category': rng.choice(_CATEGORIES),
+        })
+    return topic, company, questions
+
+
+def seed(app_module, mentors=10, students=100, sets=1000, published_ratio=0.5, questions_per_set=5, seed_value=0):
+    """Insert users and question sets; returns a summary dict."""
+    from werkzeug.security import generate_password_hash
+
+    db = app_module.db
+    User = app_module.User
+    QuestionSet = app_module.QuestionSet
+    rng = random.Random(seed_value)
+    # Hash once: hashing per user would dominate seeding time
+    password_hash = generate_password_hash(PASSWORD)
+    now = datetime.utcnow()
+
+    with app_module.app.app_context():
+        db.create_all()
+        users = [
+            {'username': f'bench_mentor_{i}', 'email': f'bench_mentor_{i}@example.com',
+             'password_hash': password_hash, 'user_type': 'mentor', 'created_at': now, 'is_active': True}
+            for i in range(mentors)
+        ] + [
+            {'username': f'bench_student_{i}', 'email': f'bench_student_{i}@example.com',
+             'password_hash': password_hash, 'user_type': 'student', 'created_at': now, 'is_active': True}
+            for i in range(students)
+        ]
+        for start in range(0, len(users), CHUNK_SIZE):
+            db.session.execute(db.insert(User), users[start:start + CHUNK_SIZE])
+        db.session.commit()
+
+        mentor_ids = [row[0] for row in db.session.query(User.id).filter(User.username.like('bench_mentor_%')).all()]
+        batch = []
+        for i in range(sets):
+            topic, company, questions = make_questions(rng, i, questions_per_set)
+            created_at = now - timedelta(minutes=sets - i)
+            published = rng.random() < published_ratio
+            row = {
+                'mentor_id': mentor_ids[i % len(mentor_ids)],
+                'query': f'{topic} for {company}',
+                'summary': f'{topic.title()} practice set #{i}',
+                'questions_data': app_module.encode_questions(questions),
+                'is_published': published,
+                'created_at': created_at,
+                'published_at': created_at if published else None,
+            }
+            row.update(QuestionSet.question_stats(questions))
+            batch.append(row)
+            if len(batch) >= CHUNK_SIZE:
+                db.session.execute(db.insert(QuestionSet), batch)
+                batch = []
+        if batch:
+            db.session.execute(db.insert(QuestionSet), batch)
+        db.session.commit()
+        app_module.rebuild_rollups()
+
+        return {
+            'users': db.session.query(User).count(),
+            'question_sets': db.session.query(QuestionSet).count(),
+            'published_sets': db.session.query(QuestionSet).filter_by(is_published=True).count(),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Seed a benchmark database.')
+    parser.add_argument('--db', default=None, help='SQLite file to seed (default: temporary)')
+    parser.add_argument('--mentors', type=int, default=10)
+    parser.add_argument('--students', type=int, default=100)
+    parser.add_argument('--sets', type=int, default=1000)
+    parser.add_argument('--published-ratio', type=float, default=0.5)
+    parser.add_argument('--questions-per-set', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    db_path = common.prepare_environment(args.db)
+    app_module = common.load_app()
+    summary = seed(app_module, args.mentors, args.students, args.sets, args.published_ratio,
+                   args.questions_per_set, args.seed)
+    summary['database'] = db_path
+    common.write_report(summary)
+
+
+if __name__ == '__main__':
+    main()
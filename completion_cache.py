@@ -0,0 +1,168 @@
+"""
+Content-addressed cache of model completions.
+
+Entries are keyed on a hash of everything that determines the response
+(backend, model candidates, output budget and prompt), so any caller of
+get_completion can share them. Two tiers:
+
+* an in-process LRU of ``memory_entries`` responses, and
+* an optional SQLite file shared by every worker process on the host,
+  capped at ``max_bytes`` of response text (least recently used entries
+  are evicted first).
+
+Every entry carries its own expiry. Failures of the disk tier are logged
+and treated as misses; the cache never makes a completion fail.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Bump to invalidate every stored entry (e.g. if prompt rendering changes
+# in a way the prompt text itself doesn't show)
+KEY_VERSION = 1
+
+# Evict down to this fraction of max_bytes so every put doesn't evict
+_EVICT_TO = 0.9
+
+
+def make_key(backend, models, max_output_tokens, prompt):
+    payload = json.dumps([KEY_VERSION, backend, list(models or []), max_output_tokens, prompt])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class CompletionCache:
+    """Memory LRU in front of an optional SQLite store, with per-entry TTLs.
+
+    `on_result(result)` is called with 'memory_hit', 'disk_hit' or 'miss'
+    for each lookup.
+    """
+
+    def __init__(self, path=None, memory_entries=1000, max_bytes=100 * 1024 * 1024, ttl=86400.0,
+                 on_result=None):
+        self.path = path
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.on_result = on_result or (lambda result: None)
+        self._memory = OrderedDict()  # key -> (text, expires_at)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    # -- disk tier --
+
+    def _connection(self):
+        local = self._local
+        # SQLite connections must not be shared across fork() or threads
+        if getattr(local, 'conn', None) is None or local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS completion (key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                         'expires_at REAL NOT NULL, accessed_at REAL NOT NULL, size INTEGER NOT NULL)')
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_completion_accessed ON completion (accessed_at)')
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def _disk_get(self, key, now):
+        conn = self._connection()
+        row = conn.execute('SELECT value, expires_at FROM completion WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute('DELETE FROM completion WHERE key = ?', (key,))
+            return None
+        conn.execute('UPDATE completion SET accessed_at = ? WHERE key = ?', (now, key))
+        return row
+
+    def _disk_put(self, key, text, expires_at, now):
+        conn = self._connection()
+        size = len(text.encode('utf-8'))
+        conn.execute('INSERT OR REPLACE INTO completion (key, value, expires_at, accessed_at, size) '
+                     'VALUES (?, ?, ?, ?, ?)', (key, text, expires_at, now, size))
+        total = conn.execute('SELECT total(size) FROM completion').fetchone()[0]
+        if total > self.max_bytes:
+            conn.execute('DELETE FROM completion WHERE expires_at <= ?', (now,))
+            total = conn.execute('SELECT total(size) FROM completion').fetchone()[0]
+            evict = []
+            for old_key, old_size in conn.execute('SELECT key, size FROM completion ORDER BY accessed_at'):
+                if total <= self.max_bytes * _EVICT_TO:
+                    break
+                evict.append((old_key,))
+                total -= old_size
+            conn.executemany('DELETE FROM completion WHERE key = ?', evict)
+
+    # -- public API --
+
+    def get(self, key):
+        """Cached text for `key`, or None."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self._memory.move_to_end(key)
+                    self.on_result('memory_hit')
+                    return entry[0]
+                del self._memory[key]
+        if self.path:
+            try:
+                row = self._disk_get(key, now)
+            except sqlite3.Error as e:
+                print(f"Warning: completion cache read failed: {e}")
+                row = None
+            if row is not None:
+                self._remember(key, row[0], row[1])
+                self.on_result('disk_hit')
+                return row[0]
+        self.on_result('miss')
+        return None
+
+    def put(self, key, text, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        now = time.time()
+        expires_at = now + ttl
+        self._remember(key, text, expires_at)
+        if self.path:
+            try:
+                self._disk_put(key, text, expires_at, now)
+            except sqlite3.Error as e:
+                print(f"Warning: completion cache write failed: {e}")
+
+    def _remember(self, key, text, expires_at):
+        if self.memory_entries <= 0:
+            return
+        with self._lock:
+            self._memory[key] = (text, expires_at)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+        if self.path and os.path.exists(self.path):
+            try:
+                self._connection().execute('DELETE FROM completion')
+            except sqlite3.Error as e:
+                print(f"Warning: could not clear the completion cache: {e}")
+
+    def stats(self):
+        stats = {'memory_entries': len(self._memory), 'disk_entries': None, 'disk_bytes': None}
+        if self.path:
+            try:
+                count, size = self._connection().execute('SELECT count(*), total(size) FROM completion').fetchone()
+                stats.update(disk_entries=count, disk_bytes=int(size))
+            except sqlite3.Error:
+                pass
+        return stats
@@ -0,0 +1,198 @@
+"""
+Response compression and fingerprinted, precompressed static assets.
+
+Dynamic responses (HTML, JSON, CSS/JS, plain text) above a size threshold are
+compressed with brotli when the optional ``brotli`` package is installed and
+the client accepts it, otherwise with gzip. Streaming and already-encoded
+responses are left alone.
+
+Static files get content-hashed names (``style.css`` -> ``style.3f2a9c1b04de.css``)
+so they can be cached forever; when a file changes its name changes. Gzip and
+brotli variants of each compressible asset are written once to a cache
+directory and served directly instead of being compressed per request.
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+# Brotli is optional; gzip is always available.
+try:
+    import brotli
+except Exception:
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/javascript', 'application/javascript',
+    'application/json', 'image/svg+xml',
+)
+DEFAULT_MIN_SIZE = 500
+GZIP_LEVEL = 6
+# Fast settings for per-request compression; static assets are compressed
+# once, so they use the maximum.
+BROTLI_QUALITY = 5
+STATIC_GZIP_LEVEL = 9
+STATIC_BROTLI_QUALITY = 11
+HASH_LENGTH = 12
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+
+def available_encodings():
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def choose_encoding(accept_encoding, available=None):
+    """Best encoding from `available` (in preference order) that the Accept-Encoding header allows."""
+    available = available_encodings() if available is None else available
+    accepted = {}
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        name = name.strip().lower()
+        if not name:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[name] = q
+    for encoding in available:
+        if accepted.get(encoding, accepted.get('*', 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, static=False):
+    if encoding == 'br':
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0 keeps the output deterministic
+        return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding '{encoding}'")
+
+
+def _add_vary(response):
+    vary = response.headers.get('Vary', '')
+    if 'accept-encoding' not in vary.lower():
+        response.headers['Vary'] = f'{vary}, Accept-Encoding' if vary else 'Accept-Encoding'
+
+
+def compress_response(response, accept_encoding, min_size=DEFAULT_MIN_SIZE):
+    """Compress a buffered Flask response in place if it is worth it; returns the response."""
+    if (response.direct_passthrough or response.is_streamed
+            or response.status_code < 200 or response.status_code in (204, 206, 304)
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_TYPES):
+        return response
+    _add_vary(response)
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    body = compress(data, encoding)
+    if len(body) >= len(data):
+        return response
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    if response.headers.get('ETag'):
+        # The encoded body is a different representation
+        response.headers['ETag'] = response.headers['ETag'].rstrip('"') + f'-{encoding}"'
+    return response
+
+
+def _is_compressible(filename):
+    mimetype = mimetypes.guess_type(filename)[0] or ''
+    return mimetype in COMPRESSIBLE_TYPES
+
+
+class StaticAssets:
+    """Content-hashed names and precompressed variants for files in `static_folder`."""
+
+    def __init__(self, static_folder, cache_dir):
+        self.static_folder = static_folder
+        self.cache_dir = cache_dir
+        self.manifest = {}   # 'style.css' -> 'style.<hash>.css'
+        self._originals = {}  # 'style.<hash>.css' -> 'style.css'
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def hashed_name(filename, digest):
+        root, ext = os.path.splitext(filename)
+        return f'{root}.{digest[:HASH_LENGTH]}{ext}'
+
+    def build(self):
+        """Hash every static file and write missing compressed variants; returns the manifest."""
+        manifest = {}
+        variants = set()
+        for dirpath, _, filenames in os.walk(self.static_folder):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                filename = os.path.relpath(path, self.static_folder).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    data = f.read()
+                hashed = self.hashed_name(filename, hashlib.sha256(data).hexdigest())
+                manifest[filename] = hashed
+                if _is_compressible(filename):
+                    for encoding in available_encodings():
+                        variant = hashed + _SUFFIXES[encoding]
+                        variants.add(variant)
+                        self._write_variant(variant, data, encoding)
+        self._prune(variants)
+        with self._lock:
+            self.manifest = manifest
+            self._originals = {hashed: filename for filename, hashed in manifest.items()}
+        return manifest
+
+    def _write_variant(self, variant, data, encoding):
+        target = os.path.join(self.cache_dir, variant)
+        if os.path.exists(target):
+            # Names include the content hash, so an existing file is up to date
+            return
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f'{target}.{os.getpid()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(compress(data, encoding, static=True))
+        os.replace(tmp, target)
+
+    def _prune(self, keep):
+        if not os.path.isdir(self.cache_dir):
+            return
+        for dirpath, _, filenames in os.walk(self.cache_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                relative = os.path.relpath(path, self.cache_dir).replace(os.sep, '/')
+                if relative not in keep and not name.endswith('.tmp'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def url_name(self, filename):
+        """Fingerprinted name for `filename`, or the name itself if unknown."""
+        return self.manifest.get(filename, filename)
+
+    def resolve(self, requested):
+        """(original filename, is_fingerprinted) for a requested static path."""
+        original = self._originals.get(requested)
+        if original is not None:
+            return original, True
+        return requested, False
+
+    def variant_path(self, requested, accept_encoding):
+        """(path, encoding) of a precompressed variant of a fingerprinted file, or (None, None)."""
+        if requested not in self._originals or not _is_compressible(requested):
+            return None, None
+        encoding = choose_encoding(accept_encoding)
+        if encoding is None:
+            return None, None
+        path = os.path.join(self.cache_dir, requested + _SUFFIXES[encoding])
+        return (path, encoding) if os.path.isfile(path) else (None, None)
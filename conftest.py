@@ -0,0 +1,78 @@
+"""
+Shared pytest setup: point the app at a throwaway SQLite database before
+app.py is imported so in-process tests never touch users.db.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+_TEST_DIR = tempfile.mkdtemp(prefix='cqf-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_TEST_DIR, 'test.db')}")
+os.environ.setdefault('SIMILARITY_INDEX_DIR', os.path.join(_TEST_DIR, 'similarity'))
+os.environ.setdefault('COMPLETION_CACHE_PATH', os.path.join(_TEST_DIR, 'completion_cache.sqlite3'))
+
+
+@pytest.fixture
+def app_module():
+    """The app module with freshly created, empty tables."""
+    import app as app_module
+    with app_module.app.app_context():
+        app_module.db.drop_all()
+        app_module.migrations.version_table.drop(app_module.db.engine, checkfirst=True)
+        app_module.db.create_all()
+        # shared_state is not a model; migration 0006 creates it outside tests
+        if isinstance(app_module.state_store, app_module.shared_state.DatabaseBackend):
+            app_module.state_store.create_table()
+    # In-memory state keyed by ids must not leak between databases
+    app_module.progress_tracker.clear()
+    app_module._set_size_cache.clear()
+    app_module.card_cache.clear()
+    with app_module.app.app_context():
+        app_module.state_store.clear('ratelimit:')
+        app_module.state_store.clear('search:')
+        app_module.state_store.clear('prefetch:')
+        app_module.state_store.clear('health:')
+        app_module.state_store.clear('progress:')
+    app_module.search_prefetcher.clear()
+    app_module.query_index.reset()
+    app_module.library_index.reset()
+    app_module.change_feed.reset()
+    app_module.completion_responses.clear()
+    app_module.upstream_status.reset()
+    yield app_module
+
+
+def _login(app_module, username, user_type):
+    client = app_module.app.test_client()
+    client.post('/register', json={
+        'username': username,
+        'email': f'{username}@example.com',
+        'password': 'testpass123',
+        'user_type': user_type,
+    })
+    response = client.post('/login', json={'username': username, 'password': 'testpass123'})
+    assert response.status_code == 200
+    return client
+
+
+@pytest.fixture
+def mentor_client(app_module):
+    return _login(app_module, 'mentor1', 'mentor')
+
+
+@pytest.fixture
+def student_client(app_module):
+    return _login(app_module, 'student1', 'student')
+
+
+@pytest.fixture
+def fake_backend(app_module):
+    """Install a deterministic fake completion backend for the test."""
+    import llm_backends
+    previous = app_module.completion_backend
+    backend = llm_backends.FakeBackend()
+    app_module.set_completion_backend(backend)
+    yield backend
+    app_module.set_completion_backend(previous)
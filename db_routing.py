@@ -0,0 +1,97 @@
+"""
+Sending read-only queries to database replicas.
+
+``RoutingSession`` is the Flask-SQLAlchemy session class. Every statement
+goes to the primary unless a view has put a replica engine in
+``session.info[REPLICA_KEY]``; then plain SELECTs go to the replica until
+the session writes something, after which the rest of the request reads
+from the primary too. Anything that isn't a SELECT (DML, text() statements,
+flushes) always goes to the primary.
+
+``ReplicaPool`` hands out replica engines round-robin and skips one for
+``retry_after`` seconds after a connection error on it.
+"""
+
+import itertools
+import threading
+import time
+
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+REPLICA_KEY = 'read_replica'
+WROTE_KEY = 'wrote'
+
+
+class RoutingSession(Session):
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        replica = self.info.get(REPLICA_KEY)
+        if (bind is None and replica is not None and not self._flushing and not self.info.get(WROTE_KEY)
+                and getattr(clause, 'is_select', False)):
+            return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def has_written(session):
+    """True once the session has flushed objects or executed INSERT/UPDATE/DELETE."""
+    return bool(session.info.get(WROTE_KEY))
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _note_flush(session, flush_context):
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'do_orm_execute')
+def _note_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[WROTE_KEY] = True
+
+
+class ReplicaPool:
+    """Replica engines chosen round-robin, skipping ones that recently failed."""
+
+    def __init__(self, engines=(), retry_after=30.0):
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._down_until = {}
+        self.engines = []
+        self._cycle = itertools.cycle(())
+        self.set_engines(engines)
+
+    def set_engines(self, engines):
+        """Replace the replicas, disposing the previous engines."""
+        engines = list(engines)
+        for engine in engines:
+            event.listen(engine, 'handle_error', self._on_error)
+        with self._lock:
+            old, self.engines = self.engines, engines
+            self._cycle = itertools.cycle(engines)
+            self._down_until = {}
+        for engine in old:
+            engine.dispose()
+
+    def _on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.mark_down(context.engine)
+
+    def mark_down(self, engine):
+        with self._lock:
+            self._down_until[engine] = time.monotonic() + self.retry_after
+
+    def is_up(self, engine):
+        with self._lock:
+            return self._down_until.get(engine, 0.0) <= time.monotonic()
+
+    def choose(self):
+        """Next healthy replica, or None if there are none."""
+        with self._lock:
+            now = time.monotonic()
+            for _ in range(len(self.engines)):
+                engine = next(self._cycle)
+                if self._down_until.get(engine, 0.0) <= now:
+                    return engine
+        return None
+
+    def __len__(self):
+        return len(self.engines)
@@ -0,0 +1,147 @@
+"""
+In-process fan-out of the change-event feed.
+
+A ``ChangeFeed`` polls the database for new events on one daemon thread,
+only while someone is listening (or listened within ``linger`` seconds, so
+clients that reconnect every few seconds find the buffer current), keeping
+the most recent ones in a ring buffer. Every open stream in the process reads from that buffer, so one
+query per poll interval serves all connected clients.
+
+Sequence numbers come from the event table's primary key. A transaction
+that started earlier can commit a lower number after a higher one is
+already visible, so the poller stops at a gap and waits up to
+``gap_timeout`` seconds for it to fill before assuming the insert was
+rolled back.
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class ChangeFeed:
+    """Shared buffer of recent events, filled by a poller thread.
+
+    `fetch(after_seq, limit)` returns event dicts with a 'seq' key, in
+    order; `latest()` returns the highest sequence number stored.
+    """
+
+    def __init__(self, fetch, latest, interval=1.0, buffer_size=1000, batch_size=500, gap_timeout=5.0,
+                 linger=0.0):
+        self._fetch = fetch
+        self._latest = latest
+        self.interval = interval
+        self.buffer_size = buffer_size
+        self.batch_size = batch_size
+        self.gap_timeout = gap_timeout
+        self.linger = linger
+        self._last_listener_at = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+        self.listeners = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the buffer and position, e.g. after the database was recreated."""
+        with self._cond:
+            self._events = deque(maxlen=self.buffer_size)
+            self._cursor = None
+            # Every event after _floor is in the buffer or not fetched yet
+            self._floor = 0
+            self._gap_since = None
+            self._cond.notify_all()
+
+    @contextmanager
+    def listening(self):
+        """Keep the poller running while the block is active."""
+        with self._cond:
+            self.listeners += 1
+            self._ensure_poller()
+            self._cond.notify_all()
+        try:
+            yield self
+        finally:
+            with self._cond:
+                self.listeners -= 1
+                self._last_listener_at = time.monotonic()
+
+    def active(self):
+        """True while someone listens or listened within the last `linger` seconds."""
+        return bool(self.listeners) or (
+            self._last_listener_at is not None and time.monotonic() - self._last_listener_at < self.linger)
+
+    def _ensure_poller(self):
+        # Threads don't survive fork(), so each worker process starts its own
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._poll_forever, name='change-feed', daemon=True)
+            self._thread.start()
+
+    def _poll_forever(self):
+        while True:
+            with self._cond:
+                while not self.active():
+                    self._cond.wait()
+            try:
+                self.poll()
+            except Exception as e:
+                print(f"Warning: change feed poll failed: {e}")
+            time.sleep(self.interval)
+
+    def poll(self):
+        """Fetch new events into the buffer; returns how many were added."""
+        with self._cond:
+            cursor = self._cursor
+        if cursor is None:
+            # Start with recent history so clients that loaded a page a
+            # little earlier can still catch up
+            cursor = max(self._latest() - self.buffer_size, 0)
+            with self._cond:
+                self._cursor = self._floor = cursor
+        added = 0
+        while True:
+            events = self._fetch(cursor, self.batch_size)
+            with self._cond:
+                if self._cursor != cursor:
+                    return added  # reset while fetching
+                for event in events:
+                    if event['seq'] != cursor + 1:
+                        now = time.monotonic()
+                        if self._gap_since is None:
+                            self._gap_since = now
+                        if now - self._gap_since < self.gap_timeout:
+                            break
+                    self._gap_since = None
+                    if len(self._events) == self._events.maxlen:
+                        self._floor = self._events[0]['seq']
+                    self._events.append(event)
+                    cursor = event['seq']
+                    added += 1
+                self._cursor = cursor
+                if added:
+                    self._cond.notify_all()
+            if len(events) < self.batch_size or self._gap_since is not None:
+                return added
+
+    def wait(self, after_seq, timeout):
+        """Events after `after_seq`, waiting up to `timeout` seconds for some.
+
+        Returns None if the caller is too far behind to be caught up from
+        the buffer and should reload. A caller ahead of the buffer (it read
+        the database before the poller did) just waits.
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._cursor is not None:
+                    if after_seq < self._floor:
+                        return None
+                    if self._events and self._events[-1]['seq'] > after_seq:
+                        return [e for e in self._events if e['seq'] > after_seq]
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return []
+                self._cond.wait(remaining)
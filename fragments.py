@@ -0,0 +1,56 @@
+"""
+In-process cache of rendered HTML fragments.
+
+Fragments are keyed on something that changes whenever their content does
+(for dashboard cards: template, set id and updated_at), so entries never
+need invalidating; stale versions simply stop being requested and fall out
+of the LRU. Each worker process keeps its own cache.
+"""
+
+import threading
+from collections import OrderedDict
+
+
+class FragmentCache:
+    """Thread-safe LRU of rendered fragments with hit/miss counters."""
+
+    def __init__(self, max_entries=20000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_render(self, key, render):
+        """Cached value for `key`, calling render() to produce it on a miss."""
+        if self.max_entries <= 0:
+            return render()
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        # Rendered outside the lock; two threads missing at once both render,
+        # which is harmless because the results are identical
+        value = render()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self._entries)
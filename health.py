@@ -0,0 +1,123 @@
+"""
+Tiered health checks.
+
+* liveness: the process is up and answering; no I/O at all.
+* readiness: the database answers, plus the last known model status
+  (from real traffic and the last deep check), without calling the model.
+* deep: a real completion through the upstream model. The result is kept in
+  shared state for ``max_age`` seconds and every worker answers from it, and
+  a live probe starts at most once per ``min_interval`` seconds across all
+  workers, so monitors can poll it as often as they like.
+
+Every check reports how long it took in ``duration_ms``.
+"""
+
+import threading
+import time
+from uuid import uuid4
+
+
+def timed(check):
+    """Run check() and return {'ok', 'duration_ms'[, 'result' | 'error']}; check raises on failure."""
+    start = time.perf_counter()
+    result = {'ok': True}
+    try:
+        value = check()
+        if value is not None:
+            result['result'] = value
+    except Exception as e:
+        result = {'ok': False, 'error': str(e)}
+    result['duration_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return result
+
+
+class UpstreamStatus:
+    """Outcome of the most recent completion call made by this process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last = None
+
+    def record(self, ok, seconds, error=None):
+        entry = {'ok': ok, 'duration_ms': round(seconds * 1000, 2), 'at': time.time()}
+        if error is not None:
+            entry['error'] = str(error)
+        with self._lock:
+            self._last = entry
+
+    def snapshot(self):
+        """The last outcome with its age in seconds, or None if no call has been made."""
+        with self._lock:
+            last = self._last
+        if last is None:
+            return None
+        return dict(last, age_seconds=round(time.time() - last['at'], 1))
+
+    def reset(self):
+        with self._lock:
+            self._last = None
+
+
+class DeepCheck:
+    """Rate-limited end-to-end check whose result is shared through `store`.
+
+    `probe()` makes the upstream call and raises on failure.
+    """
+
+    def __init__(self, store, probe, max_age=60.0, min_interval=10.0, key='health:deep'):
+        self.store = store
+        self.probe = probe
+        self.max_age = max_age
+        self.min_interval = min_interval
+        self.key = key
+        self._lock = threading.Lock()
+
+    def _stored(self):
+        try:
+            return self.store.get(self.key)
+        except Exception as e:
+            print(f"Warning: could not read the last deep health check. {e}")
+            return None
+
+    def _claim_probe(self):
+        # One live probe per min_interval across every worker sharing the store
+        if self.min_interval <= 0:
+            return True
+        token = uuid4().hex
+        try:
+            return self.store.add(f'{self.key}:probe', token, ttl=self.min_interval) == token
+        except Exception as e:
+            print(f"Warning: deep health check rate limit unavailable. {e}")
+            return True
+
+    def _with_age(self, result, cached):
+        return dict(result, cached=cached, age_seconds=round(max(time.time() - result['at'], 0.0), 1))
+
+    def last(self):
+        """The stored result with its age, or None; never probes."""
+        result = self._stored()
+        return None if result is None else self._with_age(result, True)
+
+    def run(self, fresh=False):
+        """The stored result if younger than max_age (unless `fresh`), else a live probe.
+
+        Returns None only when a probe is needed but another one started
+        less than min_interval seconds ago and no result is stored yet.
+        """
+        result = self._stored()
+        if not fresh and result is not None and time.time() - result['at'] < self.max_age:
+            return self._with_age(result, True)
+        # Threads in this process wait for one probe instead of each starting one
+        with self._lock:
+            latest = self._stored()
+            if latest is not None and latest != result:
+                return self._with_age(latest, True)
+            if not self._claim_probe():
+                return None if latest is None else self._with_age(latest, True)
+            result = timed(self.probe)
+            result['at'] = time.time()
+            try:
+                self.store.set(self.key, result, ttl=max(self.max_age, self.min_interval) * 10)
+            except Exception as e:
+                print(f"Warning: could not store the deep health check result. {e}")
+            return self._with_age(result, False)
@@ -0,0 +1,205 @@
+"""
+Minimal in-process metrics with Prometheus text exposition.
+
+Counters and histograms are keyed by label values and guarded by a lock, so
+they can be updated from waitress worker threads. `render()` returns the
+registry in the Prometheus text format (version 0.0.4) for the /metrics
+endpoint.
+"""
+
+import threading
+import time
+
+# Default latency buckets in seconds (same as the Prometheus client library)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_items(items))
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def _render_items(self, items):
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}' for key, v in items]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {'buckets': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry['buckets'][i] += 1
+            entry['sum'] += value
+            entry['count'] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed time of its block."""
+        return _Timer(self, labels)
+
+    def snapshot(self, **labels):
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return None if entry is None else {'sum': entry['sum'], 'count': entry['count']}
+
+    def _render_items(self, items):
+        lines = []
+        for key, entry in items:
+            for bound, count in zip(self.buckets, entry['buckets']):
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {entry["count"]}')
+            plain = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{plain} {_format_value(entry["sum"])}')
+            lines.append(f'{self.name}_count{plain} {entry["count"]}')
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        self.histogram.observe(self.elapsed, **self.labels)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        for metric in self._metrics:
+            metric.reset()
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', 'HTTP requests handled.', ('route', 'method', 'status')))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', 'HTTP request latency by route.', ('route', 'method')))
+DB_QUERIES = REGISTRY.register(Counter(
+    'db_queries_total', 'SQL statements executed.', ('operation',)))
+DB_QUERY_LATENCY = REGISTRY.register(Histogram(
+    'db_query_duration_seconds', 'SQL statement execution time.', ('operation',)))
+DB_QUERIES_PER_REQUEST = REGISTRY.register(Histogram(
+    'http_request_db_queries', 'SQL statements executed per HTTP request.', ('route',), COUNT_BUCKETS))
+DB_TIME_PER_REQUEST = REGISTRY.register(Histogram(
+    'http_request_db_seconds', 'Time spent in SQL per HTTP request.', ('route',)))
+LLM_LATENCY = REGISTRY.register(Histogram(
+    'llm_call_duration_seconds', 'Completion call latency per model.', ('backend', 'model', 'outcome'),
+    (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)))
+SEARCH_PREFETCH = REGISTRY.register(Counter(
+    'search_prefetch_total', 'Speculative follow-up searches by outcome.', ('outcome',)))
+DB_READ_ROUTING = REGISTRY.register(Counter(
+    'db_read_routing_total', 'Replica-eligible requests by where their reads went.', ('target',)))
+LLM_COMPLETION_CACHE = REGISTRY.register(Counter(
+    'llm_completion_cache_total', 'Completion cache lookups by result.', ('result',)))
+HEALTH_DEEP_CHECKS = REGISTRY.register(Counter(
+    'health_deep_checks_total', 'Deep health checks by result: cached, ok, failed or throttled.', ('result',)))
+LLM_HEDGES = REGISTRY.register(Counter(
+    'llm_hedged_requests_total', 'Hedged completion requests: hedges started and which call won.', ('outcome',)))
+LLM_PARSE_LATENCY = REGISTRY.register(Histogram(
+    'llm_response_parse_seconds', 'Time spent cleaning and parsing model JSON responses.', ('kind',),
+    (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)))
+
+
+def sql_operation(statement):
+    """First keyword of a SQL statement, used as a low-cardinality label."""
+    word = (statement or '').lstrip().split(None, 1)
+    return word[0].upper() if word else 'UNKNOWN'
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,97 @@
+"""Baseline schema: users, question sets with counts, progress and analytics rollups.
+
+Fresh databases get every table created here. Databases from before version
+tracking (created by db.create_all() at startup) already have some of them;
+missing tables and the question count columns are added and filled in.
+"""
+
+import json
+
+from sqlalchemy import (BigInteger, Boolean, Column, DateTime, ForeignKey, Integer, MetaData, String, Table, Text,
+                        UniqueConstraint)
+
+metadata = MetaData()
+
+Table(
+    'user', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('username', String(80), unique=True, nullable=False),
+    Column('email', String(120), unique=True, nullable=False),
+    Column('password_hash', String(128), nullable=False),
+    Column('user_type', String(20), nullable=False),
+    Column('created_at', DateTime),
+    Column('is_active', Boolean),
+)
+
+Table(
+    'question_set', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('mentor_id', Integer, ForeignKey('user.id'), nullable=False),
+    Column('query', String(500), nullable=False),
+    Column('summary', String(200), nullable=False),
+    Column('questions_data', Text, nullable=False),
+    Column('is_published', Boolean),
+    Column('created_at', DateTime),
+    Column('published_at', DateTime, nullable=True),
+    Column('question_count', Integer, nullable=True),
+    Column('easy_count', Integer, nullable=True),
+    Column('medium_count', Integer, nullable=True),
+    Column('hard_count', Integer, nullable=True),
+)
+
+Table(
+    'question_progress', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, ForeignKey('user.id'), nullable=False, index=True),
+    Column('question_set_id', Integer, ForeignKey('question_set.id'), nullable=False, index=True),
+    Column('solved_mask', BigInteger, nullable=False),
+    Column('attempted_mask', BigInteger, nullable=False),
+    Column('updated_at', DateTime),
+    UniqueConstraint('user_id', 'question_set_id', name='uq_progress_user_set'),
+)
+
+Table(
+    'question_rollup', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('company', String(100), nullable=False),
+    Column('category', String(100), nullable=False),
+    Column('difficulty', String(20), nullable=False),
+    Column('platform', String(100), nullable=False),
+    Column('total_count', Integer, nullable=False),
+    Column('published_count', Integer, nullable=False),
+    UniqueConstraint('company', 'category', 'difficulty', 'platform', name='uq_rollup_dims'),
+)
+
+COUNT_COLUMNS = ('question_count', 'easy_count', 'medium_count', 'hard_count')
+
+
+def upgrade(ctx):
+    metadata.create_all(ctx.conn, checkfirst=True)
+    for column in COUNT_COLUMNS:
+        ctx.add_column('question_set', column, 'INTEGER')
+
+
+def _question_stats(row):
+    try:
+        questions = json.loads(row.questions_data)
+    except (TypeError, ValueError):
+        questions = []
+    stats = dict.fromkeys(COUNT_COLUMNS, 0)
+    if isinstance(questions, list):
+        stats['question_count'] = len(questions)
+        for q in questions:
+            level = str(q.get('difficulty_level', '')).strip().lower() if isinstance(q, dict) else ''
+            if level in ('easy', 'medium', 'hard'):
+                stats[f'{level}_count'] += 1
+    return stats
+
+
+def backfill(ctx):
+    ctx.batch_update('question_set', ['questions_data'], _question_stats,
+                     where=lambda t: t.c.question_count.is_(None))
+    # Rollups use the app's normalisation so later incremental updates line up
+    if ctx.app is not None:
+        with ctx.app.app.app_context():
+            db = ctx.app.db
+            if not db.session.query(ctx.app.QuestionRollup.id).first() and db.session.query(ctx.app.QuestionSet.id).first():
+                ctx.app.rebuild_rollups()
@@ -0,0 +1,14 @@
+"""Index the dashboard list queries on question_set.
+
+The mentor dashboard filters on mentor_id and the student dashboard on
+is_published, both ordered by created_at; without these indexes each page
+load scans and sorts the whole table. Built CONCURRENTLY on PostgreSQL so
+writes continue while the index is created.
+"""
+
+TRANSACTIONAL = False
+
+
+def upgrade(ctx):
+    ctx.create_index('ix_question_set_mentor_created', 'question_set', ['mentor_id', 'created_at'])
+    ctx.create_index('ix_question_set_published_created', 'question_set', ['is_published', 'created_at'])
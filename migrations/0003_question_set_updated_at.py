@@ -0,0 +1,16 @@
+"""Add question_set.updated_at for dashboard card caching.
+
+Rendered cards are cached on (id, updated_at), so the column has to change
+whenever anything shown on a card does. Existing rows start at their last
+known change: published_at if set, otherwise created_at.
+"""
+
+
+def upgrade(ctx):
+    ctx.add_column('question_set', 'updated_at', 'TIMESTAMP')
+
+
+def backfill(ctx):
+    ctx.batch_update('question_set', ['created_at', 'published_at'],
+                     lambda row: {'updated_at': row.published_at or row.created_at},
+                     where=lambda t: t.c.updated_at.is_(None))
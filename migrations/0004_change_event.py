@@ -0,0 +1,21 @@
+"""Add the change_event table feeding /feed/stream.
+
+One row per change students can see (a set published, unpublished or
+deleted); the integer primary key is the feed's sequence number.
+"""
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table
+
+metadata = MetaData()
+
+Table(
+    'change_event', metadata,
+    Column('id', Integer, primary_key=True),
+    Column('question_set_id', Integer, nullable=False),
+    Column('kind', String(20), nullable=False),
+    Column('created_at', DateTime),
+)
+
+
+def upgrade(ctx):
+    metadata.create_all(ctx.conn, checkfirst=True)
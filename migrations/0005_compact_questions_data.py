@@ -0,0 +1,30 @@
+"""Rewrite question_set.questions_data in the compact encoding.
+
+See question_codec: the columnar, interned, optionally zlib-compressed form
+is several times smaller than the JSON list it replaces. The app reads both
+formats, so this runs as a batched backfill while the site stays up; rows
+already compact, or not readable as JSON, are left alone.
+"""
+
+import question_codec
+
+
+def upgrade(ctx):
+    pass
+
+
+def _compact(row):
+    try:
+        questions = question_codec.decode(row.questions_data)
+    except (TypeError, ValueError):
+        return None
+    stored = question_codec.encode(questions)
+    return {'questions_data': stored} if question_codec.is_compact(stored) else None
+
+
+def backfill(ctx):
+    if ctx.app is not None and ctx.app.QUESTIONS_ENCODING == 'json':
+        return
+    ctx.batch_update('question_set', ['questions_data'], _compact,
+                     where=lambda t: ~t.c.questions_data.like(f'{question_codec.PREFIX}%')
+                     & ~t.c.questions_data.like(f'{question_codec.ZLIB_PREFIX}%'))
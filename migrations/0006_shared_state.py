@@ -0,0 +1,22 @@
+"""Add the shared_state table used by SHARED_STATE_BACKEND=db.
+
+Key/value rows shared by every worker: the session epoch, the generated
+SECRET_KEY, rate-limit counters and cached searches. ``counter`` holds
+rate-limit counts; ``expires_at`` is a Unix timestamp.
+"""
+
+from sqlalchemy import BigInteger, Column, Float, MetaData, String, Table, Text
+
+metadata = MetaData()
+
+Table(
+    'shared_state', metadata,
+    Column('key', String(255), primary_key=True),
+    Column('value', Text, nullable=True),
+    Column('counter', BigInteger, nullable=True),
+    Column('expires_at', Float, nullable=True),
+)
+
+
+def upgrade(ctx):
+    metadata.create_all(ctx.conn, checkfirst=True)
@@ -0,0 +1,215 @@
+"""
+Ordered schema migrations with version tracking.
+
+Every module in this package named ``NNNN_description.py`` is one migration.
+They are applied in version order and each applied version is recorded in
+the ``schema_version`` table, so startup only has to read that table. A
+migration module defines:
+
+* ``upgrade(ctx)`` - DDL, run in a single transaction. Set
+  ``TRANSACTIONAL = False`` in the module to run it in autocommit mode
+  instead (needed for ``CREATE INDEX CONCURRENTLY`` on PostgreSQL).
+* ``backfill(ctx)`` (optional) - data changes, run after ``upgrade`` in small
+  batches that commit separately (see ``MigrationContext.batch_update``) so
+  the database stays writable. It must be idempotent: if it is interrupted
+  the version is not recorded and the next run resumes.
+
+DDL is written against the tables as they were at that version, not the
+current models, and is guarded with ``has_table``/``has_column`` so it is safe
+on databases created by the old ``create_all()`` startup.
+"""
+
+import importlib
+import os
+import re
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, bindparam, func, inspect, select, text
+
+BATCH_SIZE = 500
+
+_NAME_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+version_table = Table(
+    'schema_version', MetaData(),
+    Column('version', Integer, primary_key=True),
+    Column('applied_at', DateTime, default=datetime.utcnow),
+)
+
+
+class Migration:
+    def __init__(self, version, name, module):
+        self.version = version
+        self.name = name
+        self.module = module
+
+    @property
+    def description(self):
+        doc = (self.module.__doc__ or '').strip()
+        return doc.splitlines()[0] if doc else self.name
+
+    def __repr__(self):
+        return f'<Migration {self.version:04d}_{self.name}>'
+
+
+def discover():
+    """All migrations in this package, ordered by version."""
+    found = []
+    for filename in sorted(os.listdir(os.path.dirname(__file__))):
+        match = _NAME_RE.match(filename)
+        if match:
+            module = importlib.import_module(f'{__name__}.{filename[:-3]}')
+            found.append(Migration(int(match.group(1)), match.group(2), module))
+    versions = [m.version for m in found]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f"Duplicate migration versions: {versions}")
+    return found
+
+
+def latest_version():
+    migrations = discover()
+    return migrations[-1].version if migrations else 0
+
+
+class MigrationContext:
+    """What a migration gets: the engine, the open connection (during upgrade) and helpers."""
+
+    def __init__(self, engine, conn=None, app_module=None, transactional=True, batch_size=BATCH_SIZE, log=print):
+        self.engine = engine
+        self.conn = conn
+        self.app = app_module
+        self.transactional = transactional
+        self.batch_size = batch_size
+        self.log = log
+
+    @property
+    def dialect(self):
+        return self.engine.dialect.name
+
+    def _inspector(self):
+        return inspect(self.conn if self.conn is not None else self.engine)
+
+    def has_table(self, table):
+        return self._inspector().has_table(table)
+
+    def has_column(self, table, column):
+        return any(c['name'] == column for c in self._inspector().get_columns(table))
+
+    def has_index(self, table, name):
+        return any(i['name'] == name for i in self._inspector().get_indexes(table))
+
+    def execute(self, statement, params=None):
+        if isinstance(statement, str):
+            statement = text(statement)
+        return self.conn.execute(statement, params or {})
+
+    def add_column(self, table, column, ddl_type):
+        """ALTER TABLE ... ADD COLUMN unless it exists. Nullable columns without a default
+        are a metadata-only change on SQLite and PostgreSQL (no table rewrite)."""
+        if not self.has_column(table, column):
+            self.execute(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl_type}')
+
+    def create_index(self, name, table, columns, unique=False):
+        """CREATE INDEX unless it exists; CONCURRENTLY on PostgreSQL outside a transaction."""
+        if self.has_index(table, name):
+            return
+        concurrently = ' CONCURRENTLY' if self.dialect == 'postgresql' and not self.transactional else ''
+        self.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX{concurrently} {name} '
+                     f'ON "{table}" ({", ".join(columns)})')
+
+    def batch_update(self, table, columns, compute, where=None, key='id'):
+        """Update `table` in primary-key order, `batch_size` rows per transaction.
+
+        `columns` are selected along with `key`; compute(row) returns a dict
+        of new values for that row or None to leave it. Returns the number
+        of rows updated.
+        """
+        t = Table(table, MetaData(), autoload_with=self.engine)
+        key_column = t.c[key]
+        selected = [key_column] + [t.c[c] for c in columns]
+        updated = 0
+        last_key = None
+        while True:
+            query = select(*selected).order_by(key_column).limit(self.batch_size)
+            if where is not None:
+                query = query.where(where(t))
+            if last_key is not None:
+                query = query.where(key_column > last_key)
+            with self.engine.begin() as conn:
+                rows = conn.execute(query).all()
+                if not rows:
+                    return updated
+                changes = []
+                for row in rows:
+                    values = compute(row)
+                    if values:
+                        changes.append(dict({f'_{k}': v for k, v in values.items()}, _key=row[0]))
+                if changes:
+                    names = [k[1:] for k in changes[0] if k != '_key']
+                    statement = t.update().where(key_column == bindparam('_key')).values(
+                        {n: bindparam(f'_{n}') for n in names})
+                    conn.execute(statement, changes)
+                    updated += len(changes)
+            last_key = rows[-1][0]
+            self.log(f'  ...{updated} rows updated in {table}')
+
+
+def current_version(engine):
+    """Highest applied version, or 0 for databases without a version table."""
+    if not inspect(engine).has_table(version_table.name):
+        return 0
+    with engine.connect() as conn:
+        return conn.execute(select(func.max(version_table.c.version))).scalar() or 0
+
+
+def applied_versions(engine):
+    if not inspect(engine).has_table(version_table.name):
+        return set()
+    with engine.connect() as conn:
+        return {row[0] for row in conn.execute(select(version_table.c.version))}
+
+
+def pending(engine):
+    applied = applied_versions(engine)
+    return [m for m in discover() if m.version not in applied]
+
+
+def status(engine):
+    applied = applied_versions(engine)
+    return [(m, m.version in applied) for m in discover()]
+
+
+def _record(engine, version):
+    with engine.begin() as conn:
+        conn.execute(version_table.insert().values(version=version, applied_at=datetime.utcnow()))
+
+
+def upgrade(engine, app_module=None, target=None, batch_size=BATCH_SIZE, log=print):
+    """Apply pending migrations up to `target` (default: all); returns the applied ones."""
+    version_table.create(engine, checkfirst=True)
+    applied = []
+    for migration in pending(engine):
+        if target is not None and migration.version > target:
+            break
+        log(f'Applying {migration.version:04d}_{migration.name}: {migration.description}')
+        transactional = getattr(migration.module, 'TRANSACTIONAL', True)
+        if transactional:
+            with engine.begin() as conn:
+                migration.module.upgrade(MigrationContext(engine, conn, app_module, True, batch_size, log))
+        else:
+            with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+                migration.module.upgrade(MigrationContext(engine, conn, app_module, False, batch_size, log))
+        backfill = getattr(migration.module, 'backfill', None)
+        if backfill is not None:
+            backfill(MigrationContext(engine, None, app_module, True, batch_size, log))
+        _record(engine, migration.version)
+        applied.append(migration)
+    return applied
+
+
+def stamp(engine, version):
+    """Mark every migration up to `version` as applied without running it."""
+    version_table.create(engine, checkfirst=True)
+    for migration in pending(engine):
+        if migration.version <= version:
+            _record(engine, migration.version)
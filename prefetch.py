@@ -0,0 +1,128 @@
+"""
+Low-priority background work that only uses idle upstream capacity.
+
+``UpstreamGauge`` counts completion calls in flight in this process. A
+``Prefetcher`` holds a small queue of speculative jobs and runs them one at
+a time on a daemon thread, starting a job only while the gauge shows enough
+free slots for it. Jobs that can't start within ``max_wait`` seconds are
+dropped: if the upstream has been busy that long the guess is probably
+stale anyway. Foreground requests never wait for prefetches.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class UpstreamGauge:
+    """Number of upstream calls currently in flight."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.inflight = 0
+
+    @contextmanager
+    def track(self):
+        with self._lock:
+            self.inflight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.inflight -= 1
+
+
+class Prefetcher:
+    """Queue of speculative jobs run on idle capacity.
+
+    `capacity` is the number of concurrent upstream calls this process may
+    make; a job with `cost` calls starts only when inflight + cost fits.
+    `on_outcome(outcome)` is called with 'completed', 'failed', 'expired'
+    or 'dropped' for each job.
+    """
+
+    def __init__(self, gauge, capacity, max_pending=32, max_wait=30.0, poll_interval=0.05, on_outcome=None):
+        self.gauge = gauge
+        self.capacity = capacity
+        self.max_pending = max_pending
+        self.max_wait = max_wait
+        self.poll_interval = poll_interval
+        self.on_outcome = on_outcome or (lambda outcome: None)
+        self._pending = OrderedDict()  # key -> (job, cost, enqueued_at)
+        self._running = None
+        self._cond = threading.Condition()
+        self._thread = None
+        self._pid = None
+
+    def submit(self, key, job, cost=1):
+        """Queue job() under `key`; returns False if it is a duplicate or the queue is full."""
+        with self._cond:
+            if key in self._pending or key == self._running:
+                return False
+            if len(self._pending) >= self.max_pending:
+                # Newer guesses are more relevant; drop the oldest
+                self._pending.popitem(last=False)
+                self.on_outcome('dropped')
+            self._pending[key] = (job, cost, time.monotonic())
+            self._ensure_worker()
+            self._cond.notify_all()
+        return True
+
+    def _ensure_worker(self):
+        # Threads don't survive fork(), so each worker process starts its own
+        if self._thread is None or not self._thread.is_alive() or self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._work, name='prefetcher', daemon=True)
+            self._thread.start()
+
+    def _has_room(self, cost):
+        return self.gauge.inflight + cost <= self.capacity
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                key, (job, cost, enqueued_at) = next(iter(self._pending.items()))
+                if time.monotonic() - enqueued_at > self.max_wait:
+                    del self._pending[key]
+                    self.on_outcome('expired')
+                    self._cond.notify_all()
+                    continue
+                if not self._has_room(cost):
+                    self._cond.wait(self.poll_interval)
+                    continue
+                del self._pending[key]
+                self._running = key
+            try:
+                job()
+                self.on_outcome('completed')
+            except Exception as e:
+                print(f"Warning: prefetch {key!r} failed: {e}")
+                self.on_outcome('failed')
+            finally:
+                with self._cond:
+                    self._running = None
+                    self._cond.notify_all()
+
+    def pending(self):
+        with self._cond:
+            return len(self._pending) + (1 if self._running is not None else 0)
+
+    def drain(self, timeout=10.0):
+        """Wait until no jobs are queued or running; returns True if drained."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._running is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(min(remaining, self.poll_interval))
+        return True
+
+    def clear(self):
+        with self._cond:
+            self._pending.clear()
+            self._cond.notify_all()
@@ -0,0 +1,219 @@
+"""
+Opt-in request profiling.
+
+Two modes, both off by default:
+
+* cProfile for a single request, requested with the ``X-Profile: 1`` header
+  (admins only) or for every request while the admin toggle is on.
+* Stack sampling for slow requests: a background thread samples the stacks of
+  requests that have been running longer than ``threshold`` seconds. Requests
+  that finish under the threshold never get sampled, so this can stay on in
+  production.
+
+Profiles are written to a bounded on-disk ring buffer (oldest files are
+deleted) and listed at /admin/profiles. When neither mode is enabled the
+request hooks return immediately.
+"""
+
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from uuid import uuid4
+
+STATS_LINES = 40
+MAX_STACK_DEPTH = 60
+
+
+class ProfileStore:
+    """Ring buffer of profile records stored as JSON files in `directory`."""
+
+    def __init__(self, directory, capacity=50):
+        self.directory = directory
+        self.capacity = max(int(capacity), 1)
+        self._lock = threading.Lock()
+        self._seq = None
+
+    def _next_seq(self):
+        if self._seq is None:
+            existing = self._files()
+            self._seq = int(existing[-1].split('-', 1)[0]) if existing else 0
+        self._seq += 1
+        return self._seq
+
+    def _files(self):
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith('.json')]
+        except FileNotFoundError:
+            return []
+        return sorted(names)
+
+    def save(self, record):
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            name = f"{self._next_seq():08d}-{record['id']}.json"
+            tmp = os.path.join(self.directory, '.' + name + '.tmp')
+            with open(tmp, 'w') as f:
+                json.dump(record, f)
+            os.replace(tmp, os.path.join(self.directory, name))
+            files = self._files()
+            for old in files[:max(len(files) - self.capacity, 0)]:
+                try:
+                    os.remove(os.path.join(self.directory, old))
+                except OSError:
+                    pass
+        return record['id']
+
+    def list(self):
+        """Metadata of stored profiles, newest first."""
+        entries = []
+        for name in reversed(self._files()):
+            record = self._read(name)
+            if record:
+                record.pop('stats', None)
+                record.pop('stacks', None)
+                entries.append(record)
+        return entries
+
+    def get(self, profile_id):
+        for name in self._files():
+            if name.split('-', 1)[1] == f'{profile_id}.json':
+                return self._read(name)
+        return None
+
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.directory, name)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+class SlowRequestSampler:
+    """Samples stacks of requests running longer than `threshold` seconds."""
+
+    def __init__(self, threshold, interval=0.005):
+        self.threshold = threshold
+        self.interval = interval
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def start(self, thread_id):
+        entry = {'start': time.perf_counter(), 'samples': Counter(), 'count': 0}
+        with self._lock:
+            self._active[thread_id] = entry
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='slow-request-sampler', daemon=True)
+                self._thread.start()
+        return entry
+
+    def stop(self, thread_id):
+        with self._lock:
+            return self._active.pop(thread_id, None)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            with self._lock:
+                due = [(tid, e) for tid, e in self._active.items() if now - e['start'] >= self.threshold]
+            if not due:
+                continue
+            frames = sys._current_frames()
+            for tid, entry in due:
+                frame = frames.get(tid)
+                if frame is not None:
+                    entry['samples'][_collapse(frame)] += 1
+                    entry['count'] += 1
+
+
+def _collapse(frame):
+    """Render a stack as 'file:function:line;...' from outermost to innermost."""
+    parts = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f'{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}')
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
+
+
+class RequestProfiler:
+    """Decides per request whether to profile and stores the result."""
+
+    def __init__(self, store, threshold=None, sample_interval=0.005):
+        self.store = store
+        self.profile_all = False
+        self.sampler = None
+        self.sample_interval = sample_interval
+        self.set_threshold(threshold)
+
+    @property
+    def threshold(self):
+        return self.sampler.threshold if self.sampler else None
+
+    def set_threshold(self, threshold):
+        if threshold is None or threshold <= 0:
+            self.sampler = None
+        elif self.sampler is None:
+            self.sampler = SlowRequestSampler(threshold, self.sample_interval)
+        else:
+            self.sampler.threshold = threshold
+
+    @property
+    def enabled(self):
+        return self.profile_all or self.sampler is not None
+
+    def begin(self, force=False):
+        """Start profiling the current request; returns a state object or None."""
+        if force or self.profile_all:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another profiler is already active on this interpreter
+                return None
+            return {'mode': 'cprofile', 'profile': profile, 'start': time.perf_counter()}
+        if self.sampler is not None:
+            tid = threading.get_ident()
+            self.sampler.start(tid)
+            return {'mode': 'sampling', 'thread_id': tid, 'start': time.perf_counter()}
+        return None
+
+    def end(self, state, meta):
+        """Finish profiling; stores and returns the profile id, or None if nothing was kept."""
+        if state is None:
+            return None
+        elapsed = time.perf_counter() - state['start']
+        record = dict(meta, id=uuid4().hex[:12], mode=state['mode'],
+                      duration_ms=round(elapsed * 1000, 3), created_at=time.time())
+        if state['mode'] == 'cprofile':
+            profile = state['profile']
+            profile.disable()
+            out = io.StringIO()
+            stats = pstats.Stats(profile, stream=out)
+            stats.sort_stats('cumulative').print_stats(STATS_LINES)
+            record['stats'] = out.getvalue()
+        else:
+            entry = self.sampler.stop(state['thread_id']) if self.sampler else None
+            if not entry or not entry['count']:
+                return None
+            record['samples'] = entry['count']
+            record['sample_interval_ms'] = round(self.sampler.interval * 1000, 3)
+            record['stacks'] = [
+                {'stack': stack, 'count': count} for stack, count in entry['samples'].most_common(200)
+            ]
+        return self.store.save(record)
+
+    def status(self):
+        return {
+            'profile_all': self.profile_all,
+            'threshold_ms': round(self.threshold * 1000, 3) if self.threshold else None,
+            'capacity': self.store.capacity,
+            'directory': self.store.directory,
+        }
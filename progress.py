@@ -0,0 +1,268 @@
+"""
+Write-buffered student progress tracking.
+
+Each (user, question set) pair is stored as two bitsets: bit i of
+``solved_mask`` is set when question i of the set is solved, and bit i of
+``attempted_mask`` when it has been attempted. Clicks are merged into an
+in-memory buffer of set/clear masks and flushed to the database in batches on
+an interval, so a burst of clicks costs one upsert per pair. Reads come from a
+per-user cache of masks with the pending buffer overlaid, so users see their
+own updates before the next flush.
+
+With several worker processes each has its own cache, so a flush in one
+must invalidate the others: ``SharedVersions`` keeps a change token per user
+in shared state, replaced after every flush that touches the user, and a
+cached entry is only used while its token is still current.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from uuid import uuid4
+
+STATUSES = ('todo', 'attempted', 'solved')
+# Masks are stored in a signed 64-bit column
+MAX_QUESTIONS = 62
+
+
+def bit_count(mask):
+    return bin(mask or 0).count('1')
+
+
+class _PendingOps:
+    """Set/clear masks for one (user, set) pair; later updates win."""
+
+    __slots__ = ('set_solved', 'clear_solved', 'set_attempted', 'clear_attempted')
+
+    def __init__(self):
+        self.set_solved = self.clear_solved = self.set_attempted = self.clear_attempted = 0
+
+    def update(self, index, status):
+        bit = 1 << index
+        if status == 'solved':
+            self.set_solved |= bit
+            self.clear_solved &= ~bit
+            self.set_attempted |= bit
+            self.clear_attempted &= ~bit
+        elif status == 'attempted':
+            self.set_attempted |= bit
+            self.clear_attempted &= ~bit
+            self.clear_solved |= bit
+            self.set_solved &= ~bit
+        else:
+            self.clear_solved |= bit
+            self.set_solved &= ~bit
+            self.clear_attempted |= bit
+            self.set_attempted &= ~bit
+
+    def followed_by(self, newer):
+        """Combine with a later set of updates into one."""
+        merged = _PendingOps()
+        merged.set_solved = (self.set_solved & ~newer.clear_solved) | newer.set_solved
+        merged.clear_solved = (self.clear_solved & ~newer.set_solved) | newer.clear_solved
+        merged.set_attempted = (self.set_attempted & ~newer.clear_attempted) | newer.set_attempted
+        merged.clear_attempted = (self.clear_attempted & ~newer.set_attempted) | newer.clear_attempted
+        return merged
+
+    def apply(self, solved, attempted):
+        return ((solved & ~self.clear_solved) | self.set_solved,
+                (attempted & ~self.clear_attempted) | self.set_attempted)
+
+
+class SharedVersions:
+    """Per-user change tokens in a shared state store.
+
+    `context` returns a context manager entered around every store call
+    (e.g. an app context for the database backend).
+    """
+
+    def __init__(self, store, ttl=86400.0, prefix='progress:v:', context=None):
+        self.store = store
+        self.ttl = ttl
+        self.prefix = prefix
+        self.context = context or nullcontext
+
+    def get(self, user_id):
+        """Current token for the user; a fresh one (never matching a cache entry) if unreadable."""
+        try:
+            with self.context():
+                return self.store.get(f'{self.prefix}{user_id}')
+        except Exception as e:
+            print(f"Warning: could not read the progress version. {e}")
+            return uuid4().hex
+
+    def bump(self, user_ids):
+        """Give each user a new token, invalidating every process's cached copy."""
+        with self.context():
+            self.store.set_many([(f'{self.prefix}{user_id}', uuid4().hex) for user_id in user_ids], ttl=self.ttl)
+
+
+class ProgressTracker:
+    """Buffers progress updates and serves cached per-user aggregates.
+
+    `load_user(user_id)` must return {set_id: (solved_mask, attempted_mask)}
+    from the database. `apply_batch(updates)` receives
+    {(user_id, set_id): _PendingOps} and must persist them, returning
+    {(user_id, set_id): (solved_mask, attempted_mask)} as written.
+
+    `versions` (a SharedVersions) makes the cache safe across processes:
+    entries are dropped when the user's token changes, flushes replace the
+    tokens of the users they wrote, and entries older than `versions.ttl`
+    are reloaded so an expired token can't hide a change.
+    """
+
+    def __init__(self, load_user, apply_batch, flush_interval=2.0, max_pending=5000, cache_size=10000,
+                 versions=None):
+        self._load_user = load_user
+        self._apply_batch = apply_batch
+        self.versions = versions
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.cache_size = cache_size
+        self._pending = {}
+        self._cache = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def record(self, user_id, set_id, index, status):
+        """Buffer a status change for question `index` of a set."""
+        if status not in STATUSES:
+            raise ValueError(f"status must be one of {STATUSES}")
+        if not 0 <= index < MAX_QUESTIONS:
+            raise ValueError(f"index must be between 0 and {MAX_QUESTIONS - 1}")
+        with self._lock:
+            ops = self._pending.get((user_id, set_id))
+            if ops is None:
+                ops = self._pending[(user_id, set_id)] = _PendingOps()
+            ops.update(index, status)
+            pending = len(self._pending)
+        self._ensure_flusher()
+        if pending >= self.max_pending:
+            self.flush()
+
+    def user_progress(self, user_id):
+        """{set_id: (solved_mask, attempted_mask)} for a user, including unflushed updates."""
+        # Read the token before loading, so a flush committed after the load
+        # changes it and the next read reloads
+        token = self.versions.get(user_id) if self.versions is not None else None
+        with self._lock:
+            cached = None
+            entry = self._cache.get(user_id)
+            if entry is not None and self._is_current(entry, token):
+                self._cache.move_to_end(user_id)
+                cached = dict(entry[0])
+            generation = self._generation
+        if cached is None:
+            cached = self._load_user(user_id)
+            with self._lock:
+                # A flush that finished during the load may have made it stale
+                if generation == self._generation:
+                    self._cache[user_id] = (dict(cached), token, time.monotonic())
+                    self._cache.move_to_end(user_id)
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        result = cached
+        with self._lock:
+            for (uid, set_id), ops in self._pending.items():
+                if uid == user_id:
+                    result[set_id] = ops.apply(*result.get(set_id, (0, 0)))
+        return result
+
+    def _is_current(self, entry, token):
+        if self.versions is None:
+            return True
+        return entry[1] == token and time.monotonic() - entry[2] < self.versions.ttl
+
+    def set_statuses(self, user_id, set_id, question_count):
+        """List of per-question statuses for one set."""
+        solved, attempted = self.user_progress(user_id).get(set_id, (0, 0))
+        statuses = []
+        for i in range(min(question_count, MAX_QUESTIONS)):
+            bit = 1 << i
+            statuses.append('solved' if solved & bit else 'attempted' if attempted & bit else 'todo')
+        return statuses
+
+    def solved_counts(self, user_id):
+        """{set_id: number of solved questions} for dashboard cards."""
+        return {set_id: bit_count(solved) for set_id, (solved, _) in self.user_progress(user_id).items()}
+
+    def flush(self):
+        """Write buffered updates in one batch; returns the number of pairs written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                written = self._apply_batch(batch)
+            except Exception:
+                # Put the updates back (under any newer ones) for the next flush
+                with self._lock:
+                    for key, ops in batch.items():
+                        newer = self._pending.get(key)
+                        self._pending[key] = ops.followed_by(newer) if newer is not None else ops
+                raise
+            users = {user_id for user_id, _ in written}
+            if self.versions is not None:
+                try:
+                    self.versions.bump(users)
+                except Exception as e:
+                    print(f"Warning: could not publish progress versions, other workers may serve cached progress. {e}")
+            with self._lock:
+                self._generation += 1
+                for user_id in users:
+                    entry = self._cache.get(user_id)
+                    if entry is None:
+                        continue
+                    if self.versions is not None:
+                        # Another process may have written this user too; reload
+                        del self._cache[user_id]
+                    else:
+                        for (uid, set_id), masks in written.items():
+                            if uid == user_id:
+                                entry[0][set_id] = masks
+            return len(written)
+
+    def forget_sets(self, set_ids):
+        """Drop cached and pending progress for deleted sets."""
+        set_ids = set(set_ids)
+        with self._lock:
+            for key in [k for k in self._pending if k[1] in set_ids]:
+                del self._pending[key]
+            for masks, _, _ in self._cache.values():
+                for set_id in set_ids:
+                    masks.pop(set_id, None)
+
+    def clear(self):
+        """Discard all pending updates and cached aggregates."""
+        with self._lock:
+            self._pending.clear()
+            self._cache.clear()
+            self._generation += 1
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _ensure_flusher(self):
+        if self._thread is not None or not self.flush_interval:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='progress-flusher', daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Warning: progress flush failed: {e}")
+
+    def stop(self):
+        self._stop.set()
+        self.flush()
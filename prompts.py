@@ -0,0 +1,233 @@
+"""
+Prompt templates and token-budget accounting for the search pipeline.
+
+Templates are dedented and parsed once at import time so building a prompt
+per request is a single join over precompiled literal/field pieces instead of
+re-evaluating a large f-string. Usage counters are kept per endpoint so the
+cost of each route can be queried at runtime.
+"""
+
+import string
+import textwrap
+import threading
+
+# Rough heuristic used by Google/OpenAI docs: one token is ~4 characters of
+# English text. Good enough for budgeting and cost tracking.
+CHARS_PER_TOKEN = 4
+
+# Output budget for the question generation prompt. One question object is
+# roughly 60-90 tokens of JSON; keep headroom so responses aren't truncated.
+BASE_OUTPUT_TOKENS = 160
+TOKENS_PER_QUESTION = 120
+MIN_OUTPUT_TOKENS = 64
+MAX_OUTPUT_TOKENS = 8192
+DEFAULT_OUTPUT_TOKENS = 800
+
+
+def estimate_tokens(text):
+    """Estimate the token count of a piece of text."""
+    if not text:
+        return 0
+    return max(1, (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN)
+
+
+def output_budget(question_count):
+    """Return max_output_tokens sized for a response with `question_count` questions."""
+    try:
+        question_count = int(question_count)
+    except (TypeError, ValueError):
+        return DEFAULT_OUTPUT_TOKENS
+    budget = BASE_OUTPUT_TOKENS + TOKENS_PER_QUESTION * max(question_count, 1)
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, budget))
+
+
+class PromptTemplate:
+    """A str.format-style template whose static parts are parsed once."""
+
+    def __init__(self, name, source, max_output_tokens=DEFAULT_OUTPUT_TOKENS):
+        self.name = name
+        self.source = textwrap.dedent(source).strip() + "\n"
+        self.max_output_tokens = max_output_tokens
+        self._pieces = []
+        for literal, field, spec, conversion in string.Formatter().parse(self.source):
+            if spec or conversion:
+                raise ValueError(f"Template '{name}' uses unsupported format spec in field '{field}'")
+            self._pieces.append((literal, field))
+        self.fields = sorted({f for _, f in self._pieces if f})
+        self.static_tokens = estimate_tokens(''.join(literal for literal, _ in self._pieces))
+
+    def render(self, **values):
+        """Fill the template fields and return the prompt text."""
+        missing = [f for f in self.fields if f not in values]
+        if missing:
+            raise KeyError(f"Template '{self.name}' missing values for: {missing}")
+        parts = []
+        for literal, field in self._pieces:
+            parts.append(literal)
+            if field:
+                parts.append(str(values[field]))
+        return ''.join(parts)
+
+
+class PromptRegistry:
+    """Name -> PromptTemplate lookup."""
+
+    def __init__(self):
+        self._templates = {}
+
+    def register(self, name, source, max_output_tokens=DEFAULT_OUTPUT_TOKENS):
+        template = PromptTemplate(name, source, max_output_tokens)
+        self._templates[name] = template
+        return template
+
+    def get(self, name):
+        return self._templates[name]
+
+    def render(self, name, **values):
+        return self._templates[name].render(**values)
+
+    def names(self):
+        return sorted(self._templates)
+
+
+class UsageStats:
+    """Thread-safe per-endpoint counters for LLM calls, tokens and latency."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_endpoint = {}
+
+    def record(self, endpoint, input_tokens, output_tokens, latency, error=False):
+        endpoint = endpoint or 'unknown'
+        with self._lock:
+            entry = self._by_endpoint.get(endpoint)
+            if entry is None:
+                entry = self._by_endpoint[endpoint] = {
+                    'calls': 0,
+                    'errors': 0,
+                    'input_tokens': 0,
+                    'output_tokens': 0,
+                    'latency_total': 0.0,
+                    'latency_max': 0.0,
+                }
+            entry['calls'] += 1
+            if error:
+                entry['errors'] += 1
+            entry['input_tokens'] += input_tokens
+            entry['output_tokens'] += output_tokens
+            entry['latency_total'] += latency
+            entry['latency_max'] = max(entry['latency_max'], latency)
+
+    def snapshot(self):
+        """Return a copy of the counters with derived per-call averages."""
+        with self._lock:
+            result = {}
+            for endpoint, entry in self._by_endpoint.items():
+                data = dict(entry)
+                calls = data['calls'] or 1
+                data['avg_latency'] = round(data['latency_total'] / calls, 4)
+                data['avg_input_tokens'] = round(data['input_tokens'] / calls, 1)
+                data['avg_output_tokens'] = round(data['output_tokens'] / calls, 1)
+                data['latency_total'] = round(data['latency_total'], 4)
+                data['latency_max'] = round(data['latency_max'], 4)
+                result[endpoint] = data
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._by_endpoint.clear()
+
+
+registry = PromptRegistry()
+usage = UsageStats()
+
+EXTRACT_PROMPT = registry.register('extract', """
+    Analyze the following query and extract:
+    1. The company name mentioned (if any)
+    2. A brief summary of the coding problem/topic
+
+    Query: {query}
+
+    Respond in JSON format with two keys: "company" and "summary"
+    If no company is mentioned, set "company" to "General"
+    Example: {{"company": "Capgemini", "summary": "Palindrome check using dynamic programming"}}
+    """, max_output_tokens=200)
+
+GENERATE_PROMPT = registry.register('generate', """
+    Generate a list of exactly {count} coding problems related to: {summary}
+    {constraints}
+    IMPORTANT: The user mentioned the company "{company}" in their query. Use this company name for the "company" field in ALL {count} questions.
+
+    For each problem, provide a JSON object with the following keys:
+    - "url": A COMPLETE, VALID absolute URL starting with https:// to the actual problem page. Examples:
+      * LeetCode: "https://leetcode.com/problems/palindrome-partitioning/"
+      * GeeksforGeeks: "https://www.geeksforgeeks.org/palindrome-partitioning-dp-17/"
+      * HackerRank: "https://www.hackerrank.com/challenges/palindrome-index/problem"
+      * InterviewBit: "https://www.interviewbit.com/problems/palindrome-partitioning/"
+      * CodeChef: "https://www.codechef.com/problems/PALIN"
+      CRITICAL: The URL must be a complete, working URL that starts with https://
+    - "platform": The coding platform name (e.g., "LeetCode", "GeeksforGeeks", "HackerRank", "InterviewBit", "CodeChef")
+    - "topic": The topic name of the problem (e.g., "Palindrome Check", "Palindrome Partitioning")
+    - "difficulty_level": The difficulty (e.g., "Easy", "Medium", "Hard")
+    - "company": MUST be "{company}" (use this exact company name from the user's query)
+    - "category": The category/type of problem (e.g., "String", "Dynamic Programming", "Array")
+
+    Return ONLY a valid JSON array with {count} objects. Do not include any markdown formatting, code blocks, or extra text.
+    CRITICAL:
+    1. All URLs must be complete absolute URLs starting with https://
+    2. ALL {count} questions must have "company": "{company}"
+
+    Example format:
+    [
+      {{"url": "https://leetcode.com/problems/palindrome-partitioning/", "platform": "LeetCode", "topic": "Palindrome Partitioning", "difficulty_level": "Medium", "company": "{company}", "category": "Dynamic Programming"}},
+      {{"url": "https://www.geeksforgeeks.org/palindrome-partitioning-dp-17/", "platform": "GeeksforGeeks", "topic": "Palindrome Partitioning", "difficulty_level": "Medium", "company": "{company}", "category": "Dynamic Programming"}},
+      ... ({remaining} more questions, ALL with company: "{company}")
+    ]
+    """)
+
+
+def _constraint_lines(difficulties=None, platforms=None, part=None, parts=None):
+    """Build the optional constraint block for the generation prompt."""
+    lines = []
+    if difficulties:
+        counts = {}
+        for level in difficulties:
+            counts[level] = counts.get(level, 0) + 1
+        mix = ', '.join(f'{n} {level}' for level, n in counts.items())
+        lines.append(f'Difficulty mix: exactly {mix} (use these values for "difficulty_level").')
+    if platforms:
+        lines.append(f'Only use problems from these platforms: {", ".join(platforms)}.')
+    if part and parts and parts > 1:
+        lines.append(
+            f'This is part {part} of {parts} of a larger list; pick problems that other parts are '
+            f'unlikely to choose (favour the {_ordinal(part)} most relevant group of problems).'
+        )
+    if not lines:
+        return ''
+    return '\n' + '\n'.join(lines) + '\n'
+
+
+def _ordinal(n):
+    if 10 <= n % 100 <= 20:
+        suffix = 'th'
+    else:
+        suffix = {1: 'st', 2: 'nd', 3: 'rd'}.get(n % 10, 'th')
+    return f'{n}{suffix}'
+
+
+def render_generate_prompt(summary, company, count=5, difficulties=None, platforms=None,
+                           part=None, parts=None):
+    """Render the question generation prompt for `count` questions.
+
+    `difficulties` is a list with one difficulty label per requested question,
+    `platforms` restricts the allowed platforms, and `part`/`parts` mark a
+    sub-prompt of a larger request so parallel parts choose different problems.
+    """
+    count = max(int(count), 1)
+    return GENERATE_PROMPT.render(
+        summary=summary,
+        company=company,
+        count=count,
+        remaining=max(count - 2, 0),
+        constraints=_constraint_lines(difficulties, platforms, part, parts),
+    )
@@ -0,0 +1,132 @@
+"""
+Compact storage encoding for question_set.questions_data.
+
+The old format is the JSON list of question dicts, repeating every key
+name for every question. The compact format stores the list column by
+column::
+
+    [version, length, keys, columns, absent]
+
+``keys`` are the field names in order of first appearance and ``columns``
+hold one entry per key: ``[values]`` for free text such as URLs and
+topics, or ``[extra_values, codes]`` for interned fields (platform,
+difficulty, company, category), where each code indexes the built-in
+table for that field followed by ``extra_values``. ``absent`` maps a
+column index to the rows missing that key, so decoding restores exactly
+the dicts that were stored.
+
+Stored text is ``q1:`` + compact JSON, or ``q1z:`` + base64 of the zlib-
+compressed JSON when that is shorter. The column stays TEXT (base64 keeps
+it valid on PostgreSQL, which rejects NUL bytes; base85 would be 7%
+smaller but decodes in pure Python, several times slower than the rest of
+decoding), and anything without a prefix is decoded as the old JSON, so
+rows can be converted at any pace.
+"""
+
+import base64
+import binascii
+import json
+import zlib
+
+VERSION = 1
+PREFIX = f'q{VERSION}:'
+ZLIB_PREFIX = f'q{VERSION}z:'
+
+# Built-in code tables. Append only: codes already stored refer to positions.
+INTERNED = {
+    'platform': ['LeetCode', 'GeeksforGeeks', 'HackerRank', 'InterviewBit', 'CodeChef', 'Codeforces'],
+    'difficulty_level': ['Easy', 'Medium', 'Hard'],
+    'company': ['General', 'Google', 'Amazon', 'Microsoft', 'Meta', 'Facebook', 'Apple', 'Netflix'],
+    'category': ['Array', 'String', 'Linked List', 'Tree', 'Graph', 'Dynamic Programming', 'Hash Table',
+                 'Two Pointers', 'Sliding Window', 'Binary Search', 'Stack', 'Heap', 'Greedy',
+                 'Backtracking', 'Math', 'Sorting'],
+}
+
+_SEPARATORS = (',', ':')
+
+
+def _pack(questions):
+    """Columnar form of a list of dicts, or None if `questions` isn't one."""
+    if not isinstance(questions, list) or not all(isinstance(q, dict) for q in questions):
+        return None
+    keys = []
+    for q in questions:
+        for key in q:
+            if key not in keys:
+                keys.append(key)
+    columns, absent = [], {}
+    for index, key in enumerate(keys):
+        missing = [row for row, q in enumerate(questions) if key not in q]
+        if missing:
+            absent[str(index)] = missing
+        values = [q.get(key) for q in questions]
+        if key in INTERNED and all(isinstance(v, str) for row, v in enumerate(values) if key in questions[row]):
+            table = {value: code for code, value in enumerate(INTERNED[key])}
+            extra, codes = [], []
+            for row, value in enumerate(values):
+                if key not in questions[row]:
+                    codes.append(0)
+                    continue
+                if value not in table:
+                    table[value] = len(table)
+                    extra.append(value)
+                codes.append(table[value])
+            columns.append([extra, codes])
+        else:
+            columns.append([values])
+    return [VERSION, len(questions), keys, columns, absent]
+
+
+def _unpack(packed):
+    version, length, keys, columns, absent = packed
+    if version != VERSION:
+        raise ValueError(f'unknown questions_data version {version}')
+    value_columns = []
+    for key, column in zip(keys, columns):
+        if len(column) == 2:
+            table = INTERNED[key] + column[0]
+            value_columns.append([table[code] for code in column[1]])
+        else:
+            value_columns.append(column[0])
+    if not keys:
+        return [{} for _ in range(length)]
+    questions = [dict(zip(keys, row)) for row in zip(*value_columns)]
+    for index, rows in absent.items():
+        key = keys[int(index)]
+        for row in rows:
+            del questions[row][key]
+    return questions
+
+
+def encode(questions, compress=True):
+    """Storage text for a questions list; falls back to plain JSON for other shapes."""
+    packed = _pack(questions)
+    if packed is None:
+        return json.dumps(questions)
+    text = json.dumps(packed, separators=_SEPARATORS, ensure_ascii=False)
+    if compress:
+        compressed = ZLIB_PREFIX + base64.b64encode(zlib.compress(text.encode('utf-8'), 9)).decode('ascii')
+        if len(compressed) < len(PREFIX) + len(text):
+            return compressed
+    return PREFIX + text
+
+
+def decode(stored):
+    """The questions list from either storage format. Raises ValueError if it's unreadable."""
+    if stored.startswith(ZLIB_PREFIX):
+        try:
+            text = zlib.decompress(base64.b64decode(stored[len(ZLIB_PREFIX):])).decode('utf-8')
+        except (zlib.error, binascii.Error) as e:
+            raise ValueError(f'corrupt questions_data: {e}')
+    elif stored.startswith(PREFIX):
+        text = stored[len(PREFIX):]
+    else:
+        return json.loads(stored)
+    try:
+        return _unpack(json.loads(text))
+    except (TypeError, IndexError, KeyError) as e:
+        raise ValueError(f'corrupt questions_data: {e!r}')
+
+
+def is_compact(stored):
+    return stored.startswith((PREFIX, ZLIB_PREFIX))
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Production launcher for the app on waitress.
+
+    python serve.py --threads 8 --connection-limit 200 --workers 4
+
+Every option can also be set through an environment variable (shown in
+--help), so the same command works on Render and in containers. With
+``--workers N`` (POSIX only) the parent binds the listening socket once and
+forks N worker processes that all accept on it; sessions, rate limits and the
+search cache are in shared state, so workers are interchangeable. Crashed
+workers are restarted.
+
+On startup migrations only run when the schema_version table says the
+database is behind; an up-to-date database costs one query.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import sys
+import time
+
+# Minimum seconds between restarts of a crashing worker
+RESTART_DELAY = 1.0
+
+
+def _env_int(name, default):
+    value = os.getenv(name)
+    return int(value) if value not in (None, '') else default
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='Run the app on waitress.')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'), help='bind address (HOST)')
+    parser.add_argument('--port', type=int, default=_env_int('PORT', 8080), help='bind port (PORT)')
+    parser.add_argument('--threads', type=int, default=_env_int('WAITRESS_THREADS', 8),
+                        help='request threads per process (WAITRESS_THREADS)')
+    parser.add_argument('--connection-limit', type=int, default=_env_int('WAITRESS_CONNECTION_LIMIT', 100),
+                        help='open connections per process before new ones wait (WAITRESS_CONNECTION_LIMIT)')
+    parser.add_argument('--channel-timeout', type=int, default=_env_int('WAITRESS_CHANNEL_TIMEOUT', 120),
+                        help='seconds before an idle connection is closed (WAITRESS_CHANNEL_TIMEOUT)')
+    parser.add_argument('--backlog', type=int, default=_env_int('WAITRESS_BACKLOG', 1024),
+                        help='listen() backlog of pending connections (WAITRESS_BACKLOG)')
+    parser.add_argument('--workers', type=int, default=_env_int('WEB_CONCURRENCY', 1),
+                        help='worker processes sharing the socket, POSIX only (WEB_CONCURRENCY)')
+    parser.add_argument('--skip-schema', action='store_true',
+                        help='do not check or upgrade the database schema on startup')
+    return parser
+
+
+def waitress_options(args):
+    return {
+        'threads': max(args.threads, 1),
+        'connection_limit': max(args.connection_limit, 1),
+        'channel_timeout': max(args.channel_timeout, 1),
+        'backlog': max(args.backlog, 1),
+    }
+
+
+def prepare_schema(app_module):
+    """Apply pending migrations unless the schema_version table says the database is current."""
+    with app_module.app.app_context():
+        if app_module.schema_is_current():
+            print(f"Database schema is current (version {app_module.SCHEMA_VERSION}).")
+            return False
+        app_module.run_migrations()
+        print(f"Database schema upgraded to version {app_module.SCHEMA_VERSION}.")
+        return True
+
+
+def bind_socket(host, port, backlog):
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    return sock
+
+
+def _run_worker(app_module, sock, options):
+    from waitress import serve
+
+    # Connections pooled before the fork belong to the parent
+    with app_module.app.app_context():
+        app_module.db.engine.dispose(close=False)
+    # Exit normally on SIGTERM so atexit hooks (progress flush) run
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    signal.signal(signal.SIGINT, lambda signum, frame: sys.exit(0))
+    serve(app_module.app, sockets=[sock], **options)
+    sys.exit(0)
+
+
+def run_workers(app_module, sock, options, workers):
+    """Fork `workers` processes serving `sock` and keep them running until signalled."""
+    with app_module.app.app_context():
+        app_module.db.engine.dispose()
+    children = {}
+    stopping = False
+
+    def spawn(slot):
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(app_module, sock, options)
+        children[pid] = slot
+        print(f"Started worker {slot} (pid {pid})")
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for slot in range(workers):
+        spawn(slot)
+    last_restart = 0.0
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        slot = children.pop(pid, None)
+        if slot is None or stopping:
+            continue
+        print(f"Worker {slot} (pid {pid}) exited with status {status}; restarting")
+        wait = RESTART_DELAY - (time.monotonic() - last_restart)
+        if wait > 0:
+            time.sleep(wait)
+        last_restart = time.monotonic()
+        spawn(slot)
+
+
+def main(argv=None, app_module=None):
+    args = build_parser().parse_args(argv)
+    if app_module is None:
+        import app as app_module
+    if not args.skip_schema:
+        prepare_schema(app_module)
+    # Before forking, so every worker starts with the shared key
+    app_module.load_shared_secret_key()
+
+    options = waitress_options(args)
+    workers = max(args.workers, 1)
+    if workers > 1 and not hasattr(os, 'fork'):
+        print("Warning: --workers needs os.fork (POSIX); running a single process.")
+        workers = 1
+    print(f"Serving on {args.host}:{args.port} with {workers} process(es) x {options['threads']} threads "
+          f"(connection_limit={options['connection_limit']}, channel_timeout={options['channel_timeout']}, "
+          f"backlog={options['backlog']})")
+    if workers == 1:
+        from waitress import serve
+        serve(app_module.app, host=args.host, port=args.port, **options)
+        return
+    sock = bind_socket(args.host, args.port, options['backlog'])
+    run_workers(app_module, sock, options, workers)
+
+
+if __name__ == '__main__':
+    main()
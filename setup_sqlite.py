@@ -3,7 +3,7 @@
 SQLite Database Setup Script for Coding Questions Finder
 """
 
-from app import app, db
+from app import app, db, run_migrations
 
 def setup_database():
     """Create SQLite database and tables"""
@@ -12,8 +12,8 @@ def setup_database():
     
     try:
         with app.app_context():
-            # Create all tables
-            db.create_all()
+            # Create all tables and bring older databases up to date
+            run_migrations()
             print("✅ Database tables created successfully!")
             
             # Check if tables exist
@@ -0,0 +1,398 @@
+"""
+Key/value state shared by every worker process.
+
+Used for the session epoch, the generated SECRET_KEY, rate-limit counters and
+the search cache, so several waitress/gunicorn processes (or a restarted one)
+behave like a single server. Values are JSON-serialisable and may expire.
+
+Backends:
+
+* ``db`` (default) - a ``shared_state`` table in the app database (created
+  by migration 0006), written with native upserts on SQLite/PostgreSQL.
+* ``file`` - one file per key in a directory. Writes go to a temporary file
+  and are renamed into place, and counters are append-only files whose size is
+  the count, so no locks are needed between processes on one host.
+* ``memory`` - a dict; per-process only, for single-process runs and tests.
+
+Select one with SHARED_STATE_BACKEND; SHARED_STATE_DIR sets the directory of
+the file backend.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.parse
+from uuid import uuid4
+
+from sqlalchemy import BigInteger, Column, Float, MetaData, String, Table, Text
+from sqlalchemy.exc import IntegrityError
+
+# Expired rows/files are purged opportunistically every N writes per process
+PURGE_EVERY = 500
+
+
+def _window(window, now):
+    """Index and end time of the fixed counter window containing `now`."""
+    index = int(now // window)
+    return index, (index + 1) * window
+
+
+class StateBackend:
+    """Interface for shared state backends."""
+
+    name = 'base'
+
+    def get(self, key):
+        """Value stored under key, or None if missing or expired."""
+        raise NotImplementedError
+
+    def set(self, key, value, ttl=None):
+        """Store value, replacing any existing one; expires after ttl seconds if given."""
+        raise NotImplementedError
+
+    def set_many(self, items, ttl=None):
+        """set() each (key, value) pair in `items`, in one write where the backend allows."""
+        for key, value in items:
+            self.set(key, value, ttl=ttl)
+
+    def add(self, key, value, ttl=None):
+        """Store value unless a live one exists; returns the value that is stored."""
+        raise NotImplementedError
+
+    def incr(self, key, amount=1, window=60):
+        """Add amount to a counter that resets every `window` seconds; returns the new count."""
+        raise NotImplementedError
+
+    def delete(self, key):
+        raise NotImplementedError
+
+    def clear(self, prefix=''):
+        """Delete every key starting with prefix."""
+        raise NotImplementedError
+
+
+class MemoryBackend(StateBackend):
+    name = 'memory'
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        entry = self._data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._data[key]
+            return None
+        return entry
+
+    def get(self, key):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return entry[0] if entry else None
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def set_many(self, items, ttl=None):
+        with self._lock:
+            expires_at = time.time() + ttl if ttl else None
+            for key, value in items:
+                self._data[key] = (value, expires_at)
+
+    def add(self, key, value, ttl=None):
+        with self._lock:
+            now = time.time()
+            entry = self._live(key, now)
+            if entry is None:
+                entry = self._data[key] = (value, now + ttl if ttl else None)
+            return entry[0]
+
+    def incr(self, key, amount=1, window=60):
+        with self._lock:
+            now = time.time()
+            index, end = _window(window, now)
+            counter_key = f'{key}@{index}'
+            entry = self._live(counter_key, now)
+            count = (entry[0] if entry else 0) + amount
+            self._data[counter_key] = (count, end)
+            return count
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self, prefix=''):
+        with self._lock:
+            for key in [k for k in self._data if k.startswith(prefix)]:
+                del self._data[key]
+
+
+class DatabaseBackend(StateBackend):
+    """State in a `shared_state` table; `get_engine()` returns the SQLAlchemy engine.
+
+    The table is created by migration 0006 (or `create_table` in tests).
+    """
+
+    name = 'db'
+
+    def __init__(self, get_engine, table_name='shared_state'):
+        self._get_engine = get_engine
+        self.table = Table(
+            table_name, MetaData(),
+            Column('key', String(255), primary_key=True),
+            Column('value', Text, nullable=True),
+            Column('counter', BigInteger, nullable=True),
+            Column('expires_at', Float, nullable=True),
+        )
+        self._writes = 0
+
+    def _engine(self):
+        return self._get_engine()
+
+    def create_table(self):
+        self.table.create(self._engine(), checkfirst=True)
+
+    def _insert(self, dialect):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        elif dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            return None
+        return insert(self.table)
+
+    def _upsert(self, conn, values, update, where=None):
+        """INSERT values, or apply `update` to the existing row (optionally only if `where`)."""
+        stmt = self._insert(conn.dialect.name)
+        if stmt is not None:
+            conn.execute(stmt.values(**values).on_conflict_do_update(
+                index_elements=['key'], set_=update, where=where))
+            return
+        # Generic fallback: try the insert, update on a key conflict
+        try:
+            with conn.begin_nested():
+                conn.execute(self.table.insert().values(**values))
+        except IntegrityError:
+            query = self.table.update().where(self.table.c.key == values['key'])
+            if where is not None:
+                query = query.where(where)
+            conn.execute(query.values(**update))
+
+    def _after_write(self, conn, now):
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute(self.table.delete().where(self.table.c.expires_at <= now))
+
+    def _select(self, conn, key, now):
+        t = self.table
+        row = conn.execute(
+            t.select().where(t.c.key == key)
+        ).first()
+        if row is None or (row.expires_at is not None and row.expires_at <= now):
+            return None
+        return row
+
+    def get(self, key):
+        with self._engine().connect() as conn:
+            row = self._select(conn, key, time.time())
+        return json.loads(row.value) if row is not None and row.value is not None else None
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        values = {'key': key, 'value': json.dumps(value), 'counter': None,
+                  'expires_at': now + ttl if ttl else None}
+        with self._engine().begin() as conn:
+            self._upsert(conn, values, {k: v for k, v in values.items() if k != 'key'})
+            self._after_write(conn, now)
+
+    def set_many(self, items, ttl=None):
+        now = time.time()
+        expires_at = now + ttl if ttl else None
+        rows = [{'key': key, 'value': json.dumps(value), 'counter': None, 'expires_at': expires_at}
+                for key, value in items]
+        if not rows:
+            return
+        with self._engine().begin() as conn:
+            stmt = self._insert(conn.dialect.name)
+            if stmt is not None:
+                # One executemany upsert for every row
+                conn.execute(stmt.on_conflict_do_update(index_elements=['key'], set_={
+                    'value': stmt.excluded.value, 'counter': None, 'expires_at': stmt.excluded.expires_at,
+                }), rows)
+            else:
+                for values in rows:
+                    self._upsert(conn, values, {k: v for k, v in values.items() if k != 'key'})
+            self._after_write(conn, now)
+
+    def add(self, key, value, ttl=None):
+        t = self.table
+        now = time.time()
+        values = {'key': key, 'value': json.dumps(value), 'counter': None,
+                  'expires_at': now + ttl if ttl else None}
+        with self._engine().begin() as conn:
+            # Only replace an existing row if it has expired
+            self._upsert(conn, values, {k: v for k, v in values.items() if k != 'key'},
+                         where=t.c.expires_at.isnot(None) & (t.c.expires_at <= now))
+            row = self._select(conn, key, now)
+        return json.loads(row.value) if row is not None and row.value is not None else value
+
+    def incr(self, key, amount=1, window=60):
+        t = self.table
+        now = time.time()
+        index, end = _window(window, now)
+        counter_key = f'{key}@{index}'
+        with self._engine().begin() as conn:
+            self._upsert(conn, {'key': counter_key, 'value': None, 'counter': amount, 'expires_at': end},
+                         {'counter': t.c.counter + amount})
+            self._after_write(conn, now)
+            return conn.execute(t.select().with_only_columns(t.c.counter).where(t.c.key == counter_key)).scalar()
+
+    def delete(self, key):
+        with self._engine().begin() as conn:
+            conn.execute(self.table.delete().where(self.table.c.key == key))
+
+    def clear(self, prefix=''):
+        t = self.table
+        with self._engine().begin() as conn:
+            query = t.delete()
+            if prefix:
+                escaped = prefix.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+                query = query.where(t.c.key.like(escaped + '%', escape='\\'))
+            conn.execute(query)
+
+
+class FileBackend(StateBackend):
+    """One file per key in `directory`; safe across processes on one host without locks.
+
+    Values are written to a temporary file and renamed into place, so readers
+    see either the old or the new value. `add` creates the file with a hard
+    link, which fails atomically if another process got there first. Counters
+    append one byte per increment to a file per window (appends of a few bytes
+    are atomic with O_APPEND), and the file size is the count.
+    """
+
+    name = 'file'
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key, suffix='.json'):
+        name = urllib.parse.quote(key, safe='')
+        if len(name) > 180:
+            name = name[:100] + '-' + hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, name + suffix)
+
+    def _read(self, path, now):
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get('expires_at') is not None and entry['expires_at'] <= now:
+            return None
+        return entry
+
+    def _write_tmp(self, value, ttl, now):
+        tmp = os.path.join(self.directory, f'.{uuid4().hex}.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'value': value, 'expires_at': now + ttl if ttl else None}, f)
+        return tmp
+
+    def _after_write(self, now):
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            self.purge_expired(now)
+
+    def get(self, key):
+        entry = self._read(self._path(key), time.time())
+        return entry['value'] if entry else None
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        os.replace(self._write_tmp(value, ttl, now), self._path(key))
+        self._after_write(now)
+
+    def add(self, key, value, ttl=None):
+        now = time.time()
+        path = self._path(key)
+        tmp = self._write_tmp(value, ttl, now)
+        try:
+            for _ in range(2):
+                try:
+                    os.link(tmp, path)
+                    return value
+                except FileExistsError:
+                    entry = self._read(path, now)
+                    if entry is not None:
+                        return entry['value']
+                    # Expired (or half-deleted): remove it and try once more
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+            entry = self._read(path, now)
+            return entry['value'] if entry else value
+        finally:
+            os.remove(tmp)
+
+    def incr(self, key, amount=1, window=60):
+        now = time.time()
+        index, end = _window(window, now)
+        path = self._path(f'{key}@{index}', f'.{int(end)}.cnt')
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, b'.' * amount)
+            count = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        self._after_write(now)
+        return count
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self, prefix=''):
+        quoted = urllib.parse.quote(prefix, safe='')
+        for name in os.listdir(self.directory):
+            if name.startswith(quoted) and not name.startswith('.'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except FileNotFoundError:
+                    pass
+
+    def purge_expired(self, now=None):
+        now = time.time() if now is None else now
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.cnt'):
+                expires_at = float(name.rsplit('.', 2)[-2])
+            elif name.endswith('.json'):
+                entry = self._read(path, float('-inf'))
+                expires_at = entry.get('expires_at') if entry else None
+            else:
+                continue
+            if expires_at is not None and expires_at <= now:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+
+def create_backend_from_env(get_engine, default_dir):
+    """Build the backend selected by SHARED_STATE_BACKEND (db, file or memory)."""
+    kind = (os.getenv('SHARED_STATE_BACKEND') or 'db').strip().lower()
+    if kind == 'file':
+        return FileBackend(os.getenv('SHARED_STATE_DIR') or default_dir)
+    if kind == 'memory':
+        return MemoryBackend()
+    if kind != 'db':
+        raise ValueError(f"Unknown SHARED_STATE_BACKEND '{kind}' (expected db, file or memory)")
+    return DatabaseBackend(get_engine)
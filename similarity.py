@@ -0,0 +1,514 @@
+"""
+Local vector index for finding near-duplicate queries and question sets.
+
+Texts are embedded with a pluggable function; the default hashes word and
+character-trigram features into a fixed-size vector, so paraphrases that
+share words or word stems ("palindromic substring" / "palindrome in string")
+land close together without a model or network access. Lookups are brute
+force over an inverted index, or, when NumPy is installed, over the vectors
+kept as a sparse (CSR) matrix, so memory grows with the features of each
+text rather than the vector size. With NumPy an optional random-hyperplane
+LSH index narrows the candidates on large indexes.
+
+Cosine similarity alone can't tell "two sum" from "three sum", so callers
+confirm candidates with is_near_duplicate(), which requires every content
+word on each side to have a close match on the other.
+
+Indexes persist as an append-only JSONL log of add/remove records. Other
+processes appending to the same file are picked up by sync(), so workers
+sharing a disk share one index.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+# NumPy is optional; without it searches use the pure-Python inverted index
+try:
+    import numpy
+except Exception:
+    numpy = None
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are still atomic enough for one line
+    fcntl = None
+
+DEFAULT_DIM = 1024
+DEFAULT_MIN_WORD_SIMILARITY = 0.5
+# Words that don't change what is being asked for
+STOPWORDS = frozenset('''
+    a an and ask asked at by coding company find for from given in interview interviews into is leetcode
+    of on or practice problem problems question questions the to with
+'''.split())
+
+Match = namedtuple('Match', 'key score text payload')
+
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def tokenize(text):
+    """Lowercase content words of `text`."""
+    return [w for w in _WORD_RE.findall(str(text or '').lower()) if w not in STOPWORDS]
+
+
+def _trigrams(word):
+    padded = f'#{word}#'
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def word_similarity(a, b):
+    """Dice coefficient of the character trigrams of two words."""
+    if a == b:
+        return 1.0
+    ga, gb = set(_trigrams(a)), set(_trigrams(b))
+    return 2 * len(ga & gb) / (len(ga) + len(gb))
+
+
+def _words_match(word, other, min_word_similarity):
+    # '3sum' and '4sum' share most trigrams but ask for different problems
+    if any(c.isdigit() for c in word + other):
+        return word == other
+    return word_similarity(word, other) > min_word_similarity
+
+
+def is_near_duplicate(a, b, min_word_similarity=DEFAULT_MIN_WORD_SIMILARITY):
+    """True if every content word of each text closely matches a word of the other.
+
+    Words match when their trigram similarity exceeds `min_word_similarity`;
+    words containing digits only match exactly.
+    """
+    words_a, words_b = set(tokenize(a)), set(tokenize(b))
+    if not words_a or not words_b:
+        return False
+    for left, right in ((words_a, words_b), (words_b, words_a)):
+        for word in left:
+            if word not in right and not any(_words_match(word, other, min_word_similarity) for other in right):
+                return False
+    return True
+
+
+class HashedNgramEmbedder:
+    """Signed feature hashing of words and character trigrams into `dim` buckets.
+
+    Returns a sparse {index: weight} dict with unit L2 norm. Words and
+    trigrams carry equal total weight, so a shared stem counts even when
+    the words differ.
+    """
+
+    def __init__(self, dim=DEFAULT_DIM):
+        self.dim = dim
+        self.name = f'hashed-ngram-v1-{dim}'
+
+    def _bucket(self, feature):
+        digest = hashlib.blake2b(feature.encode('utf-8'), digest_size=8).digest()
+        value = int.from_bytes(digest, 'little')
+        return value % self.dim, (1.0 if value >> 63 else -1.0)
+
+    def __call__(self, text):
+        words = tokenize(text)
+        if not words:
+            return {}
+        grams = [g for w in words for g in _trigrams(w)]
+        gram_weight = len(words) / len(grams)
+        vector = {}
+        for feature, weight in [('w:' + w, 1.0) for w in words] + [('c:' + g, gram_weight) for g in grams]:
+            index, sign = self._bucket(feature)
+            vector[index] = vector.get(index, 0.0) + sign * weight
+        norm = math.sqrt(sum(v * v for v in vector.values()))
+        return {i: v / norm for i, v in vector.items() if v} if norm else {}
+
+
+class SimilarityIndex:
+    """Keyed texts searchable by cosine similarity of their embeddings.
+
+    `path` is the JSONL log (None keeps the index in memory only).
+    `max_entries` evicts the oldest entries beyond that size. `approximate`
+    enables LSH candidate selection (NumPy only) once the index holds more
+    than `approximate_min_size` entries. The log is compacted once it holds
+    at least `compact_min_dead` superseded records and more than
+    `compact_ratio` of them per live entry.
+    """
+
+    def __init__(self, path=None, embed=None, dim=DEFAULT_DIM, max_entries=None, approximate=False,
+                 approximate_min_size=20000, lsh_tables=8, lsh_bits=12, seed=0,
+                 compact_ratio=1.0, compact_min_dead=1000):
+        self.path = path
+        self.embed = embed or HashedNgramEmbedder(dim)
+        self.dim = getattr(self.embed, 'dim', dim)
+        self.embedder_name = getattr(self.embed, 'name', getattr(self.embed, '__name__', 'custom'))
+        self.max_entries = max_entries
+        self.approximate = approximate and numpy is not None
+        self.approximate_min_size = approximate_min_size
+        self.compact_ratio = compact_ratio
+        self.compact_min_dead = compact_min_dead
+        self._lock = threading.RLock()
+        self._offset = 0
+        self._log_records = 0   # add/remove lines in the log, live or not
+        self._inode = None
+        self._loaded = False
+        if self.approximate:
+            rng = numpy.random.RandomState(seed)
+            self._planes = rng.standard_normal((lsh_tables, lsh_bits, self.dim)).astype('float32')
+            self._bit_weights = (1 << numpy.arange(lsh_bits)).astype('int64')
+        self._clear_memory()
+
+    # -- in-memory storage --------------------------------------------------
+
+    def _clear_memory(self):
+        self._slots = {}        # key -> slot
+        self._keys = []         # slot -> key (None when free)
+        self._texts = []
+        self._payloads = []
+        self._free = []
+        self._postings = {}     # dimension -> {slot: weight}, pure-Python search
+        self._vectors = []      # slot -> dimensions of its vector, pure-Python search
+        # NumPy search: every stored vector is a row of a sparse (CSR) matrix.
+        # Rows of removed entries stay until more than half the rows are dead.
+        self._indices = numpy.zeros(0, dtype='int32') if numpy is not None else None
+        self._data = numpy.zeros(0, dtype='float32') if numpy is not None else None
+        self._nnz = 0
+        self._row_starts = []   # row -> offset in _indices/_data
+        self._row_slots = []    # row -> slot, -1 once removed
+        self._slot_rows = {}    # slot -> row (slots with an empty vector have none)
+        self._buckets = {}      # (table, signature) -> set of slots, LSH only
+        self._signatures = {}   # slot -> signatures, LSH only
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def get(self, key):
+        with self._lock:
+            slot = self._slots.get(key)
+            return None if slot is None else (self._texts[slot], self._payloads[slot])
+
+    def _dense(self, vector):
+        row = numpy.zeros(self.dim, dtype='float32')
+        for i, v in vector.items():
+            row[i] = v
+        return row
+
+    def _store(self, key, text, payload, vector):
+        self._unstore(key)
+        if self._free:
+            slot = self._free.pop()
+            self._keys[slot], self._texts[slot], self._payloads[slot] = key, text, payload
+        else:
+            slot = len(self._keys)
+            self._keys.append(key)
+            self._texts.append(text)
+            self._payloads.append(payload)
+            self._vectors.append(None)
+        self._slots[key] = slot
+        if numpy is not None:
+            if vector:
+                self._append_row(slot, vector)
+            if self.approximate:
+                signatures = self._signature(vector)
+                self._signatures[slot] = signatures
+                for table, signature in enumerate(signatures):
+                    self._buckets.setdefault((table, signature), set()).add(slot)
+        else:
+            self._vectors[slot] = tuple(vector)
+            for i, v in vector.items():
+                self._postings.setdefault(i, {})[slot] = v
+
+    def _append_row(self, slot, vector):
+        end = self._nnz + len(vector)
+        if end > len(self._data):
+            capacity = max(1024, end, len(self._data) * 2)
+            self._indices = numpy.resize(self._indices, capacity)
+            self._data = numpy.resize(self._data, capacity)
+        self._indices[self._nnz:end] = list(vector.keys())
+        self._data[self._nnz:end] = list(vector.values())
+        self._slot_rows[slot] = len(self._row_starts)
+        self._row_starts.append(self._nnz)
+        self._row_slots.append(slot)
+        self._nnz = end
+
+    def _unstore(self, key):
+        slot = self._slots.pop(key, None)
+        if slot is None:
+            return False
+        if numpy is not None:
+            row = self._slot_rows.pop(slot, None)
+            if row is not None:
+                self._row_slots[row] = -1
+                if len(self._row_starts) - len(self._slot_rows) > max(len(self._slot_rows), 64):
+                    self._compact_rows()
+            for table, signature in enumerate(self._signatures.pop(slot, ())):
+                self._buckets.get((table, signature), set()).discard(slot)
+        else:
+            for i in self._vectors[slot]:
+                self._postings.get(i, {}).pop(slot, None)
+        self._keys[slot] = self._texts[slot] = self._payloads[slot] = self._vectors[slot] = None
+        self._free.append(slot)
+        return True
+
+    def _compact_rows(self):
+        """Drop the rows of removed entries from the sparse matrix."""
+        starts = numpy.array(self._row_starts + [self._nnz], dtype='int64')
+        live = numpy.array(self._row_slots, dtype='int64') >= 0
+        keep = numpy.repeat(live, numpy.diff(starts))
+        self._indices = self._indices[:self._nnz][keep].copy()
+        self._data = self._data[:self._nnz][keep].copy()
+        self._nnz = len(self._data)
+        lengths = numpy.diff(starts)[live]
+        self._row_starts = [0] + numpy.cumsum(lengths)[:-1].tolist() if len(lengths) else []
+        self._row_slots = [slot for slot in self._row_slots if slot >= 0]
+        self._slot_rows = {slot: row for row, slot in enumerate(self._row_slots)}
+
+    def _signature(self, vector):
+        dims = numpy.fromiter(vector.keys(), dtype='int64', count=len(vector))
+        weights = numpy.fromiter(vector.values(), dtype='float32', count=len(vector))
+        projections = self._planes[:, :, dims] @ weights  # (tables, bits)
+        return tuple(int(v) for v in ((projections > 0).astype('int64') @ self._bit_weights))
+
+    # -- public API ---------------------------------------------------------
+
+    def add(self, key, text, payload=None):
+        """Index `text` under `key`, replacing any previous entry."""
+        self.add_many([(key, text, payload)])
+
+    def add_many(self, entries):
+        """Index (key, text, payload) tuples with a single log write."""
+        entries = [(key, text, payload, self.embed(text)) for key, text, payload in entries]
+        if not entries:
+            return
+        with self._lock:
+            for key, text, payload, vector in entries:
+                self._store(key, text, payload, vector)
+            self._append(*[{'op': 'add', 'key': key, 'text': text, 'payload': payload}
+                           for key, text, payload, _ in entries])
+            if self.max_entries and len(self._slots) > self.max_entries:
+                # Dicts keep insertion order, and re-added keys move to the end
+                for oldest in list(self._slots)[:len(self._slots) - self.max_entries]:
+                    self.remove(oldest)
+
+    def remove(self, key):
+        self.remove_many([key])
+
+    def remove_many(self, keys):
+        """Drop entries under `keys` with a single log write."""
+        with self._lock:
+            removed = [key for key in keys if self._unstore(key)]
+            if removed:
+                self._append(*[{'op': 'remove', 'key': key} for key in removed])
+
+    def search(self, text, k=5, min_score=0.0):
+        """Up to `k` Matches with cosine similarity >= min_score, best first."""
+        query = self.embed(text)
+        if not query:
+            return []
+        with self._lock:
+            if numpy is not None:
+                scored = self._search_dense(query, k)
+            else:
+                scores = {}
+                for i, qv in query.items():
+                    for slot, v in self._postings.get(i, {}).items():
+                        scores[slot] = scores.get(slot, 0.0) + qv * v
+                scored = sorted(scores.items(), key=lambda item: -item[1])[:k]
+            return [Match(self._keys[slot], float(score), self._texts[slot], self._payloads[slot])
+                    for slot, score in scored if score >= min_score and self._keys[slot] is not None]
+
+    def _search_dense(self, query, k):
+        if not self._row_starts:
+            return []
+        row = self._dense(query)
+        if self.approximate and len(self._slots) > self.approximate_min_size:
+            found = set()
+            for table, signature in enumerate(self._signature(query)):
+                found |= self._buckets.get((table, signature), set())
+            if len(found) >= k:
+                bounds = self._row_starts + [self._nnz]
+                scored = []
+                for slot in found:
+                    r = self._slot_rows.get(slot)
+                    if r is not None:
+                        start, end = bounds[r], bounds[r + 1]
+                        scored.append((slot, float(self._data[start:end] @ row[self._indices[start:end]])))
+                return sorted(scored, key=lambda item: -item[1])[:k]
+        contributions = self._data[:self._nnz] * row[self._indices[:self._nnz]]
+        scores = numpy.add.reduceat(contributions, numpy.array(self._row_starts, dtype='int64'))
+        slots = numpy.array(self._row_slots, dtype='int64')
+        scores[slots < 0] = -numpy.inf
+        if len(scores) > k:
+            top = numpy.argpartition(-scores, k)[:k]
+        else:
+            top = numpy.arange(len(scores))
+        top = top[numpy.argsort(-scores[top])]
+        return [(int(slots[i]), float(scores[i])) for i in top if slots[i] >= 0]
+
+    # -- persistence --------------------------------------------------------
+
+    @contextmanager
+    def _locked_log(self):
+        """The log opened for appending under an exclusive lock, reopened if it was replaced."""
+        while True:
+            f = open(self.path, 'a', encoding='utf-8')
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                replaced = os.fstat(f.fileno()).st_ino != os.stat(self.path).st_ino
+            except FileNotFoundError:
+                replaced = True
+            if not replaced:
+                break
+            f.close()
+        try:
+            yield f
+        finally:
+            f.close()
+
+    def _append(self, *records):
+        if self.path is None:
+            return
+        now = round(time.time(), 3)
+        data = ''.join(json.dumps(dict(record, t=now)) + '\n' for record in records)
+        with self._locked_log() as f:
+            size = f.seek(0, os.SEEK_END)
+            f.write(data)
+            f.flush()
+            if self._inode == os.fstat(f.fileno()).st_ino:
+                if size == self._offset:
+                    # Skip our own lines on the next sync
+                    self._offset = f.tell()
+                    self._log_records += len(records)
+                else:
+                    # Someone else wrote first: apply their lines then ours, in log order
+                    self._replay()
+        dead = self._log_records - len(self._slots)
+        if dead >= self.compact_min_dead and dead > self.compact_ratio * len(self._slots):
+            self.compact()
+
+    def _header(self):
+        return {'op': 'header', 'embedder': self.embedder_name}
+
+    def load(self):
+        """Read the log from disk; returns False if it is missing or from another embedder."""
+        with self._lock:
+            self._clear_memory()
+            self._offset, self._inode, self._log_records = 0, None, 0
+            if self.path is None or not os.path.exists(self.path):
+                return False
+            with open(self.path, encoding='utf-8') as f:
+                first = f.readline()
+                try:
+                    header = json.loads(first)
+                except ValueError:
+                    return False
+                if header != self._header():
+                    return False
+                self._inode = os.fstat(f.fileno()).st_ino
+                self._offset = len(first.encode('utf-8'))
+            self._replay()
+            self._loaded = True
+            return True
+
+    def _replay(self):
+        with open(self.path, 'rb') as f:
+            f.seek(self._offset)
+            for raw in f:
+                if not raw.endswith(b'\n'):
+                    break  # A line still being written
+                self._offset += len(raw)
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                self._log_records += 1
+                if record.get('op') == 'add':
+                    self._store(record['key'], record['text'], record.get('payload'), self.embed(record['text']))
+                elif record.get('op') == 'remove':
+                    self._unstore(record['key'])
+
+    def sync(self):
+        """Apply records appended by other processes since the last load/sync."""
+        if self.path is None:
+            return
+        with self._lock:
+            try:
+                stat = os.stat(self.path)
+            except FileNotFoundError:
+                return
+            if stat.st_ino != self._inode or stat.st_size < self._offset:
+                self.load()
+            elif stat.st_size > self._offset:
+                self._replay()
+
+    def rebuild(self, entries):
+        """Replace the index with `entries` ((key, text, payload) tuples, oldest first) and rewrite the log."""
+        with self._lock:
+            self._clear_memory()
+            entries = list(entries)
+            if self.max_entries:
+                entries = entries[-self.max_entries:]
+            for key, text, payload in entries:
+                self._store(key, text, payload, self.embed(text))
+            if self.path is not None:
+                tmp = self._write_snapshot()
+                if os.path.exists(self.path):
+                    with self._locked_log():
+                        self._install(tmp)
+                else:
+                    self._install(tmp)
+            self._loaded = True
+
+    def compact(self):
+        """Rewrite the log as one add per live entry, keeping records other processes appended."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with self._lock, self._locked_log() as f:
+            stat = os.fstat(f.fileno())
+            if stat.st_ino != self._inode:
+                return  # Another process replaced the log since we read it
+            if stat.st_size > self._offset:
+                self._replay()
+            self._install(self._write_snapshot())
+
+    def _write_snapshot(self):
+        """Write the live entries to a temporary file next to the log; returns its path."""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(self._header()) + '\n')
+            for key, slot in self._slots.items():
+                f.write(json.dumps({'op': 'add', 'key': key, 'text': self._texts[slot],
+                                    'payload': self._payloads[slot]}) + '\n')
+        return tmp
+
+    def _install(self, tmp):
+        # Callers hold the log lock whenever the log already exists
+        os.replace(tmp, self.path)
+        stat = os.stat(self.path)
+        self._inode, self._offset, self._log_records = stat.st_ino, stat.st_size, len(self._slots)
+
+    def ensure_loaded(self, rebuild_entries=None):
+        """Load from disk once; if that fails, rebuild from rebuild_entries() (or start empty)."""
+        if self._loaded:
+            self.sync()
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            if not self.load():
+                self.rebuild(rebuild_entries() if rebuild_entries else [])
+
+    def reset(self):
+        """Forget everything, in memory and on disk."""
+        with self._lock:
+            self._clear_memory()
+            self._loaded = False
+            self._offset, self._inode, self._log_records = 0, None, 0
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the precomputed analytics rollups
+"""
+
+import json
+
+
+def make_questions(company, difficulties):
+    return [
+        {'url': f'https://leetcode.com/problems/{company.lower()}-{i}/', 'platform': 'LeetCode',
+         'topic': f'Topic {i}', 'difficulty_level': level, 'company': company, 'category': 'Array'}
+        for i, level in enumerate(difficulties)
+    ]
+
+
+def save(mentor_client, company, difficulties):
+    response = mentor_client.post('/save_search', json={
+        'query': company, 'summary': company, 'questions': make_questions(company, difficulties)
+    })
+    return response.get_json()['question_id']
+
+
+def analytics(client, **params):
+    response = client.get('/analytics', query_string=params)
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_rollups_follow_save_publish_and_delete(app_module, mentor_client):
+    google = save(mentor_client, 'Google', ['Easy', 'Easy', 'hard'])
+    save(mentor_client, 'Amazon', ['Medium'])
+
+    data = analytics(mentor_client, group_by='company,difficulty')
+    assert data['total'] == 4
+    assert {'company': 'Google', 'difficulty': 'Easy', 'count': 2} in data['rows']
+    assert {'company': 'Google', 'difficulty': 'Hard', 'count': 1} in data['rows']
+    assert analytics(mentor_client, published_only=1)['total'] == 0
+
+    mentor_client.post('/publish_question', json={'question_id': google, 'action': 'publish'})
+    # Publishing twice must not double count
+    mentor_client.post('/publish_question', json={'question_id': google, 'action': 'publish'})
+    assert analytics(mentor_client, group_by='company', published_only=1)['rows'] == [
+        {'company': 'Google', 'count': 3}
+    ]
+
+    mentor_client.post('/delete_question', json={'question_id': google})
+    assert analytics(mentor_client, group_by='company')['rows'] == [{'company': 'Amazon', 'count': 1}]
+    assert analytics(mentor_client, published_only=1)['total'] == 0
+
+
+def test_filters_and_validation(app_module, mentor_client, student_client):
+    save(mentor_client, 'Google', ['Easy', 'Medium'])
+    save(mentor_client, 'Amazon', ['Easy'])
+
+    assert analytics(mentor_client, group_by='difficulty', company='Google')['total'] == 2
+    response = mentor_client.get('/analytics?group_by=topic')
+    assert response.status_code == 400
+    assert student_client.get('/analytics').status_code == 403
+
+
+def test_rebuild_matches_incremental_counts(app_module, mentor_client):
+    question_id = save(mentor_client, 'Google', ['Easy', 'Hard'])
+    save(mentor_client, 'Meta', ['Medium', 'Medium'])
+    mentor_client.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+    before = analytics(mentor_client)
+
+    with app_module.app.app_context():
+        assert app_module.rebuild_rollups(batch_size=1) == 3
+    assert analytics(mentor_client) == before
+
+
+def test_rollup_keys_normalizes_missing_values(app_module):
+    keys = app_module.rollup_keys(json.loads(json.dumps([{'difficulty_level': ' easy '}, 'junk'])))
+    assert keys == {('Unknown', 'Unknown', 'Easy', 'Unknown'): 1}
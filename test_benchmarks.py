@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Smoke tests for the benchmark helpers
+"""
+
+import random
+
+from benchmarks import bench_read_paths, bench_render, bench_startup, bench_storage, common, seed
+
+
+def test_percentiles_nearest_rank():
+    stats = common.percentiles([i / 1000 for i in range(1, 101)])
+    assert stats['p50_ms'] == 50
+    assert stats['p95_ms'] == 95
+    assert stats['p99_ms'] == 99
+    assert common.percentiles([]) == {'count': 0}
+
+
+def test_seed_and_bench_read_paths(app_module):
+    summary = seed.seed(app_module, mentors=2, students=2, sets=20, published_ratio=1.0)
+    assert summary == {'users': 4, 'question_sets': 20, 'published_sets': 20}
+    results = bench_read_paths.bench(app_module, iterations=2, warmup=0, rng=random.Random(0))
+    assert set(results) == {'student_dashboard', 'mentor_dashboard', 'get_question_details',
+                            'get_published_question_details'}
+    assert all(r['errors'] == 0 for r in results.values())
+
+
+def test_bench_render_sizes(app_module):
+    seed.seed(app_module, mentors=1, students=1, sets=10, published_ratio=1.0)
+    with app_module.app.app_context():
+        questions = app_module.QuestionSet.list_query().all()
+        app_module.db.session.expunge_all()
+        results = bench_render.bench_size(app_module, questions, iterations=2)
+    assert set(results) == {'mentor', 'student'}
+    assert all(results[page]['warm']['count'] == 2 for page in results)
+    assert len(app_module.card_cache) == 0
+
+
+def test_bench_storage_round_trips_every_encoding():
+    results = bench_storage.bench_size(questions_per_set=5, sets=10)
+    assert set(results) == set(bench_storage.ENCODINGS)
+    assert results['compact_zlib']['bytes_total'] < results['json']['bytes_total']
+
+
+def test_bench_startup_import_time_by_package(monkeypatch, tmp_path):
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 | site',  # loaded before the entry point
+        'import time:       300 |        300 |     sqlalchemy.sql',
+        'import time:       200 |        500 |   sqlalchemy',
+        'import time:       400 |        900 | app',
+    ])
+    assert bench_startup.import_time_by_package(stderr, ('app',)) == {'app': 0.4, 'sqlalchemy': 0.5}
+
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'startup.db'}")
+    result, _ = bench_startup._run_child('setup_sqlite')
+    assert result['import_s'] > 0 and result['first_use_s'] > 0
+    assert result['ai_sdk'] == []
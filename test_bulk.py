@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the bulk publish, unpublish and delete endpoints
+"""
+
+QUESTIONS = [
+    {'url': 'https://leetcode.com/problems/two-sum/', 'platform': 'LeetCode', 'topic': 'Two Sum',
+     'difficulty_level': 'Easy', 'company': 'Google', 'category': 'Array'},
+    {'url': 'https://leetcode.com/problems/3sum/', 'platform': 'LeetCode', 'topic': '3Sum',
+     'difficulty_level': 'Medium', 'company': 'Google', 'category': 'Array'},
+]
+
+
+def save(client, query):
+    response = client.post('/save_search', json={'query': query, 'summary': query, 'questions': QUESTIONS})
+    return response.get_json()['question_id']
+
+
+def statuses(response):
+    assert response.status_code == 200, response.get_json()
+    return [r['status'] for r in response.get_json()['results']]
+
+
+def change_events(app_module):
+    with app_module.app.app_context():
+        return [(e.question_set_id, e.kind) for e in
+                app_module.db.session.query(app_module.ChangeEvent).order_by(app_module.ChangeEvent.id)]
+
+
+def test_bulk_publish_and_unpublish(app_module, mentor_client, student_client):
+    first, second, third = (save(mentor_client, f'set {i}') for i in range(3))
+    mentor_client.post('/publish_question', json={'question_id': third, 'action': 'publish'})
+
+    response = mentor_client.post('/publish_questions', json={
+        'question_ids': [first, second, third, first, 9999], 'action': 'publish'})
+    assert statuses(response) == ['published', 'published', 'unchanged', 'not_found']
+    assert response.get_json()['counts'] == {'published': 2, 'unchanged': 1, 'not_found': 1}
+    assert change_events(app_module) == [(third, 'published'), (first, 'published'), (second, 'published')]
+    assert b'set 0' in student_client.get('/student').data
+    assert mentor_client.get('/analytics', query_string={'published_only': 1}).get_json()['total'] == 6
+
+    response = mentor_client.post('/publish_questions', json={'question_ids': [first, second], 'action': 'unpublish'})
+    assert statuses(response) == ['unpublished', 'unpublished']
+    assert mentor_client.get('/analytics', query_string={'published_only': 1}).get_json()['total'] == 2
+    before = mentor_client.get('/analytics').get_json()
+    with app_module.app.app_context():
+        app_module.rebuild_rollups()
+    assert mentor_client.get('/analytics').get_json() == before
+
+
+def test_bulk_delete_only_touches_own_sets(app_module, mentor_client, student_client):
+    draft, published = save(mentor_client, 'draft'), save(mentor_client, 'published')
+    mentor_client.post('/publish_question', json={'question_id': published, 'action': 'publish'})
+    student_client.post('/progress', json={'question_id': published, 'index': 0, 'status': 'solved'})
+    app_module.progress_tracker.flush()
+
+    other = app_module.app.test_client()
+    other.post('/register', json={'username': 'mentor2', 'email': 'mentor2@example.com',
+                                  'password': 'testpass123', 'user_type': 'mentor'})
+    other.post('/login', json={'username': 'mentor2', 'password': 'testpass123'})
+    assert statuses(other.post('/delete_questions', json={'question_ids': [draft]})) == ['not_found']
+
+    response = mentor_client.post('/delete_questions', json={'question_ids': [draft, published]})
+    assert statuses(response) == ['deleted', 'deleted']
+    assert change_events(app_module)[-1] == (published, 'deleted')
+    with app_module.app.app_context():
+        assert app_module.db.session.query(app_module.QuestionSet).count() == 0
+        assert app_module.db.session.query(app_module.QuestionProgress).count() == 0
+    assert mentor_client.get('/analytics').get_json()['total'] == 0
+
+
+def test_bulk_validation(app_module, mentor_client, student_client, monkeypatch):
+    assert mentor_client.post('/delete_questions', json={'question_ids': []}).status_code == 400
+    assert mentor_client.post('/delete_questions', json={'question_ids': ['x']}).status_code == 400
+    assert mentor_client.post('/publish_questions', json={'question_ids': [1], 'action': 'hide'}).status_code == 400
+    monkeypatch.setattr(app_module, 'BULK_MAX_IDS', 2)
+    assert mentor_client.post('/delete_questions', json={'question_ids': [1, 2, 3]}).status_code == 400
+    assert student_client.post('/delete_questions', json={'question_ids': [1]}).status_code == 403
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for the completion cache
+"""
+
+import time
+
+import completion_cache
+
+
+def test_disk_tier_is_shared_and_entries_expire(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    first = completion_cache.CompletionCache(path)
+    results = []
+    second = completion_cache.CompletionCache(path, on_result=results.append)
+    key = completion_cache.make_key('fake', ['m'], 100, 'prompt')
+    first.put(key, 'answer')
+    assert second.get(key) == 'answer'
+    assert second.get(key) == 'answer'
+    assert results == ['disk_hit', 'memory_hit']
+
+    first.put('short', 'gone soon', ttl=0.05)
+    time.sleep(0.1)
+    assert first.get('short') is None
+    assert second.get('short') is None
+
+
+def test_size_cap_evicts_least_recently_used(tmp_path):
+    cache = completion_cache.CompletionCache(str(tmp_path / 'cache.sqlite3'), memory_entries=0, max_bytes=1000)
+    for i in range(5):
+        cache.put(f'k{i}', 'x' * 300)
+        cache.get('k0')  # keep k0 warm
+    assert cache.stats()['disk_bytes'] <= 1000
+    assert cache.get('k0') is not None
+    assert cache.get('k1') is None
+
+
+def test_key_covers_backend_models_and_budget():
+    key = completion_cache.make_key('gemini', ['a', 'b'], 100, 'p')
+    assert key != completion_cache.make_key('gemini', ['b', 'a'], 100, 'p')
+    assert key != completion_cache.make_key('gemini', ['a', 'b'], 200, 'p')
+    assert key != completion_cache.make_key('fake', ['a', 'b'], 100, 'p')
+
+
+def test_repeated_prompts_skip_the_backend(app_module, fake_backend):
+    with app_module.app.test_request_context():
+        first = app_module.get_completion('Reply with the single word: OK')
+        calls = fake_backend.calls
+        assert app_module.get_completion('Reply with the single word: OK') == first
+        assert fake_backend.calls == calls
+        app_module.get_completion('Reply with the single word: OK', cache=False)
+        assert fake_backend.calls == calls + 1
+
+        # Responses that fail validation are not stored
+        def reject(text):
+            raise ValueError('bad')
+        app_module.get_completion('another prompt', validate=reject)
+        app_module.get_completion('another prompt', validate=reject)
+        assert fake_backend.calls == calls + 3
+
+
+def test_identical_search_prompts_are_reused(app_module, mentor_client, fake_backend, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_module, 'SEARCH_CACHE_TTL', 0)
+    first = mentor_client.post('/search', json={'query': 'two sum google'}).get_json()
+    calls = fake_backend.calls
+    second = mentor_client.post('/search', json={'query': 'two sum google'}).get_json()
+    assert second['questions'] == first['questions']
+    assert fake_backend.calls == calls
+    mentor_client.post('/search', json={'query': 'two sum google', 'fresh': True})
+    assert fake_backend.calls > calls
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests for response compression and fingerprinted static files
+"""
+
+import gzip
+
+import pytest
+
+import compression
+
+
+def test_choose_encoding_respects_q_values():
+    assert compression.choose_encoding('gzip, deflate, br', ('br', 'gzip')) == 'br'
+    assert compression.choose_encoding('br;q=0, gzip;q=0.5', ('br', 'gzip')) == 'gzip'
+    assert compression.choose_encoding('identity', ('br', 'gzip')) is None
+    assert compression.choose_encoding('*', ('gzip',)) == 'gzip'
+
+
+def test_large_json_is_gzipped_small_is_not(app_module):
+    flask_app = app_module.app
+    with flask_app.test_request_context():
+        big = compression.compress_response(flask_app.response_class('{"a": 1}' * 200, mimetype='application/json'),
+                                            'gzip', min_size=500)
+        small = compression.compress_response(flask_app.response_class('{}', mimetype='application/json'),
+                                              'gzip', min_size=500)
+        streamed = compression.compress_response(
+            flask_app.response_class(iter([b'x' * 1000]), mimetype='text/plain'), 'gzip', min_size=500)
+    assert big.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(big.get_data()) == b'{"a": 1}' * 200
+    assert big.headers['Vary'] == 'Accept-Encoding'
+    assert 'Content-Encoding' not in small.headers
+    assert 'Content-Encoding' not in streamed.headers
+
+
+def test_dashboard_is_compressed_for_clients_that_accept_it(app_module, student_client):
+    plain = student_client.get('/student')
+    compressed = student_client.get('/student', headers={'Accept-Encoding': 'gzip'})
+    assert compressed.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data) / 2
+
+
+def test_static_files_are_fingerprinted_and_precompressed(app_module, student_client):
+    html = student_client.get('/student').get_data(as_text=True)
+    url = '/static/' + app_module.static_assets.url_name('style.css')
+    assert url in html and url != '/static/style.css'
+
+    plain = app_module.app.test_client().get(url)
+    assert plain.headers['Cache-Control'] == compression.IMMUTABLE_CACHE_CONTROL
+    encoded = app_module.app.test_client().get(url, headers={'Accept-Encoding': 'gzip'})
+    assert encoded.headers['Content-Encoding'] == 'gzip'
+    assert encoded.mimetype == 'text/css'
+    assert gzip.decompress(encoded.data) == plain.data
+    plain.close()
+    encoded.close()
+
+    # The unversioned name still works but isn't cached forever
+    legacy = app_module.app.test_client().get('/static/style.css')
+    assert legacy.status_code == 200
+    assert 'immutable' not in legacy.headers.get('Cache-Control', '')
+    legacy.close()
+
+
+def test_build_writes_variants_and_prunes_stale_ones(tmp_path):
+    static = tmp_path / 'static'
+    static.mkdir()
+    (static / 'app.js').write_text('console.log(1);' * 50)
+    assets = compression.StaticAssets(str(static), str(tmp_path / 'cache'))
+    first = assets.build()['app.js']
+    (static / 'app.js').write_text('console.log(2);' * 50)
+    second = assets.build()['app.js']
+    assert first != second
+    assert sorted(p.name for p in (tmp_path / 'cache').iterdir()) == sorted(
+        second + suffix for suffix in ('.gz', '.br')[:len(compression.available_encodings())])
+
+
+def test_brotli_preferred_when_installed(app_module):
+    pytest.importorskip('brotli')
+    flask_app = app_module.app
+    with flask_app.test_request_context():
+        response = compression.compress_response(flask_app.response_class('x' * 2000), 'gzip, br')
+    assert response.headers['Content-Encoding'] == 'br'
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Tests for the dashboard list queries and precomputed question counts
+"""
+
+import json
+
+from sqlalchemy import event, inspect
+
+
+QUESTIONS = [
+    {'url': 'https://leetcode.com/problems/two-sum/', 'platform': 'LeetCode', 'topic': 'Two Sum',
+     'difficulty_level': 'Easy', 'company': 'Google', 'category': 'Array'},
+    {'url': 'https://leetcode.com/problems/3sum/', 'platform': 'LeetCode', 'topic': '3Sum',
+     'difficulty_level': 'Medium', 'company': 'Google', 'category': 'Array'},
+    {'url': 'https://leetcode.com/problems/4sum/', 'platform': 'LeetCode', 'topic': '4Sum',
+     'difficulty_level': 'medium', 'company': 'Google', 'category': 'Array'},
+]
+
+
+def save(client, query='two sum', questions=QUESTIONS):
+    response = client.post('/save_search', json={'query': query, 'summary': query, 'questions': questions})
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()['question_id']
+
+
+def test_save_precomputes_counts(app_module, mentor_client):
+    question_id = save(mentor_client)
+    with app_module.app.app_context():
+        row = app_module.db.session.get(app_module.QuestionSet, question_id)
+        assert (row.question_count, row.easy_count, row.medium_count, row.hard_count) == (3, 1, 2, 0)
+
+
+def test_dashboard_list_query_skips_questions_blob(app_module, mentor_client):
+    save(mentor_client)
+    statements = []
+
+    def capture(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with app_module.app.app_context():
+        event.listen(app_module.db.engine, 'before_cursor_execute', capture)
+        try:
+            response = mentor_client.get('/mentor')
+        finally:
+            event.remove(app_module.db.engine, 'before_cursor_execute', capture)
+    assert response.status_code == 200
+    assert b'3 questions' in response.data
+    list_queries = [s for s in statements if 'FROM question_set' in s]
+    assert list_queries and all('questions_data' not in s for s in list_queries)
+
+
+def test_migrations_add_and_backfill_columns(app_module):
+    db = app_module.db
+    with app_module.app.app_context():
+        with db.engine.begin() as conn:
+            conn.exec_driver_sql('DROP TABLE question_set')
+            conn.exec_driver_sql(
+                'CREATE TABLE question_set (id INTEGER PRIMARY KEY, mentor_id INTEGER NOT NULL, '
+                'query VARCHAR(500) NOT NULL, summary VARCHAR(200) NOT NULL, questions_data TEXT NOT NULL, '
+                'is_published BOOLEAN, created_at DATETIME, published_at DATETIME)'
+            )
+            conn.exec_driver_sql(
+                "INSERT INTO question_set (mentor_id, query, summary, questions_data) VALUES (1, 'q', 's', ?)",
+                (json.dumps(QUESTIONS),),
+            )
+        app_module.run_migrations()
+        columns = {c['name'] for c in inspect(db.engine).get_columns('question_set')}
+        assert {'question_count', 'easy_count', 'medium_count', 'hard_count', 'updated_at'} <= columns
+        row = db.session.query(app_module.QuestionSet).one()
+        assert (row.question_count, row.medium_count) == (3, 2)
+        # The JSON text was rewritten in the compact encoding
+        assert row.questions_data.startswith(('q1:', 'q1z:'))
+        assert row.get_questions() == QUESTIONS
+
+
+def test_dashboard_cards_rerender_only_when_set_changes(app_module, mentor_client):
+    first = save(mentor_client, 'two sum')
+    save(mentor_client, 'three sum')
+    cache = app_module.card_cache
+    cache.clear()
+    assert mentor_client.get('/mentor').status_code == 200
+    assert cache.stats()['misses'] == 2
+    mentor_client.get('/mentor')
+    assert cache.stats()['hits'] == 2 and cache.stats()['misses'] == 2
+
+    mentor_client.post('/publish_question', json={'question_id': first, 'action': 'publish'})
+    html = mentor_client.get('/mentor').get_data(as_text=True)
+    assert cache.stats()['misses'] == 3
+    assert html.count('status-badge published') == 1 and html.count('status-badge draft') == 1
+
+
+def test_cached_student_cards_show_each_students_progress(app_module, mentor_client, student_client):
+    question_id = save(mentor_client)
+    mentor_client.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+    other = app_module.app.test_client()
+    other.post('/register', json={'username': 'student2', 'email': 'student2@example.com',
+                                  'password': 'testpass123', 'user_type': 'student'})
+    other.post('/login', json={'username': 'student2', 'password': 'testpass123'})
+
+    student_client.post('/progress', json={'question_id': question_id, 'index': 0, 'status': 'solved'})
+    assert b'1/3 solved' in student_client.get('/student').data
+    assert b'0/3 solved' in other.get('/student').data
+    assert len(app_module.card_cache) == 1
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for the change feed and the /feed/stream endpoint
+"""
+
+import json
+import time
+
+import feed
+
+
+def make_feed(events, **kwargs):
+    def fetch(after_seq, limit):
+        return [e for e in events if e['seq'] > after_seq][:limit]
+    return feed.ChangeFeed(fetch, lambda: 0, **kwargs)
+
+
+def test_poll_waits_for_gaps_then_skips_them():
+    events = [{'seq': 1}, {'seq': 3}]
+    change_feed = make_feed(events, gap_timeout=60)
+    assert change_feed.poll() == 1
+    assert change_feed.wait(0, timeout=0) == [{'seq': 1}]
+    # Seq 2 commits late and is delivered in order
+    events.insert(1, {'seq': 2})
+    assert change_feed.poll() == 2
+    assert [e['seq'] for e in change_feed.wait(1, timeout=0)] == [2, 3]
+
+    change_feed.gap_timeout = 0
+    events.append({'seq': 5})
+    assert change_feed.poll() == 1
+    assert change_feed.wait(3, timeout=0) == [{'seq': 5}]
+
+
+def test_clients_behind_the_buffer_are_told_to_reload():
+    change_feed = make_feed([{'seq': i} for i in range(1, 11)], buffer_size=4)
+    change_feed.poll()
+    assert change_feed.wait(5, timeout=0) is None
+    assert [e['seq'] for e in change_feed.wait(6, timeout=0)] == [7, 8, 9, 10]
+    assert change_feed.wait(10, timeout=0) == []
+
+
+def save(client, query='feed set'):
+    return client.post('/save_search', json={
+        'query': query, 'summary': query,
+        'questions': [{'topic': 'Two Sum', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/two-sum/'}],
+    }).get_json()['question_id']
+
+
+def test_visible_changes_are_recorded(app_module, mentor_client):
+    draft = save(mentor_client, 'draft only')
+    mentor_client.post('/delete_question', json={'question_id': draft})
+    question_id = save(mentor_client)
+    mentor_client.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+    mentor_client.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+    mentor_client.post('/publish_question', json={'question_id': question_id, 'action': 'unpublish'})
+    mentor_client.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+    mentor_client.post('/delete_question', json={'question_id': question_id})
+
+    events = app_module.fetch_change_events(0, 100)
+    assert [e['kind'] for e in events] == ['published', 'unpublished', 'published', 'deleted']
+    assert {e['question_set_id'] for e in events} == {question_id}
+    # The set is gone, so no card is sent for its earlier publish events
+    assert not any('card' in e for e in events)
+
+
+def test_stream_delivers_published_cards(app_module, mentor_client, student_client, monkeypatch):
+    monkeypatch.setattr(app_module, 'FEED_STREAM_SECONDS', 0.5)
+    monkeypatch.setattr(app_module.change_feed, 'interval', 0.01)
+    html = student_client.get('/student').get_data(as_text=True)
+    assert 'data-feed-seq="0"' in html
+    question_id = save(mentor_client)
+    mentor_client.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+
+    # Once it has sent events the stream ends instead of holding its thread
+    monkeypatch.setattr(app_module, 'FEED_STREAM_SECONDS', 30)
+    start = time.monotonic()
+    response = student_client.get('/feed/stream?after=0')
+    assert response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert time.monotonic() - start < 5
+    assert app_module.change_feed.listeners == 0
+    assert 'id: 1\nevent: published\n' in body
+    data = json.loads(body.split('event: published\ndata: ')[1].split('\n')[0])
+    assert data['question_set_id'] == question_id
+    assert f'data-set-id="{question_id}"' in data['card']
+
+
+def test_stream_turned_away_with_a_retry_when_too_many_are_open(app_module, student_client, monkeypatch):
+    monkeypatch.setattr(app_module, 'FEED_MAX_STREAMS', 0)
+    response = student_client.get('/feed/stream')
+    # A non-200 would make EventSource stop reconnecting
+    assert response.status_code == 200 and response.mimetype == 'text/event-stream'
+    body = response.get_data(as_text=True)
+    assert 'event: busy\n' in body
+    retry_ms = int(body.split('retry: ')[1].split('\n')[0])
+    assert retry_ms >= app_module.FEED_BUSY_RETRY_SECONDS * 500
+
+
+def test_idle_streams_are_short_and_reconnect(app_module, student_client, monkeypatch):
+    monkeypatch.setattr(app_module, 'FEED_STREAM_SECONDS', 0.2)
+    start = time.monotonic()
+    body = student_client.get('/feed/stream?after=0').get_data(as_text=True)
+    assert time.monotonic() - start < 2
+    retry_ms = int(body.split('retry: ')[1].split('\n')[0])
+    assert app_module.FEED_RETRY_SECONDS * 500 <= retry_ms <= app_module.FEED_RETRY_SECONDS * 1500
+    assert 'event:' not in body
+
+
+def test_poller_lingers_between_reconnects():
+    change_feed = make_feed([], linger=60)
+    assert not change_feed.active()
+    with change_feed.listening():
+        assert change_feed.active()
+    assert change_feed.active()
+    change_feed.linger = 0
+    assert not change_feed.active()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the liveness, readiness and deep health checks
+"""
+
+import health
+
+
+class _Store:
+    """Minimal shared-state stand-in: get/set/add with no expiry."""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.values[key] = value
+
+    def add(self, key, value, ttl=None):
+        return self.values.setdefault(key, value)
+
+
+def test_deep_check_reuses_results_and_limits_probes():
+    calls = []
+    check = health.DeepCheck(_Store(), lambda: calls.append(1) or 'OK', max_age=60, min_interval=60)
+    first = check.run()
+    assert first['ok'] and first['result'] == 'OK' and not first['cached']
+    assert check.run()['cached']
+    # fresh asks for a new probe, but only once per min_interval
+    assert check.run(fresh=True)['cached']
+    assert len(calls) == 1
+
+    def fail():
+        raise RuntimeError('upstream down')
+    failing = health.DeepCheck(_Store(), fail, max_age=0, min_interval=0)
+    result = failing.run()
+    assert not result['ok'] and result['error'] == 'upstream down'
+    assert result['duration_ms'] >= 0
+
+
+def test_live_and_ready(app_module):
+    client = app_module.app.test_client()
+    live = client.get('/health/live')
+    assert live.status_code == 200 and live.get_json()['status'] == 'alive'
+    ready = client.get('/health/ready').get_json()
+    assert ready['success'] and ready['checks']['database']['ok']
+    assert 'duration_ms' in ready['checks']['database']
+
+
+def test_deep_check_does_not_call_the_model_on_every_poll(app_module, fake_backend):
+    client = app_module.app.test_client()
+    first = client.get('/health/genai/test').get_json()
+    assert first['success'] and first['result'] and not first['cached']
+    assert fake_backend.calls == 1
+    for _ in range(3):
+        assert client.get('/health/genai/test').get_json()['cached']
+    assert client.get('/health/genai/test?fresh=1').get_json()['cached']
+    assert fake_backend.calls == 1
+
+    # Readiness reports the deep check result without calling the model
+    model = client.get('/health/ready').get_json()['checks']['model']
+    assert model['ok'] and model['last_deep_check']['ok'] and model['last_call']['ok']
+    assert fake_backend.calls == 1
+
+
+def test_ready_reports_failed_model_calls_as_degraded(app_module, fake_backend):
+    fake_backend.failure_rate = 1.0
+    client = app_module.app.test_client()
+    deep = client.get('/health/genai/test')
+    assert deep.status_code == 503 and 'error' in deep.get_json()
+    ready = client.get('/health/ready')
+    assert ready.status_code == 200
+    assert ready.get_json()['status'] == 'degraded'
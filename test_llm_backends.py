@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Tests for the pluggable completion backends
+"""
+
+import inspect
+import json
+import threading
+import time
+import types
+
+import pytest
+
+import llm_backends
+import metrics
+import prompts
+
+
+def test_fake_backend_is_deterministic():
+    prompt = prompts.render_generate_prompt('Sliding window', 'Amazon', 4, ['Easy', 'Hard', 'Hard', 'Medium'])
+    first = llm_backends.FakeBackend().generate(prompt, 800)
+    second = llm_backends.FakeBackend(seed=7).generate(prompt, 800)
+    assert first == second
+    questions = json.loads(first)
+    assert len(questions) == 4
+    assert sorted(q['difficulty_level'] for q in questions) == ['Easy', 'Hard', 'Hard', 'Medium']
+    assert all(q['company'] == 'Amazon' for q in questions)
+
+
+def test_fake_backend_extraction_prompt():
+    text = llm_backends.FakeBackend().generate(prompts.EXTRACT_PROMPT.render(query='two sum at Google'), 200)
+    assert json.loads(text) == {'company': 'Google', 'summary': 'two sum at Google'}
+
+
+def test_fake_backend_failure_and_malformed_rates():
+    prompt = prompts.render_generate_prompt('Graphs', 'General', 3)
+    with pytest.raises(llm_backends.FakeBackendError):
+        llm_backends.FakeBackend(failure_rate=1.0).generate(prompt, 800)
+    with pytest.raises(ValueError):
+        json.loads(llm_backends.FakeBackend(malformed_rate=1.0).generate(prompt, 800))
+
+
+def test_search_end_to_end_with_fake_backend(app_module, mentor_client, fake_backend, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    response = mentor_client.post('/search', json={'query': 'LRU cache for Google', 'count': 8})
+    data = response.get_json()
+    assert response.status_code == 200, data
+    assert len(data['questions']) == 8
+    assert all(q['company'] == 'Google' for q in data['questions'])
+    # Two sub-prompts plus the extraction call
+    assert fake_backend.calls == 3
+
+
+def test_timeout_falls_through_to_next_candidate():
+    prompt = prompts.render_generate_prompt('Graphs', 'General', 3)
+    backend = llm_backends.FakeBackend(models=['hung', 'ok'], model_latency={'hung': 2.0}, timeout=0.1)
+    start = time.perf_counter()
+    assert len(json.loads(backend.generate(prompt, 800))) == 3
+    assert time.perf_counter() - start < 1.0
+    with pytest.raises(llm_backends.CallTimeoutError):
+        llm_backends.FakeBackend(latency=2.0, timeout=0.1).generate(prompt, 800)
+
+
+class BlockingBackend(llm_backends.FakeBackend):
+    """Fake whose 'hung' model never answers until `release` is set."""
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.release = threading.Event()
+
+    def _call_model(self, model_name, prompt, max_output_tokens):
+        if model_name == 'hung':
+            self.release.wait()
+        return super()._call_model(model_name, prompt, max_output_tokens)
+
+
+def test_hung_calls_do_not_starve_later_ones(monkeypatch):
+    prompt = prompts.render_generate_prompt('Graphs', 'General', 3)
+    monkeypatch.setattr(llm_backends, '_call_pool', llm_backends.CallPool(max_workers=1, max_abandoned=3))
+    hung = BlockingBackend(models=['hung'], timeout=0.05)
+    healthy = llm_backends.FakeBackend(timeout=1)
+    try:
+        for _ in range(2):
+            with pytest.raises(llm_backends.CallTimeoutError):
+                hung.generate(prompt, 800)
+        # Both abandoned calls still hold threads, and live calls still get one
+        assert llm_backends._call_pool.abandoned_count() == 2
+        for _ in range(3):
+            assert len(json.loads(healthy.generate(prompt, 800))) == 3
+        with pytest.raises(llm_backends.CallTimeoutError):
+            hung.generate(prompt, 800)
+        # At the limit, calls fail at once instead of queueing behind the stuck ones
+        start = time.perf_counter()
+        with pytest.raises(llm_backends.CallPoolSaturatedError):
+            healthy.generate(prompt, 800)
+        assert time.perf_counter() - start < 0.05
+    finally:
+        hung.release.set()
+    deadline = time.monotonic() + 2
+    while llm_backends._call_pool.abandoned_count() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(json.loads(healthy.generate(prompt, 800))) == 3
+
+
+def test_no_hedge_while_the_pool_is_busy(monkeypatch):
+    prompt = prompts.render_generate_prompt('Graphs', 'General', 3)
+    monkeypatch.setattr(llm_backends, '_call_pool', llm_backends.CallPool(max_workers=1, max_abandoned=2))
+    backend = llm_backends.FakeBackend(models=['slow', 'fast'], model_latency={'slow': 0.2},
+                                       timeout=5, hedge=True, hedge_delay=0.01)
+    assert len(json.loads(backend.generate(prompt, 800))) == 3
+    assert backend.calls == 1
+
+
+def test_hedge_fires_after_delay_and_fast_candidate_wins():
+    prompt = prompts.render_generate_prompt('Graphs', 'General', 3)
+    won = metrics.LLM_HEDGES.value(outcome='hedge_won')
+    backend = llm_backends.FakeBackend(models=['slow', 'fast'], model_latency={'slow': 2.0},
+                                       timeout=5, hedge=True, hedge_delay=0.05)
+    start = time.perf_counter()
+    assert len(json.loads(backend.generate(prompt, 800))) == 3
+    assert time.perf_counter() - start < 1.0
+    assert metrics.LLM_HEDGES.value(outcome='hedge_won') == won + 1
+
+    # A primary that answers within its delay is never hedged
+    quick = llm_backends.FakeBackend(models=['a', 'b'], hedge=True, hedge_delay=1.0)
+    quick.generate(prompt, 800)
+    assert quick.calls == 1
+
+
+def test_hedge_skips_responses_that_fail_validation():
+    prompt = prompts.render_generate_prompt('Graphs', 'General', 3)
+    seen = []
+
+    def validate(text):
+        seen.append(text)
+        if len(seen) == 1:
+            raise ValueError('bad parse')
+
+    backend = llm_backends.FakeBackend(models=['a', 'b'], hedge=True, hedge_delay=1.0)
+    start = time.perf_counter()
+    backend.generate(prompt, 800, validate=validate)
+    # The invalid primary response starts the next candidate without waiting for the delay
+    assert backend.calls == 2 and len(seen) == 2
+    assert time.perf_counter() - start < 0.5
+
+
+def test_hedge_delay_follows_p95_latency():
+    backend = llm_backends.FakeBackend(models=['a', 'b'], hedge=True, hedge_delay=2.0, timeout=10)
+    assert backend.delay_for('a') == 2.0
+    for i in range(100):
+        backend.latencies.record('a', (i + 1) / 100)
+    assert backend.delay_for('a') == pytest.approx(0.96)
+
+
+def test_gemini_backend_loads_the_sdk_on_first_use(monkeypatch):
+    configured = []
+
+    class FakeSDK:
+        @staticmethod
+        def configure(api_key):
+            configured.append(api_key)
+
+        @staticmethod
+        def list_models():
+            return [types.SimpleNamespace(name='models/gemini-x', supported_generation_methods=['generateContent'])]
+
+    monkeypatch.setattr(llm_backends, 'genai_installed', lambda: True)
+    monkeypatch.setattr(llm_backends, 'load_genai', lambda: FakeSDK)
+    backend = llm_backends.GeminiBackend('key')
+    assert configured == []
+    assert backend.model_candidates == ['gemini-x']
+    assert backend.model_candidates == ['gemini-x']
+    assert configured == ['key']
+
+
+# Named keyword parameters of GenerativeModel.generate_content in the pinned
+# google-generativeai==0.3.2. Its **kwargs are copied into the request proto,
+# so anything else (e.g. request_options) fails every call.
+PINNED_GENERATE_CONTENT_PARAMS = {'generation_config', 'safety_settings', 'stream'}
+
+
+def _generate_content_params():
+    try:
+        import google.generativeai as genai
+    except Exception:
+        return PINNED_GENERATE_CONTENT_PARAMS
+    signature = inspect.signature(genai.GenerativeModel.generate_content)
+    return {name for name, p in signature.parameters.items() if p.kind == p.KEYWORD_ONLY}
+
+
+def test_gemini_call_only_passes_arguments_the_sdk_accepts(monkeypatch):
+    calls = []
+
+    class FakeModel:
+        def __init__(self, name):
+            pass
+
+        def generate_content(self, contents, **kwargs):
+            calls.append(kwargs)
+            return types.SimpleNamespace(text='OK')
+
+    sdk = types.SimpleNamespace(configure=lambda api_key: None, GenerativeModel=FakeModel, list_models=lambda: [])
+    monkeypatch.setattr(llm_backends, 'genai_installed', lambda: True)
+    monkeypatch.setattr(llm_backends, 'load_genai', lambda: sdk)
+    backend = llm_backends.GeminiBackend('key', timeout=30)
+    assert backend.generate('prompt', 100) == 'OK'
+    assert set(calls[0]) <= _generate_content_params()
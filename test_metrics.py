@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Tests for request/SQL/LLM instrumentation and the /metrics endpoint
+"""
+
+import metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = metrics.Histogram('demo_seconds', 'Demo.', ('route',), buckets=(0.1, 1.0))
+    h.observe(0.05, route='/a')
+    h.observe(0.5, route='/a')
+    lines = h.render()
+    assert 'demo_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'demo_seconds_bucket{route="/a",le="+Inf"} 2' in lines
+    assert 'demo_seconds_count{route="/a"} 2' in lines
+
+
+def test_metrics_endpoint_reports_routes_sql_and_llm(app_module, mentor_client, fake_backend, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    metrics.REGISTRY.reset()
+    mentor_client.get('/mentor')
+    mentor_client.post('/search', json={'query': 'two sum'})
+
+    response = mentor_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    body = response.get_data(as_text=True)
+    assert 'http_request_duration_seconds_count{route="/mentor",method="GET"} 1' in body
+    assert 'http_requests_total{route="/search",method="POST",status="200"} 1' in body
+    assert 'db_queries_total{operation="SELECT"}' in body
+    assert 'llm_call_duration_seconds_count{backend="fake",model="fake-model",outcome="ok"} 2' in body
+    assert 'llm_response_parse_seconds_count{kind="questions"} 1' in body
+    assert metrics.DB_QUERIES_PER_REQUEST.snapshot(route='/mentor')['sum'] >= 2
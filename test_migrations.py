@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Tests for the schema migration runner
+"""
+
+from sqlalchemy import create_engine, inspect
+
+import migrations
+
+
+def test_fresh_database_gets_every_table_and_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'fresh.db'}")
+    applied = migrations.upgrade(engine, log=lambda message: None)
+    assert [m.version for m in applied] == [m.version for m in migrations.discover()]
+    assert migrations.current_version(engine) == migrations.latest_version()
+    tables = set(inspect(engine).get_table_names())
+    assert {'user', 'question_set', 'question_progress', 'question_rollup', 'schema_version', 'shared_state'} <= tables
+    indexes = {i['name'] for i in inspect(engine).get_indexes('question_set')}
+    assert 'ix_question_set_mentor_created' in indexes
+    # Nothing left to do on the next start
+    assert migrations.upgrade(engine, log=lambda message: None) == []
+
+
+def test_target_stamp_and_status(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'partial.db'}")
+    migrations.upgrade(engine, target=1, log=lambda message: None)
+    assert migrations.current_version(engine) == 1
+    assert [applied for _, applied in migrations.status(engine)][:2] == [True, False]
+    migrations.stamp(engine, 2)
+    assert migrations.current_version(engine) == 2
+    assert 'ix_question_set_mentor_created' not in {i['name'] for i in inspect(engine).get_indexes('question_set')}
+
+
+def test_batch_update_pages_through_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'batch.db'}")
+    with engine.begin() as conn:
+        conn.exec_driver_sql('CREATE TABLE t (id INTEGER PRIMARY KEY, a INTEGER, b INTEGER)')
+        conn.exec_driver_sql('INSERT INTO t (a) VALUES ' + ', '.join(f'({i})' for i in range(25)))
+    ctx = migrations.MigrationContext(engine, batch_size=10, log=lambda message: None)
+    updated = ctx.batch_update('t', ['a'], lambda row: {'b': row.a * 2} if row.a % 2 == 0 else None,
+                               where=lambda t: t.c.b.is_(None))
+    assert updated == 13
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql('SELECT SUM(b) FROM t').scalar() == sum(i * 2 for i in range(0, 25, 2))
+
+
+def test_cli_upgrade_and_status(app_module):
+    runner = app_module.app.test_cli_runner()
+    result = runner.invoke(args=['db', 'upgrade'])
+    assert result.exit_code == 0
+    assert f'schema version is {app_module.SCHEMA_VERSION}' in result.output
+    result = runner.invoke(args=['db', 'status'])
+    assert '[ ]' not in result.output
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests for speculative prefetch of follow-up searches
+"""
+
+import threading
+import time
+
+import prefetch
+
+
+def test_jobs_wait_for_idle_capacity():
+    gauge = prefetch.UpstreamGauge()
+    outcomes = []
+    prefetcher = prefetch.Prefetcher(gauge, capacity=2, poll_interval=0.01, on_outcome=outcomes.append)
+    ran = threading.Event()
+    busy = gauge.track()
+    busy.__enter__()
+    assert prefetcher.submit('a', ran.set, cost=2)
+    assert not prefetcher.submit('a', ran.set, cost=2)
+    time.sleep(0.1)
+    assert not ran.is_set()
+    busy.__exit__(None, None, None)
+    assert prefetcher.drain(timeout=2)
+    assert ran.is_set() and outcomes == ['completed']
+
+
+def test_jobs_expire_when_upstream_stays_busy():
+    gauge = prefetch.UpstreamGauge()
+    outcomes = []
+    prefetcher = prefetch.Prefetcher(gauge, capacity=0, max_wait=0.05, poll_interval=0.01,
+                                     on_outcome=outcomes.append)
+    prefetcher.submit('a', lambda: None)
+    assert prefetcher.drain(timeout=2)
+    assert outcomes == ['expired']
+
+
+def test_related_queries_use_topics_then_categories(app_module):
+    questions = [
+        {'topic': 'Two Sum', 'category': 'Array'},
+        {'topic': '3Sum', 'category': 'Array'},
+        {'topic': '4Sum Google', 'category': 'Two Pointers'},
+    ]
+    # The query itself is skipped; the company is added where missing
+    assert app_module.related_queries('two sum google', questions, 'Google', 4) == [
+        '3Sum Google', '4Sum Google', 'Array Google', 'Two Pointers Google']
+    assert app_module.related_queries('two sum', questions, 'General', 2) == ['3Sum', '4Sum Google']
+
+
+def test_follow_up_search_is_served_from_prefetch(app_module, mentor_client, fake_backend, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_module, 'SEARCH_PREFETCH', 2)
+    first = mentor_client.post('/search', json={'query': 'two sum google'}).get_json()
+    assert len(first['related_queries']) == 2
+    assert app_module.search_prefetcher.drain(timeout=10)
+
+    calls = fake_backend.calls
+    follow_up = mentor_client.post('/search', json={'query': first['related_queries'][0]}).get_json()
+    assert follow_up['cached'] is True and follow_up['prefetched'] is True
+    assert follow_up['questions']
+    assert app_module.search_prefetcher.drain(timeout=10)
+    # The hit queues the follow-up's own neighbours in the background
+    assert fake_backend.calls > calls
+
+
+def test_prefetch_respects_per_minute_budget(app_module, fake_backend, monkeypatch):
+    monkeypatch.setattr(app_module, 'SEARCH_PREFETCH', 3)
+    monkeypatch.setattr(app_module, 'PREFETCH_PER_MINUTE', 1)
+    with app_module.app.app_context():
+        assert app_module.schedule_prefetch(['a google', 'b google', 'c google'], 5, None, None) == 1
+        assert app_module.search_prefetcher.drain(timeout=10)
+        assert app_module.schedule_prefetch(['d google'], 5, None, None) == 0
+
+
+def test_prefetch_usage_is_attributed_to_prefetch(app_module, fake_backend, monkeypatch):
+    monkeypatch.setattr(app_module, 'SEARCH_PREFETCH', 1)
+    app_module.prompts.usage.reset()
+    with app_module.app.app_context():
+        assert app_module.schedule_prefetch(['graphs amazon'], 5, None, None) == 1
+        assert app_module.search_prefetcher.drain(timeout=10)
+    usage = app_module.prompts.usage.snapshot()
+    assert 'unknown' not in usage
+    # The extraction call and the generation call
+    assert usage['search_prefetch']['calls'] == 2
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Tests for opt-in request profiling
+"""
+
+import time
+
+import pytest
+
+import profiling
+
+
+@pytest.fixture
+def profiler(app_module, tmp_path, monkeypatch):
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    store = profiling.ProfileStore(str(tmp_path / 'profiles'), capacity=3)
+    profiler = profiling.RequestProfiler(store, sample_interval=0.001)
+    monkeypatch.setattr(app_module, 'profiler', profiler)
+    return profiler
+
+
+def test_ring_buffer_keeps_newest(tmp_path):
+    store = profiling.ProfileStore(str(tmp_path), capacity=2)
+    for i in range(4):
+        store.save({'id': f'p{i}', 'path': f'/{i}'})
+    assert [p['id'] for p in store.list()] == ['p3', 'p2']
+    assert store.get('p0') is None
+
+
+def test_disabled_profiler_stores_nothing(app_module, profiler):
+    client = app_module.app.test_client()
+    response = client.get('/login')
+    assert 'X-Profile-Id' not in response.headers
+    assert profiler.store.list() == []
+
+
+def test_header_profiles_only_for_admins(app_module, profiler):
+    client = app_module.app.test_client()
+    assert 'X-Profile-Id' not in client.get('/login', headers={'X-Profile': '1'}).headers
+
+    response = client.get('/login', headers={'X-Profile': '1', 'X-Admin-Token': 'secret'})
+    profile_id = response.headers['X-Profile-Id']
+    listed = client.get('/admin/profiles', headers={'X-Admin-Token': 'secret'}).get_json()['profiles']
+    assert listed[0]['id'] == profile_id and listed[0]['route'] == '/login'
+    detail = client.get(f'/admin/profiles/{profile_id}', headers={'X-Admin-Token': 'secret'}).get_json()
+    assert 'cumulative' in detail['profile']['stats']
+
+
+def test_threshold_samples_only_slow_requests(app_module, profiler, monkeypatch):
+    client = app_module.app.test_client()
+    headers = {'X-Admin-Token': 'secret'}
+    client.post('/admin/profiling', json={'threshold_ms': 20}, headers=headers)
+
+    assert 'X-Profile-Id' not in client.get('/login').headers
+
+    original = app_module.render_template
+
+    def slow_render(*args, **kwargs):
+        time.sleep(0.08)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, 'render_template', slow_render)
+    response = client.get('/login')
+    profile = profiler.store.get(response.headers['X-Profile-Id'])
+    assert profile['mode'] == 'sampling'
+    assert any('slow_render' in s['stack'] for s in profile['stacks'])
+    assert client.get('/admin/profiling').status_code == 403
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Tests for buffered student progress tracking
+"""
+
+from sqlalchemy import create_engine, event
+
+import progress
+import shared_state
+
+
+QUESTIONS = [
+    {'url': f'https://leetcode.com/problems/p{i}/', 'platform': 'LeetCode', 'topic': f'P{i}',
+     'difficulty_level': 'Easy', 'company': 'General', 'category': 'Array'}
+    for i in range(4)
+]
+
+
+def test_pending_ops_last_update_wins():
+    ops = progress._PendingOps()
+    ops.update(1, 'solved')
+    ops.update(1, 'todo')
+    ops.update(2, 'attempted')
+    assert ops.apply(0b0010, 0b0010) == (0, 0b0100)
+
+
+def test_tracker_buffers_until_flush():
+    written = []
+    tracker = progress.ProgressTracker(
+        lambda user_id: {},
+        lambda batch: written.append(batch) or {k: ops.apply(0, 0) for k, ops in batch.items()},
+        flush_interval=0,
+    )
+    for i in range(3):
+        tracker.record(1, 10, i, 'solved')
+    assert tracker.solved_counts(1) == {10: 3}
+    assert written == []
+    assert tracker.flush() == 1
+    assert len(written) == 1
+    assert tracker.solved_counts(1) == {10: 3}
+
+
+def publish(app_module, mentor_client):
+    question_id = mentor_client.post('/save_search', json={
+        'query': 'practice', 'summary': 'practice', 'questions': QUESTIONS
+    }).get_json()['question_id']
+    mentor_client.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+    return question_id
+
+
+def test_progress_round_trip(app_module, mentor_client, student_client):
+    question_id = publish(app_module, mentor_client)
+    for index in (0, 2):
+        response = student_client.post('/progress', json={'question_id': question_id, 'index': index, 'status': 'solved'})
+        assert response.get_json() == {'success': True, 'solved': index // 2 + 1, 'question_count': 4}
+    student_client.post('/progress', json={'question_id': question_id, 'index': 3, 'status': 'attempted'})
+
+    # Visible before the flush...
+    assert app_module.progress_tracker.pending_count() == 1
+    assert b'2/4 solved' in student_client.get('/student').data
+
+    # ...and persisted as one row after it
+    app_module.progress_tracker.flush()
+    with app_module.app.app_context():
+        row = app_module.db.session.query(app_module.QuestionProgress).one()
+        assert (row.solved_mask, row.attempted_mask) == (0b0101, 0b1101)
+    details = student_client.get(f'/get_published_question_details/{question_id}').get_json()
+    assert details['question']['progress'] == ['solved', 'todo', 'solved', 'attempted']
+
+
+def test_progress_validation(app_module, mentor_client, student_client):
+    question_id = publish(app_module, mentor_client)
+    assert student_client.post('/progress', json={'question_id': question_id, 'index': 9, 'status': 'solved'}).status_code == 400
+    assert student_client.post('/progress', json={'question_id': question_id, 'index': 0, 'status': 'done'}).status_code == 400
+    assert student_client.post('/progress', json={'question_id': 999, 'index': 0, 'status': 'solved'}).status_code == 404
+
+
+def test_trackers_in_other_processes_see_each_others_flushes():
+    rows = {}
+
+    def apply_batch(batch):
+        written = {}
+        for key, ops in batch.items():
+            written[key] = rows[key] = ops.apply(*rows.get(key, (0, 0)))
+        return written
+
+    def load_user(user_id):
+        return {set_id: masks for (uid, set_id), masks in rows.items() if uid == user_id}
+
+    versions = progress.SharedVersions(shared_state.MemoryBackend())
+    worker_a, worker_b = (progress.ProgressTracker(load_user, apply_batch, flush_interval=0, versions=versions)
+                          for _ in range(2))
+    assert worker_a.solved_counts(1) == {}
+    worker_b.record(1, 10, 0, 'solved')
+    worker_b.flush()
+    assert worker_a.solved_counts(1) == {10: 1}
+    worker_a.record(1, 10, 1, 'solved')
+    worker_a.flush()
+    assert worker_b.solved_counts(1) == {10: 2}
+    assert worker_a.solved_counts(1) == {10: 2}
+
+
+def test_flush_publishes_versions_in_one_statement(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'state.db'}")
+    store = shared_state.DatabaseBackend(lambda: engine)
+    store.create_table()
+    statements = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    tracker = progress.ProgressTracker(
+        lambda user_id: {}, lambda batch: {k: ops.apply(0, 0) for k, ops in batch.items()},
+        flush_interval=0, versions=progress.SharedVersions(store))
+    for user_id in range(200):
+        tracker.record(user_id, 10, 0, 'solved')
+    assert tracker.flush() == 200
+    assert len(statements) == 1 and statements[0].lstrip().upper().startswith('INSERT')
+    assert store.get('progress:v:0') != store.get('progress:v:199') is not None
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Tests for prompt templates and token-budget accounting
+"""
+
+import pytest
+
+import prompts
+
+
+def test_generate_prompt_uses_requested_count():
+    text = prompts.render_generate_prompt("Two pointers", "Google", 12)
+    assert "exactly 12 coding problems" in text
+    assert '"company": "Google"' in text
+    assert "(10 more questions" in text
+    # Escaped braces in the example block must survive precompilation
+    assert '{"url": "https://leetcode.com/problems/palindrome-partitioning/"' in text
+
+
+def test_template_reports_missing_fields():
+    with pytest.raises(KeyError):
+        prompts.EXTRACT_PROMPT.render()
+
+
+def test_output_budget_scales_with_count():
+    assert prompts.output_budget(5) < prompts.output_budget(20)
+    assert prompts.output_budget(10_000) == prompts.MAX_OUTPUT_TOKENS
+    assert prompts.output_budget("bad") == prompts.DEFAULT_OUTPUT_TOKENS
+
+
+def test_usage_stats_aggregate_per_endpoint():
+    stats = prompts.UsageStats()
+    stats.record('search_questions', 100, 50, 0.5)
+    stats.record('search_questions', 300, 150, 1.5, error=True)
+    snap = stats.snapshot()['search_questions']
+    assert snap['calls'] == 2
+    assert snap['errors'] == 1
+    assert snap['input_tokens'] == 400
+    assert snap['avg_output_tokens'] == 100
+    assert snap['latency_max'] == 1.5
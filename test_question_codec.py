@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Tests for the compact questions_data encoding
+"""
+
+import json
+
+import pytest
+
+import question_codec
+
+QUESTIONS = [
+    {'url': 'https://leetcode.com/problems/two-sum/', 'platform': 'LeetCode', 'topic': 'Two Sum',
+     'difficulty_level': 'Easy', 'company': 'Google', 'category': 'Array'},
+    {'url': 'https://www.geeksforgeeks.org/3sum/', 'platform': 'GeeksforGeeks', 'topic': '3Sum',
+     'difficulty_level': 'Medium', 'company': 'Capgemini', 'category': 'Two Pointers'},
+]
+
+
+@pytest.mark.parametrize('questions', [
+    QUESTIONS,
+    QUESTIONS * 20,
+    [],
+    [{}, {}],
+    # Missing keys, extra keys and non-string values in interned fields
+    [{'topic': 'a', 'platform': 'LeetCode'}, {'topic': 'b', 'note': None}, {'platform': 7}],
+    # Shapes the columnar form doesn't cover are stored as plain JSON
+    [1, 'two'],
+    {'not': 'a list'},
+])
+def test_round_trip(questions):
+    for compress in (True, False):
+        assert question_codec.decode(question_codec.encode(questions, compress=compress)) == questions
+
+
+def test_compact_form_is_smaller_and_legacy_json_still_reads():
+    stored = question_codec.encode(QUESTIONS * 10)
+    assert question_codec.is_compact(stored)
+    assert len(stored) < len(json.dumps(QUESTIONS * 10)) / 4
+    assert question_codec.decode(json.dumps(QUESTIONS)) == QUESTIONS
+
+
+def test_corrupt_data_raises_value_error():
+    for stored in ('q1z:!!!', 'q1:[1,2]', 'q1:[9,0,[],[],{}]', 'not json'):
+        with pytest.raises(ValueError):
+            question_codec.decode(stored)
+
+
+def test_saved_sets_are_stored_compactly(app_module, mentor_client):
+    question_id = mentor_client.post('/save_search', json={
+        'query': 'q', 'summary': 's', 'questions': QUESTIONS}).get_json()['question_id']
+    with app_module.app.app_context():
+        row = app_module.db.session.get(app_module.QuestionSet, question_id)
+        assert question_codec.is_compact(row.questions_data)
+    details = mentor_client.get(f'/get_question_details/{question_id}').get_json()
+    assert details['question']['questions_data'] == QUESTIONS
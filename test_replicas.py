@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests for routing read-only views to a read replica
+"""
+
+import sqlite3
+
+import pytest
+
+
+def save_and_publish(client, query):
+    question_id = client.post('/save_search', json={
+        'query': query, 'summary': query,
+        'questions': [{'topic': 'Two Sum', 'difficulty': 'Easy', 'url': 'https://leetcode.com/problems/two-sum/'}],
+    }).get_json()['question_id']
+    client.post('/publish_question', json={'question_id': question_id, 'action': 'publish'})
+    return question_id
+
+
+def clear_stickiness(client):
+    with client.session_transaction() as sess:
+        sess.pop('db_primary_until', None)
+
+
+@pytest.fixture
+def replica(app_module, tmp_path):
+    """Configure a replica; returns a function that snapshots the primary into it."""
+    path = tmp_path / 'replica.db'
+    with app_module.app.app_context():
+        primary = app_module.db.engine.url.database
+
+    def snapshot():
+        source = sqlite3.connect(primary)
+        target = sqlite3.connect(str(path))
+        source.backup(target)
+        source.close()
+        target.close()
+
+    snapshot()
+    app_module.configure_replicas([f'sqlite:///{path}'])
+    yield snapshot
+    app_module.configure_replicas([])
+
+
+def test_reads_go_to_replica_and_writers_stick_to_primary(app_module, mentor_client, student_client, replica):
+    old = save_and_publish(mentor_client, 'replicated set')
+    replica()
+    new = save_and_publish(mentor_client, 'not yet replicated')
+    clear_stickiness(student_client)
+
+    html = student_client.get('/student').get_data(as_text=True)
+    assert 'replicated set' in html and 'not yet replicated' not in html
+    assert student_client.get(f'/get_published_question_details/{old}').status_code == 200
+    assert student_client.get(f'/get_published_question_details/{new}').status_code == 404
+
+    # The mentor just wrote, so they read their own change from the primary
+    assert mentor_client.get(f'/get_published_question_details/{new}').status_code == 200
+    clear_stickiness(mentor_client)
+    assert mentor_client.get(f'/get_published_question_details/{new}').status_code == 404
+
+
+def test_failed_replica_falls_back_to_primary(app_module, student_client, mentor_client, tmp_path):
+    question_id = save_and_publish(mentor_client, 'primary only')
+    app_module.configure_replicas([f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"])
+    try:
+        clear_stickiness(student_client)
+        response = student_client.get(f'/get_published_question_details/{question_id}')
+        assert response.status_code == 200
+        assert app_module.read_replicas.choose() is None
+    finally:
+        app_module.configure_replicas([])
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+In-process tests for /search option parsing and sub-prompt merging
+"""
+
+import json
+
+import pytest
+
+import app as app_module
+
+
+def test_parse_options_defaults():
+    assert app_module._parse_search_options({'query': 'x'}) == (5, None, None)
+
+
+def test_parse_options_difficulty_counts_define_count():
+    count, difficulties, platforms = app_module._parse_search_options(
+        {'difficulty': {'easy': 2, 'Hard': 1}, 'platforms': 'LeetCode'}
+    )
+    assert count == 3
+    assert difficulties == ['Easy', 'Easy', 'Hard']
+    assert platforms == ['LeetCode']
+
+
+def test_parse_options_difficulty_weights_are_proportional():
+    count, difficulties, _ = app_module._parse_search_options(
+        {'count': 10, 'difficulty': {'Easy': 1, 'Medium': 1, 'Hard': 1}}
+    )
+    assert count == 10
+    assert len(difficulties) == 10
+    assert difficulties.count('Easy') == 4
+
+
+@pytest.mark.parametrize('body', [
+    {'count': 0},
+    {'count': 500},
+    {'count': 'many'},
+    {'difficulty': {'Impossible': 1}},
+    {'platforms': 5},
+])
+def test_parse_options_rejects_bad_input(body):
+    with pytest.raises(ValueError):
+        app_module._parse_search_options(body)
+
+
+def test_plan_batches_splits_and_interleaves():
+    batches = app_module._plan_batches(12, ['Easy'] * 4 + ['Medium'] * 4 + ['Hard'] * 4)
+    assert [n for n, _ in batches] == [4, 4, 4]
+    assert all(set(d) == {'Easy', 'Medium', 'Hard'} for _, d in batches)
+    assert app_module._plan_batches(3) == [(3, None)]
+
+
+def test_url_key_ignores_www_and_trailing_slash():
+    assert (app_module._question_url_key('https://www.leetcode.com/problems/two-sum/')
+            == app_module._question_url_key('https://leetcode.com/problems/two-sum'))
+
+
+def test_generate_questions_merges_and_dedupes(monkeypatch):
+    def fake_completion(prompt, max_output_tokens=None, endpoint=None, validate=None, cache=True):
+        count = int(prompt.split('exactly ', 1)[1].split(' ', 1)[0])
+        part = prompt.split('This is part ', 1)[1].split(' ', 1)[0] if 'This is part' in prompt else '1'
+        # The three planned parts all repeat "two-sum", so merging must drop the
+        # duplicates and the top-up part (4 of 4) fills the gap
+        items = []
+        if part != '4':
+            items.append({'url': 'https://www.leetcode.com/problems/two-sum', 'platform': 'LeetCode',
+                          'topic': 'Two Sum', 'difficulty_level': 'Easy', 'category': 'Array'})
+        for i in range(count - len(items)):
+            items.append({'url': f'https://leetcode.com/problems/p{part}-{i}/', 'platform': 'LeetCode',
+                          'topic': f'P{part}-{i}', 'difficulty_level': 'Medium', 'category': 'Array'})
+        return json.dumps(items)
+
+    monkeypatch.setattr(app_module, 'get_completion', fake_completion)
+    questions = app_module._generate_questions('arrays', 'Google', 12)
+    urls = [q['url'] for q in questions]
+    assert len(questions) == 12
+    assert len(set(urls)) == 12
+    assert all(q['company'] == 'Google' for q in questions)
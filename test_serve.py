@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Tests for the waitress launcher
+"""
+
+import serve
+from benchmarks import bench_server
+
+
+def test_options_from_env_and_flags(monkeypatch):
+    monkeypatch.setenv('WAITRESS_THREADS', '16')
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    args = serve.build_parser().parse_args(['--backlog', '64', '--connection-limit', '0'])
+    assert args.workers == 3
+    assert serve.waitress_options(args) == {
+        'threads': 16, 'connection_limit': 1, 'channel_timeout': 120, 'backlog': 64,
+    }
+
+
+def test_schema_is_only_upgraded_when_behind(app_module):
+    with app_module.app.app_context():
+        assert app_module.current_schema_version() == 0
+    assert serve.prepare_schema(app_module) is True
+    with app_module.app.app_context():
+        assert app_module.schema_is_current()
+    assert serve.prepare_schema(app_module) is False
+
+
+def test_benchmark_varies_one_setting_at_a_time():
+    configs = dict(bench_server.configurations({'threads': [1, 8], 'workers': [2]}))
+    assert list(configs) == ['baseline', 'threads=1', 'workers=2']
+    assert configs['workers=2'] == dict(bench_server.BASELINE, workers=2)
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared state backends and what the app keeps in them
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+from sqlalchemy import create_engine
+
+import shared_state
+
+
+@pytest.fixture(params=['memory', 'file', 'db'])
+def backend(request, tmp_path):
+    if request.param == 'memory':
+        return shared_state.MemoryBackend()
+    if request.param == 'file':
+        return shared_state.FileBackend(str(tmp_path / 'state'))
+    engine = create_engine(f"sqlite:///{tmp_path / 'state.db'}")
+    backend = shared_state.DatabaseBackend(lambda: engine)
+    backend.create_table()
+    return backend
+
+
+def test_get_set_add_delete(backend):
+    assert backend.get('a') is None
+    backend.set('a', {'x': [1, 2]})
+    assert backend.get('a') == {'x': [1, 2]}
+    assert backend.add('a', 'other') == {'x': [1, 2]}
+    assert backend.add('b', 'first') == 'first'
+    backend.delete('a')
+    assert backend.get('a') is None
+
+
+def test_set_many(backend, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_state.time, 'time', lambda: now[0])
+    backend.set('a', 'old')
+    backend.set_many([('a', 1), ('b', [2])], ttl=10)
+    assert (backend.get('a'), backend.get('b')) == (1, [2])
+    now[0] += 11
+    assert backend.get('a') is None and backend.get('b') is None
+
+def test_expired_values_are_replaced(backend, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(shared_state.time, 'time', lambda: now[0])
+    backend.set('k', 'old', ttl=10)
+    assert backend.add('k', 'new') == 'old'
+    now[0] += 11
+    assert backend.get('k') is None
+    assert backend.add('k', 'new') == 'new'
+
+
+def test_counters_reset_per_window(backend, monkeypatch):
+    now = [1200.0]
+    monkeypatch.setattr(shared_state.time, 'time', lambda: now[0])
+    assert [backend.incr('c', window=60) for _ in range(3)] == [1, 2, 3]
+    now[0] += 60
+    assert backend.incr('c', window=60) == 1
+
+
+def test_clear_by_prefix(backend):
+    backend.set('search:1', 1)
+    backend.set('keep', 2)
+    backend.incr('search:count')
+    backend.clear('search:')
+    assert backend.get('search:1') is None
+    assert backend.get('keep') == 2
+    assert backend.incr('search:count') == 1
+
+
+def test_importing_the_app_does_not_touch_the_database(tmp_path):
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_path / 'missing' / 'app.db'}")
+    env.pop('SECRET_KEY', None)
+    proc = subprocess.run([sys.executable, '-c', 'import app'], cwd=os.path.dirname(os.path.abspath(__file__)),
+                          env=env, capture_output=True, text=True)
+    assert proc.returncode == 0, proc.stderr
+    assert 'SECRET_KEY' not in proc.stdout
+
+
+def test_shared_secret_key_is_loaded_before_the_first_session(app_module, monkeypatch):
+    monkeypatch.setitem(app_module._secret_key_state, 'loaded', False)
+    monkeypatch.setitem(app_module.app.config, 'SECRET_KEY', 'per-process')
+    with app_module.app.app_context():
+        app_module.state_store.set('secret_key', 'shared')
+    client = app_module.app.test_client()
+    client.post('/register', json={'username': 'keyuser', 'email': 'keyuser@example.com',
+                                   'password': 'testpass123', 'user_type': 'mentor'})
+    client.post('/login', json={'username': 'keyuser', 'password': 'testpass123'})
+    assert app_module.app.config['SECRET_KEY'] == 'shared'
+    assert client.get('/mentor').status_code == 200
+
+def test_sessions_survive_restart_until_rotated(app_module, mentor_client, monkeypatch):
+    assert mentor_client.get('/mentor').status_code == 200
+    # A new worker process gets a different RUN_ID but shares the epoch
+    monkeypatch.setitem(app_module.app.config, 'RUN_ID', 'another-process')
+    app_module._session_epoch_cache['value'] = None
+    assert mentor_client.get('/mentor').status_code == 200
+
+    monkeypatch.setenv('ADMIN_TOKEN', 'secret')
+    response = app_module.app.test_client().post('/admin/sessions/rotate', headers={'X-Admin-Token': 'secret'})
+    assert response.status_code == 200
+    assert mentor_client.get('/mentor').status_code == 302
+
+
+def test_search_is_cached_and_rate_limited(app_module, mentor_client, fake_backend, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    first = mentor_client.post('/search', json={'query': 'Two Sum'}).get_json()
+    calls = fake_backend.calls
+    second = mentor_client.post('/search', json={'query': '  two   sum '}).get_json()
+    assert second['cached'] is True
+    assert second['questions'] == first['questions']
+    assert fake_backend.calls == calls
+
+    limited = app_module.rate_limit('test', 2)(lambda: 'ok')
+    with app_module.app.test_request_context('/'):
+        assert [limited(), limited()] == ['ok', 'ok']
+        response, status = limited()
+        assert status == 429
+        assert int(response.headers['Retry-After']) <= 60
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Tests for the similarity index and near-duplicate search lookups
+"""
+
+import pytest
+
+import similarity
+
+
+def test_near_duplicate_needs_every_content_word_matched():
+    assert similarity.is_near_duplicate('palindrome questions asked at google',
+                                        'google palindrome problems')
+    assert not similarity.is_near_duplicate('three sum for google', 'two sum google')
+    assert not similarity.is_near_duplicate('lru cache', 'lfu cache')
+    assert not similarity.is_near_duplicate('3sum', '4sum')
+    assert not similarity.is_near_duplicate('google 3sum', 'google 4sum')
+
+
+def test_index_ranks_paraphrase_first_and_persists(tmp_path):
+    path = str(tmp_path / 'index.jsonl')
+    index = similarity.SimilarityIndex(path)
+    index.ensure_loaded()
+    index.add_many([('a', 'google palindrome problems', {'n': 1}),
+                    ('b', 'amazon graph questions', None),
+                    ('c', 'binary search on arrays', None)])
+    top = index.search('palindrome questions asked at google', k=1)[0]
+    assert top.key == 'a' and top.payload == {'n': 1}
+
+    # A second instance (another worker) sees the same entries and later changes
+    other = similarity.SimilarityIndex(path)
+    other.ensure_loaded()
+    assert len(other) == 3
+    index.remove('b')
+    index.add('d', 'meta dynamic programming')
+    other.sync()
+    assert 'b' not in other and other.get('d') == ('meta dynamic programming', None)
+
+
+
+def test_log_is_compacted_as_entries_churn(tmp_path):
+    path = str(tmp_path / 'index.jsonl')
+    index = similarity.SimilarityIndex(path, compact_min_dead=10)
+    other = similarity.SimilarityIndex(path, compact_min_dead=10)
+    index.ensure_loaded()
+    other.ensure_loaded()
+    index.add('keep', 'binary search on arrays')
+    other.add('theirs', 'amazon graph questions')
+    for i in range(100):
+        index.add('churn', f'dynamic programming {i}')
+        index.remove('churn')
+    with open(path) as f:
+        assert len(f.readlines()) < 25
+    # Records appended by the other process survive compaction
+    fresh = similarity.SimilarityIndex(path)
+    fresh.ensure_loaded()
+    assert 'keep' in fresh and 'theirs' in fresh and 'churn' not in fresh
+    other.sync()
+    assert 'keep' in other and 'churn' not in other
+
+def test_numpy_and_approximate_paths_agree(tmp_path):
+    pytest.importorskip('numpy')
+    texts = [(str(i), f'topic {i} interview questions', None) for i in range(50)]
+    exact = similarity.SimilarityIndex(None)
+    approx = similarity.SimilarityIndex(None, approximate=True, approximate_min_size=10)
+    for index in (exact, approx):
+        index.ensure_loaded()
+        index.add_many(texts)
+    assert exact.search('topic 7 interview questions', k=1)[0].key == '7'
+    assert approx.search('topic 7 interview questions', k=1)[0].key == '7'
+
+
+def test_numpy_and_pure_python_paths_agree_through_removals(monkeypatch):
+    pytest.importorskip('numpy')
+    results = []
+    for use_numpy in (True, False):
+        if not use_numpy:
+            monkeypatch.setattr(similarity, 'numpy', None)
+        index = similarity.SimilarityIndex(None)
+        index.ensure_loaded()
+        index.add_many([(str(i), f'topic {i} interview questions', None) for i in range(300)])
+        index.remove_many([str(i) for i in range(0, 300, 2)])
+        index.add('7', 'dynamic programming on trees')
+        if use_numpy:
+            # Removed rows are compacted away; storage follows the features, not the dimension
+            assert len(index._row_starts) <= 2 * len(index) + 64
+            assert index._nnz < 100 * len(index)
+        results.append([(m.key, round(m.score, 4)) for m in index.search('topic 9 interview questions', k=10)]
+                       + [(m.key, round(m.score, 4)) for m in index.search('dynamic programming', k=1)])
+    assert results[0] == results[1]
+    assert results[0][0][0] == '9' and results[0][-1][0] == '7'
+    assert all(int(key) % 2 for key, _ in results[0])
+
+def test_paraphrased_search_served_from_earlier_result(app_module, mentor_client, fake_backend,
+                                                       monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    first = mentor_client.post('/search', json={'query': 'google palindrome problems'}).get_json()
+    assert first['success'] and not first.get('cached')
+
+    calls = fake_backend.calls
+    second = mentor_client.post('/search', json={'query': 'palindrome questions asked at google'}).get_json()
+    assert second['cached'] is True
+    assert second['similar_query'] == 'google palindrome problems'
+    assert second['questions'] == first['questions']
+    assert fake_backend.calls == calls
+
+    # Different options or a different problem are not near-duplicates
+    other = mentor_client.post('/search', json={'query': 'palindrome questions asked at google',
+                                                'count': 3}).get_json()
+    assert 'similar_query' not in other
+    assert fake_backend.calls > calls
+
+
+def test_saved_set_answers_matching_search(app_module, mentor_client, fake_backend, monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(app_module, 'SEARCH_CACHE_TTL', 0)
+    questions = [{'topic': f'Problem {i}', 'difficulty': 'Easy', 'url': f'https://leetcode.com/problems/p{i}/'}
+                 for i in range(6)]
+    saved = mentor_client.post('/save_search', json={
+        'query': 'amazon sliding window', 'summary': 'Amazon sliding window problems', 'questions': questions,
+    }).get_json()
+
+    result = mentor_client.post('/search', json={'query': 'sliding window questions amazon', 'count': 5}).get_json()
+    assert result['library_set']['id'] == saved['question_id']
+    assert len(result['questions']) == 5
+    assert fake_backend.calls == 0
+
+    # "fresh" skips the lookup; a deleted set is no longer offered
+    fresh = mentor_client.post('/search', json={'query': 'sliding window questions amazon', 'count': 5,
+                                                'fresh': True}).get_json()
+    assert 'library_set' not in fresh and fake_backend.calls > 0
+    mentor_client.post('/delete_question', json={'question_id': saved['question_id']})
+    with app_module.app.app_context():
+        assert str(saved['question_id']) not in app_module.library_index
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests for JSONL export/import of question sets
+"""
+
+import json
+
+QUESTIONS = [
+    {'url': 'leetcode.com/problems/two-sum/', 'platform': 'LeetCode', 'topic': 'Two Sum',
+     'difficulty_level': 'Easy', 'company': 'Google', 'category': 'Array'},
+    {'url': '/problems/lru-cache/', 'platform': 'LeetCode', 'topic': 'LRU Cache',
+     'difficulty_level': 'Medium', 'category': 'Design'},
+]
+
+
+def test_export_import_round_trip(app_module, mentor_client):
+    for i in range(3):
+        mentor_client.post('/save_search', json={'query': f'q{i}', 'summary': f's{i}', 'questions': QUESTIONS})
+
+    response = mentor_client.get('/export/question_sets')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.data.decode().splitlines()
+    assert [json.loads(line)['summary'] for line in lines] == ['s0', 's1', 's2']
+    assert json.loads(lines[0])['questions'][1]['url'] == 'https://leetcode.com/problems/lru-cache/'
+
+    with app_module.app.app_context():
+        app_module.db.session.query(app_module.QuestionSet).delete()
+        app_module.db.session.commit()
+        result = app_module.import_question_sets_jsonl(lines, batch_size=2)
+        assert result == {'imported': 3, 'skipped': 0, 'errors': []}
+        assert app_module.db.session.query(app_module.QuestionSet).count() == 3
+        assert app_module.db.session.query(app_module.QuestionSet.question_count).first() == (2,)
+
+
+def test_import_endpoint_normalizes_and_reports_bad_lines(app_module, mentor_client, student_client):
+    body = '\n'.join([
+        json.dumps({'summary': 'Arrays', 'questions': QUESTIONS, 'is_published': True}),
+        'not json',
+        json.dumps({'summary': 'Empty', 'questions': []}),
+        '',
+    ])
+    response = mentor_client.post('/import/question_sets', data=body, content_type='application/x-ndjson')
+    data = response.get_json()
+    assert data['imported'] == 1
+    assert data['skipped'] == 2
+    assert data['errors'][0].startswith('line 2:')
+
+    exported = json.loads(mentor_client.get('/export/question_sets').data)
+    assert exported['query'] == 'Arrays'
+    assert exported['is_published'] is True
+    assert exported['questions'][0]['url'] == 'https://leetcode.com/problems/two-sum/'
+    assert exported['questions'][1]['company'] == 'General'
+    assert mentor_client.get('/analytics?published_only=1').get_json()['total'] == 2
+    # Imported published sets reach the change feed
+    assert [e['kind'] for e in app_module.fetch_change_events(0, 10)] == ['published']
+
+    assert student_client.get('/export/question_sets').status_code == 403
+
+
+def test_cli_commands(app_module, mentor_client, tmp_path):
+    mentor_client.post('/save_search', json={'query': 'q', 'summary': 's', 'questions': QUESTIONS})
+    path = tmp_path / 'sets.jsonl'
+    runner = app_module.app.test_cli_runner()
+
+    result = runner.invoke(args=['export-sets', '--output', str(path)])
+    assert result.exit_code == 0
+    assert json.loads(path.read_text())['mentor'] == 'mentor1'
+
+    result = runner.invoke(args=['import-sets', str(path)])
+    assert result.exit_code == 0
+    assert 'Imported 1 question sets' in result.output
+    result = runner.invoke(args=['import-sets', str(path), '--mentor', 'nobody'])
+    assert result.exit_code != 0
+
+
+def test_import_events_and_index_cover_only_imported_rows(app_module, mentor_client, monkeypatch):
+    mentor_client.post('/save_search', json={'query': 'q', 'summary': 's', 'questions': QUESTIONS})
+    lines = mentor_client.get('/export/question_sets').data.decode().splitlines()
+    record = dict(json.loads(lines[0]), is_published=True)
+    apply_rollup_delta = app_module.apply_rollup_delta
+    concurrent = []
+
+    def publish_concurrently(*args, **kwargs):
+        # A set published by another request while the import runs
+        if not concurrent:
+            other = app_module.QuestionSet(mentor_id=1, query='other', summary='other', is_published=True)
+            other.set_questions(QUESTIONS)
+            app_module.db.session.add(other)
+            app_module.db.session.flush()
+            concurrent.append(other.id)
+        return apply_rollup_delta(*args, **kwargs)
+
+    monkeypatch.setattr(app_module, 'apply_rollup_delta', publish_concurrently)
+    with app_module.app.app_context():
+        result = app_module.import_question_sets_jsonl([json.dumps(record)] * 3, batch_size=2)
+        assert result['imported'] == 3
+        imported = [row.id for row in app_module.db.session.query(app_module.QuestionSet.id).filter(
+            app_module.QuestionSet.query == 'q', app_module.QuestionSet.is_published.is_(True))]
+        events = [e['question_set_id'] for e in app_module.fetch_change_events(0, 10)]
+    assert sorted(events) == sorted(imported) and concurrent[0] not in events
+    assert str(concurrent[0]) not in app_module.library_index
+
+
+def test_import_rejects_fields_of_the_wrong_type(app_module, mentor_client):
+    good = {'summary': 'ok', 'questions': QUESTIONS, 'mentor': 'mentor1'}
+    lines = [json.dumps(dict(good, mentor=['mentor1'])),
+             json.dumps(dict(good, questions=[dict(QUESTIONS[0], topic=['Two Sum'])])),
+             json.dumps(good)]
+    with app_module.app.app_context():
+        result = app_module.import_question_sets_jsonl(lines, batch_size=1)
+    assert result['imported'] == 1 and result['skipped'] == 2
+    assert result['errors'][0].startswith('line 1:') and 'mentor' in result['errors'][0]
+    assert 'topic' in result['errors'][1]